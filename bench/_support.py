@@ -0,0 +1,97 @@
+"""Shared helpers for the stdlib-only benchmarks under `bench/`.
+
+Run from the repo root, e.g. `python bench/bench_api.py`.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.client import HTTPConnection
+from pathlib import Path
+
+sys.dont_write_bytecode = True
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from oa_server import db  # noqa: E402
+from oa_server.server import Handler, OAHTTPServer  # noqa: E402
+
+
+class QuietHandler(Handler):
+    def log_message(self, fmt, *args):
+        return
+
+
+def temp_db_path(prefix: str = "bench") -> Path:
+    fd, name = tempfile.mkstemp(prefix=f"oa_{prefix}_", suffix=".sqlite3")
+    os.close(fd)
+    os.unlink(name)
+    return Path(name)
+
+
+def start_server(db_path: Path, **server_kwargs):
+    httpd = OAHTTPServer(("127.0.0.1", 0), QuietHandler, db_path=db_path, frontend_dir=Path("frontend"), **server_kwargs)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    return httpd, thread
+
+
+def stop_server(httpd, thread) -> None:
+    httpd.shutdown()
+    thread.join(timeout=5)
+    httpd.server_close()
+
+
+def http(port: int, method: str, path: str, *, json_body=None, cookie=None):
+    conn = HTTPConnection("127.0.0.1", port, timeout=30)
+    headers = {}
+    body = None
+    if cookie:
+        headers["Cookie"] = cookie
+    if json_body is not None:
+        body = json.dumps(json_body).encode("utf-8")
+        headers["Content-Type"] = "application/json"
+    conn.request(method, path, body=body, headers=headers)
+    res = conn.getresponse()
+    raw = res.read()
+    resp_headers = dict(res.getheaders())
+    conn.close()
+    return res.status, resp_headers, raw
+
+
+def login(port: int, username: str, password: str) -> str:
+    status, headers, _ = http(port, "POST", "/api/login", json_body={"username": username, "password": password})
+    if status != 200:
+        raise RuntimeError(f"login failed: {status}")
+    return headers.get("Set-Cookie", "").split(";", 1)[0]
+
+
+def run_concurrent(fn, *, threads: int, seconds: float) -> tuple[int, float]:
+    """Call `fn()` from `threads` threads for `seconds`; returns (calls, elapsed)."""
+    counts = [0] * threads
+    deadline = time.perf_counter() + seconds
+    errors: list[BaseException] = []
+
+    def worker(i: int) -> None:
+        try:
+            while time.perf_counter() < deadline:
+                fn()
+                counts[i] += 1
+        except BaseException as e:  # pragma: no cover - surfaced below
+            errors.append(e)
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - started
+    if errors:
+        raise errors[0]
+    return sum(counts), elapsed
+
+
+__all__ = ["db", "http", "login", "run_concurrent", "start_server", "stop_server", "temp_db_path"]
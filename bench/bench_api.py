@@ -0,0 +1,59 @@
+"""Requests/sec on the read endpoints across server configurations.
+
+Columns: connect-per-request, pooled connections, pooled + session cache.
+
+    python bench/bench_api.py [--seconds 5] [--threads 8]
+"""
+
+import argparse
+
+from _support import db, http, login, run_concurrent, start_server, stop_server, temp_db_path
+
+ENDPOINTS = ["/api/me", "/api/inbox", "/api/requests", "/api/notifications", "/api/workflows"]
+CONFIGS = [
+    ("no pool", {"db_pool_size": 0, "session_cache_size": 0}),
+    ("pool=8", {"db_pool_size": 8, "session_cache_size": 0}),
+    ("+sess cache", {"db_pool_size": 8}),
+]
+
+
+def bench(server_kwargs: dict, *, seconds: float, threads: int) -> dict[str, float]:
+    db_path = temp_db_path("api")
+    db.init_db(db_path)
+    httpd, thread = start_server(db_path, **server_kwargs)
+    port = httpd.server_address[1]
+    try:
+        cookie = login(port, "user", "user")
+        for i in range(20):
+            http(port, "POST", "/api/requests", cookie=cookie, json_body={"type": "generic", "title": f"t{i}", "body": "b"})
+        out: dict[str, float] = {}
+        for path in ENDPOINTS:
+            def call(path=path):
+                status, _, _ = http(port, "GET", path, cookie=cookie)
+                if status != 200:
+                    raise RuntimeError(f"{path}: {status}")
+
+            n, elapsed = run_concurrent(call, threads=threads, seconds=seconds)
+            out[path] = n / elapsed
+        return out
+    finally:
+        stop_server(httpd, thread)
+        for suffix in ("", "-wal", "-shm"):
+            db_path.with_name(db_path.name + suffix).unlink(missing_ok=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    results = [bench(kwargs, seconds=args.seconds, threads=args.threads) for _, kwargs in CONFIGS]
+    print(f"{'endpoint':<22}" + "".join(f"{label:>14}" for label, _ in CONFIGS) + f"{'speedup':>10}")
+    for path in ENDPOINTS:
+        row = "".join(f"{r[path]:>12.0f}/s" for r in results)
+        print(f"{path:<22}{row}{results[-1][path] / results[0][path]:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Attachment export: one download per file vs one streamed ZIP.
+
+    python bench/bench_archive.py [--files 3000] [--kb 32] [--big-mb 200]
+
+Seeds `--files` attachments of `--kb` each plus one `--big-mb` file across
+requests, then fetches them all: "one-by-one" is what an auditor does today
+(GET /api/attachments/{id}/download per file, one keep-alive connection);
+"zip" is GET /api/attachments.zip. Peak Python heap is measured with
+tracemalloc on a second run. The server runs in-process: for "zip" the client
+reads 256 KiB at a time, so the peak is what the server holds; "one-by-one"
+reads each file whole, so its peak includes the largest file.
+"""
+
+import argparse
+import hashlib
+import os
+import tempfile
+import time
+import tracemalloc
+from http.client import HTTPConnection
+from pathlib import Path
+
+from _support import db, login, start_server, stop_server, temp_db_path
+
+from oa_server._server.blob_store import blob_storage_path
+
+
+def seed(db_path: Path, attachments_dir: Path, files: int, size: int, big: int) -> list[int]:
+    ids = []
+    now = int(time.time())
+    with db.connect(db_path) as conn:
+        for i in range(files + 1):
+            if i % 10 == 0:
+                cur = conn.execute(
+                    "INSERT INTO requests(user_id,request_type,title,body,status,created_at,updated_at) VALUES(?,?,?,?,?,?,?)",
+                    (1, "generic", f"audit {i}", "b", "pending", now, now),
+                )
+                req_id = int(cur.lastrowid)
+            content = os.urandom(big if i == files else size)
+            digest = hashlib.sha256(content).hexdigest()
+            path = attachments_dir / blob_storage_path(digest)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(content)
+            ids.append(
+                db.create_attachment(
+                    conn,
+                    req_id,
+                    uploader_user_id=1,
+                    filename=f"scan-{i}.pdf",
+                    content_type="application/pdf",
+                    size=len(content),
+                    storage_path=blob_storage_path(digest),
+                    sha256=digest,
+                )
+            )
+    return ids
+
+
+def one_by_one(port: int, cookie: str, ids: list[int]) -> int:
+    conn = HTTPConnection("127.0.0.1", port, timeout=120)
+    total = 0
+    for att_id in ids:
+        conn.request("GET", f"/api/attachments/{att_id}/download", headers={"Cookie": cookie})
+        total += len(conn.getresponse().read())
+    conn.close()
+    return total
+
+
+def zipped(port: int, cookie: str) -> int:
+    conn = HTTPConnection("127.0.0.1", port, timeout=600)
+    conn.request("GET", "/api/attachments.zip", headers={"Cookie": cookie})
+    res = conn.getresponse()
+    total = 0
+    while data := res.read(256 * 1024):
+        total += len(data)
+    conn.close()
+    if res.status != 200:
+        raise RuntimeError(f"zip: {res.status}")
+    return total
+
+
+def measure(label: str, fn) -> None:
+    started = time.perf_counter()
+    size = fn()
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:10} {elapsed:6.2f} s  {size / elapsed / 1e6:7.1f} MB/s  peak heap {peak / 1024 / 1024:7.2f} MiB", flush=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=3000)
+    parser.add_argument("--kb", type=int, default=32)
+    parser.add_argument("--big-mb", type=float, default=200.0)
+    args = parser.parse_args()
+
+    db_path = temp_db_path("archive")
+    files_dir = tempfile.TemporaryDirectory(prefix="oa_archive_")
+    try:
+        db.init_db(db_path)
+        ids = seed(db_path, Path(files_dir.name), args.files, args.kb * 1024, int(args.big_mb * 1024 * 1024))
+        httpd, thread = start_server(db_path, attachments_dir=Path(files_dir.name))
+        try:
+            port = httpd.server_address[1]
+            cookie = login(port, "admin", "admin")
+            print(f"{args.files} x {args.kb} KiB + 1 x {args.big_mb:g} MB")
+            measure("one-by-one", lambda: one_by_one(port, cookie, ids))
+            measure("zip", lambda: zipped(port, cookie))
+        finally:
+            stop_server(httpd, thread)
+    finally:
+        files_dir.cleanup()
+        for suffix in ("", "-wal", "-shm"):
+            db_path.with_name(db_path.name + suffix).unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Idle keep-alive connections: thread engine vs asyncio engine.
+
+    python bench/bench_async.py [--idle 2000] [--seconds 3] [--threads 8]
+
+Opens `--idle` keep-alive connections that each make one request and then
+sit idle (browsers, long-poll clients), then measures /api/inbox throughput
+from `--threads` active keep-alive clients. Reported: server-side threads,
+process RSS growth, and active req/s. Client and server share the process,
+so RSS includes both ends' sockets.
+
+The thread pool (`--server-mode pool`) is left out: its workers stay pinned by
+the first `--threads` idle connections, so the rest wait out the keep-alive
+timeout, which is the case the asyncio engine exists for.
+"""
+
+import argparse
+import threading
+from http.client import HTTPConnection
+
+from _support import db, http, login, run_concurrent, start_server, stop_server, temp_db_path
+
+CONFIGS = [
+    ("threads", {"engine": "threads"}),
+    ("asyncio 16", {"engine": "asyncio", "threads": 16}),
+]
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def run(server_kwargs: dict, *, idle: int, seconds: float, threads: int) -> str:
+    db_path = temp_db_path("async")
+    db.init_db(db_path)
+    httpd, thread = start_server(db_path, keepalive_timeout=300, **server_kwargs)
+    port = httpd.server_address[1]
+    conns: list[HTTPConnection] = []
+    try:
+        cookie = login(port, "user", "user")
+        for i in range(20):
+            http(port, "POST", "/api/requests", cookie=cookie, json_body={"type": "generic", "title": f"t{i}", "body": "b"})
+        threads_before, rss_before = threading.active_count(), rss_mb()
+        for _ in range(idle):
+            conn = HTTPConnection("127.0.0.1", port, timeout=60)
+            conn.request("GET", "/api/me", headers={"Cookie": cookie})
+            res = conn.getresponse()
+            res.read()
+            conns.append(conn)
+        threads_idle, rss_idle = threading.active_count() - threads_before, rss_mb() - rss_before
+
+        local = threading.local()
+
+        def call() -> None:
+            conn = getattr(local, "conn", None)
+            if conn is None:
+                conn = local.conn = HTTPConnection("127.0.0.1", port, timeout=60)
+            conn.request("GET", "/api/inbox", headers={"Cookie": cookie})
+            res = conn.getresponse()
+            res.read()
+            if res.status != 200:
+                raise RuntimeError(f"inbox: {res.status}")
+
+        n, elapsed = run_concurrent(call, threads=threads, seconds=seconds)
+        return f"+{threads_idle:5} threads  +{rss_idle:7.1f} MB  {n / elapsed:7.0f} req/s active"
+    finally:
+        for conn in conns:
+            conn.close()
+        stop_server(httpd, thread)
+        for suffix in ("", "-wal", "-shm"):
+            db_path.with_name(db_path.name + suffix).unlink(missing_ok=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--idle", type=int, default=2000)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{args.idle} idle keep-alive connections, {args.threads} active clients")
+    for label, kwargs in CONFIGS:
+        print(f"  {label:11}", run(kwargs, idle=args.idle, seconds=args.seconds, threads=args.threads), flush=True)
+
+
+if __name__ == "__main__":
+    main()
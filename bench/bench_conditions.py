@@ -0,0 +1,111 @@
+"""Per-evaluation cost of workflow step conditions: interpreted vs compiled.
+
+    python bench/bench_conditions.py [--number 200000]
+
+"interpreted" is the old step_condition_passes, which re-stripped the row
+values, re-parsed thresholds and re-split lists on every call. "compiled" is
+the predicate from workflow_conditions.compile_condition. The expression row
+compares the same logic written as an `expr` condition against evaluating its
+leaves through the interpreter.
+"""
+
+import argparse
+import timeit
+
+import _support  # noqa: F401  (puts the repo root on sys.path)
+
+from oa_server._server.workflow_conditions import compile_condition
+
+
+def interpreted(step_row, request_payload, *, creator_dept):
+    kind = None if step_row["condition_kind"] is None else str(step_row["condition_kind"]).strip()
+    value = None if step_row["condition_value"] is None else str(step_row["condition_value"]).strip()
+    if not kind:
+        return True
+    if kind in ("min_amount", "max_amount"):
+        if not request_payload:
+            return False
+        try:
+            amount = float(request_payload.get("amount"))
+            threshold = float(value or "0")
+        except Exception:
+            return False
+        return amount >= threshold if kind == "min_amount" else amount <= threshold
+    if kind == "min_days":
+        if not request_payload:
+            return False
+        try:
+            days = int(request_payload.get("days"))
+            threshold = int(value or "0")
+        except Exception:
+            return False
+        return days >= threshold
+    if kind in ("dept_in", "category_in"):
+        actual = creator_dept if kind == "dept_in" else str((request_payload or {}).get("category", ""))
+        if not actual:
+            return False
+        allowed = []
+        for part in (value or "").replace(";", ",").split(","):
+            part = part.strip()
+            if part:
+                allowed.append(part.lower())
+        if not allowed:
+            return False
+        return actual.strip().lower() in allowed
+    return True
+
+
+def row(kind, value):
+    return {"condition_kind": kind, "condition_value": value}
+
+
+PAYLOAD = {"amount": "6800.50", "days": 3, "category": "Travel"}
+DEPT = "HR"
+CASES = [
+    ("min_amount", row("min_amount", " 5000 ")),
+    ("min_days", row("min_days", "2")),
+    ("dept_in (6)", row("dept_in", "IT, Dev; Sales, Ops, Finance, HR")),
+    ("category_in (4)", row("category_in", "office, travel, meals, training")),
+]
+EXPR = "min_amount(5000) and (dept_in(IT, Dev, HR) or category_in(travel)) and not min_days(10)"
+EXPR_ROWS = (row("min_amount", "5000"), row("dept_in", "IT, Dev, HR"), row("category_in", "travel"), row("min_days", "10"))
+
+
+def interpreted_expr(payload, dept):
+    a, d, c, n = EXPR_ROWS
+    return (
+        interpreted(a, payload, creator_dept=dept)
+        and (interpreted(d, payload, creator_dept=dept) or interpreted(c, payload, creator_dept=dept))
+        and not interpreted(n, payload, creator_dept=dept)
+    )
+
+
+def ns_per_call(fn, number: int) -> float:
+    # Best of 5 to keep scheduler noise out of sub-microsecond numbers.
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e9
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=200_000)
+    args = parser.parse_args()
+
+    print(f"{'condition':<18}{'interpreted':>14}{'compiled':>12}{'speedup':>10}")
+    for label, step in CASES:
+        pred = compile_condition(step["condition_kind"], step["condition_value"])
+        assert pred(PAYLOAD, DEPT) == interpreted(step, PAYLOAD, creator_dept=DEPT)
+        before = ns_per_call(lambda: interpreted(step, PAYLOAD, creator_dept=DEPT), args.number)
+        after = ns_per_call(lambda: pred(PAYLOAD, DEPT), args.number)
+        print(f"{label:<18}{before:>11.0f} ns{after:>9.0f} ns{before / after:>9.2f}x")
+
+    pred = compile_condition("expr", EXPR)
+    assert pred(PAYLOAD, DEPT) == interpreted_expr(PAYLOAD, DEPT)
+    before = ns_per_call(lambda: interpreted_expr(PAYLOAD, DEPT), args.number)
+    after = ns_per_call(lambda: pred(PAYLOAD, DEPT), args.number)
+    print(f"{'expr (4 leaves)':<18}{before:>11.0f} ns{after:>9.0f} ns{before / after:>9.2f}x")
+    parse = ns_per_call(lambda: compile_condition.__wrapped__("expr", EXPR), max(1, args.number // 20))
+    print(f"one-off expr compile: {parse / 1000:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Attachment downloads: sendfile (thread engine) vs bounded reads (asyncio engine).
+
+    python bench/bench_download.py [--mb 50] [--seconds 3] [--threads 4]
+
+One `--mb` attachment is downloaded in full back to back from `--threads`
+clients; a second pass fetches a 1 MiB Range from a random offset, the way a
+PDF viewer or a resumed download does. Reported are MB/s and the peak Python
+heap during the run (tracemalloc), which stays flat as the file grows.
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import tracemalloc
+from http.client import HTTPConnection
+from pathlib import Path
+
+from _support import db, http, login, run_concurrent, start_server, stop_server, temp_db_path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mb", type=float, default=50.0)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+    size = int(args.mb * 1024 * 1024)
+
+    for engine in ("threads", "asyncio"):
+        db_path = temp_db_path("download")
+        db.init_db(db_path)
+        files_dir = tempfile.TemporaryDirectory(prefix="oa_download_")
+        httpd, thread = start_server(db_path, engine=engine, attachments_dir=Path(files_dir.name), max_upload_bytes=size + 1)
+        port = httpd.server_address[1]
+        try:
+            cookie = login(port, "user", "user")
+            _, _, raw = http(port, "POST", "/api/requests", cookie=cookie, json_body={"type": "generic", "title": "d", "body": "b"})
+            with tempfile.TemporaryFile() as f:
+                for _ in range(size // (1024 * 1024)):
+                    f.write(os.urandom(1024 * 1024))
+                f.seek(0)
+                conn = HTTPConnection("127.0.0.1", port, timeout=120)
+                conn.request(
+                    "POST",
+                    f"/api/requests/{json.loads(raw)['id']}/attachments?filename=big.bin",
+                    body=f,
+                    headers={"Cookie": cookie, "Content-Type": "application/octet-stream", "Content-Length": str(size)},
+                )
+                path = f"/api/attachments/{json.loads(conn.getresponse().read())['id']}/download"
+                conn.close()
+
+            print(f"{engine} engine, {args.mb:g} MB file, {args.threads} threads")
+            for label, ranged in (("full", False), ("1MiB range", True)):
+                local = threading.local()
+                received = [0]
+                lock = threading.Lock()
+
+                def download() -> None:
+                    conn = getattr(local, "conn", None)
+                    if conn is None:
+                        conn = local.conn = HTTPConnection("127.0.0.1", port, timeout=60)
+                    headers = {}
+                    if ranged:
+                        start = random.randrange(size - (1 << 20))
+                        headers["Range"] = f"bytes={start}-{start + (1 << 20) - 1}"
+                    conn.request("GET", path, headers={"Cookie": cookie, **headers})
+                    res = conn.getresponse()
+                    n = 0
+                    while chunk := res.read(64 * 1024):
+                        n += len(chunk)
+                    if res.status not in (200, 206):
+                        raise RuntimeError(f"download: {res.status}")
+                    with lock:
+                        received[0] += n
+
+                tracemalloc.start()
+                n, elapsed = run_concurrent(download, threads=args.threads, seconds=args.seconds)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                mb = received[0] / 1024 / 1024
+                print(f"  {label:10} {n / elapsed:8.1f} req/s  {mb / elapsed:8.1f} MB/s  peak heap {peak / 1024 / 1024:6.2f} MiB", flush=True)
+        finally:
+            stop_server(httpd, thread)
+            files_dir.cleanup()
+            for suffix in ("", "-wal", "-shm"):
+                db_path.with_name(db_path.name + suffix).unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Request export: streamed CSV/NDJSON vs building the whole CSV in memory.
+
+    python bench/bench_export.py [--requests 200000]
+
+"in-memory" reproduces the old handler (list_requests + row_to_request +
+StringIO + one bytes object). Peak Python heap is measured with tracemalloc
+on a second run; the server runs in-process.
+"""
+
+import argparse
+import csv
+import io
+import json
+import time
+import tracemalloc
+from http.client import HTTPConnection
+
+from _support import db, login, start_server, stop_server, temp_db_path
+
+from oa_server._server.serializers import row_to_request
+
+
+def seed(db_path, count: int) -> None:
+    now = int(time.time())
+    payload = json.dumps({"amount": 123.45, "category": "差旅", "reason": "客户拜访"}, ensure_ascii=False)
+    with db.connect(db_path) as conn:
+        conn.executemany(
+            "INSERT INTO requests(user_id,request_type,title,body,payload_json,status,created_at,updated_at) VALUES(?,?,?,?,?,?,?,?)",
+            ((2, "expense", f"差旅报销 {i}", "上海-北京 往返", payload, "pending", now, now) for i in range(count)),
+        )
+
+
+def in_memory_csv(db_path) -> int:
+    with db.connect(db_path) as conn:
+        rows = db.list_requests(conn, 1, True)
+    items = [row_to_request(r) for r in rows]
+    buf = io.StringIO()
+    w = csv.writer(buf, lineterminator="\n")
+    w.writerow(["id", "type", "title", "body", "status", "owner_username", "created_at"])
+    for it in items:
+        w.writerow([it["id"], it["type"], it["title"], it["body"], it["status"], it["owner"]["username"], it["created_at"]])
+    return len(buf.getvalue().encode("utf-8"))
+
+
+def streamed(port: int, cookie: str, fmt: str) -> int:
+    conn = HTTPConnection("127.0.0.1", port, timeout=600)
+    conn.request("GET", f"/api/requests?scope=all&format={fmt}", headers={"Cookie": cookie})
+    res = conn.getresponse()
+    total = 0
+    while True:
+        data = res.read(256 * 1024)
+        if not data:
+            break
+        total += len(data)
+    conn.close()
+    return total
+
+
+def measure(label: str, fn) -> None:
+    started = time.perf_counter()
+    size = fn()
+    elapsed = time.perf_counter() - started
+    # Second run under tracemalloc: it slows allocation-heavy code too much to time the same run.
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:15} {elapsed:6.2f} s  {size / elapsed / 1e6:6.1f} MB/s  peak {peak / 1e6:7.1f} MB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200_000)
+    args = parser.parse_args()
+
+    path = temp_db_path("export")
+    try:
+        db.init_db(path)
+        seed(path, args.requests)
+        httpd, thread = start_server(path)
+        try:
+            cookie = login(httpd.server_address[1], "admin", "admin")
+            print(f"{args.requests} requests")
+            measure("in-memory csv", lambda: in_memory_csv(path))
+            measure("streamed csv", lambda: streamed(httpd.server_address[1], cookie, "csv"))
+            measure("streamed ndjson", lambda: streamed(httpd.server_address[1], cookie, "ndjson"))
+        finally:
+            stop_server(httpd, thread)
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            path.with_name(path.name + suffix).unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""SPA page-load throughput: one TCP connection per request vs HTTP/1.1 keep-alive.
+
+    python bench/bench_keepalive.py [--seconds 5] [--threads 6]
+
+A "page load" is what the browser fetches on start: index.html, every
+stylesheet/script it references, then the API calls of the first render.
+"per-request" opens a new connection for each fetch (what the server's old
+HTTP/1.0 responses forced); "keep-alive" reuses one connection per worker.
+"""
+
+import argparse
+import re
+import threading
+from http.client import HTTPConnection
+from pathlib import Path
+
+from _support import db, http, login, run_concurrent, start_server, stop_server, temp_db_path
+
+API_CALLS = ["/api/me", "/api/workflows", "/api/requests", "/api/inbox", "/api/notifications"]
+
+
+def page_paths() -> list[str]:
+    html = Path("frontend/index.html").read_text(encoding="utf-8")
+    assets = re.findall(r'(?:src|href)="(/[^"]+\.(?:js|css))"', html)
+    return ["/index.html", *assets, *API_CALLS]
+
+
+def fetch(conn: HTTPConnection, path: str, cookie: str) -> None:
+    conn.request("GET", path, headers={"Cookie": cookie})
+    res = conn.getresponse()
+    res.read()
+    if res.status != 200:
+        raise RuntimeError(f"{path}: {res.status}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--threads", type=int, default=6)
+    args = parser.parse_args()
+
+    paths = page_paths()
+    db_path = temp_db_path("keepalive")
+    db.init_db(db_path)
+    httpd, thread = start_server(db_path)
+    port = httpd.server_address[1]
+    try:
+        cookie = login(port, "user", "user")
+        for i in range(20):
+            http(port, "POST", "/api/requests", cookie=cookie, json_body={"type": "generic", "title": f"t{i}", "body": "b"})
+
+        def per_request() -> None:
+            for path in paths:
+                conn = HTTPConnection("127.0.0.1", port, timeout=30)
+                fetch(conn, path, cookie)
+                conn.close()
+
+        local = threading.local()
+
+        def keep_alive() -> None:
+            conn = getattr(local, "conn", None)
+            if conn is None:
+                conn = local.conn = HTTPConnection("127.0.0.1", port, timeout=30)
+            for path in paths:
+                fetch(conn, path, cookie)
+
+        print(f"{len(paths)} requests per page load, {args.threads} concurrent clients")
+        results = []
+        for label, fn in (("per-request", per_request), ("keep-alive", keep_alive)):
+            n, elapsed = run_concurrent(fn, threads=args.threads, seconds=args.seconds)
+            results.append(n / elapsed)
+            print(f"  {label:12} {n / elapsed:7.1f} pages/s  {n * len(paths) / elapsed:8.0f} req/s")
+        print(f"  speedup      {results[1] / results[0]:7.2f}x")
+    finally:
+        stop_server(httpd, thread)
+        for suffix in ("", "-wal", "-shm"):
+            db_path.with_name(db_path.name + suffix).unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Login storm: PBKDF2 on the request thread vs a login process pool of 1/4/8.
+
+    python bench/bench_login.py [--seconds 3] [--threads 16]
+
+`--threads` clients log in back to back while one more client polls /api/me;
+reported are logins/s and the poller's median latency, i.e. how much a login
+storm slows everyone else down. Concurrency is capped at the default 8.
+"""
+
+import argparse
+import os
+import statistics
+import threading
+import time
+
+from _support import db, http, login, run_concurrent, start_server, stop_server, temp_db_path
+
+CONFIGS = [
+    ("inline", {"login_processes": 0}),
+    ("pool 1", {"login_processes": 1}),
+    ("pool 4", {"login_processes": 4}),
+    ("pool 8", {"login_processes": 8}),
+]
+
+
+def run(server_kwargs: dict, *, seconds: float, threads: int) -> str:
+    db_path = temp_db_path("login")
+    db.init_db(db_path)
+    httpd, thread = start_server(db_path, **server_kwargs)
+    port = httpd.server_address[1]
+    try:
+        cookie = login(port, "user", "user")  # also warms up the pool processes
+        for _ in range(server_kwargs["login_processes"]):
+            login(port, "user", "user")
+        latencies: list[float] = []
+        stop = threading.Event()
+
+        def poll() -> None:
+            while not stop.is_set():
+                started = time.perf_counter()
+                status, _, _ = http(port, "GET", "/api/me", cookie=cookie)
+                latencies.append(time.perf_counter() - started)
+                if status != 200:
+                    raise RuntimeError(f"me: {status}")
+
+        poller = threading.Thread(target=poll)
+        poller.start()
+        try:
+            n, elapsed = run_concurrent(lambda: login(port, "user", "user"), threads=threads, seconds=seconds)
+        finally:
+            stop.set()
+            poller.join()
+        p50 = statistics.median(latencies) * 1000 if latencies else float("nan")
+        return f"{n / elapsed:7.1f} logins/s   /api/me p50 {p50:7.1f} ms"
+    finally:
+        stop_server(httpd, thread)
+        for suffix in ("", "-wal", "-shm"):
+            db_path.with_name(db_path.name + suffix).unlink(missing_ok=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+
+    print(f"cpu_count={os.cpu_count()}, {args.threads} clients logging in")
+    for label, kwargs in CONFIGS:
+        print(f"  {label:7}", run(kwargs, seconds=args.seconds, threads=args.threads), flush=True)
+
+
+if __name__ == "__main__":
+    main()
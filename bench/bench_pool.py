@@ -0,0 +1,115 @@
+"""Connection burst: thread-per-connection vs the bounded worker pool.
+
+    python bench/bench_pool.py [--clients 200] [--requests 10]
+
+`--clients` threads each open a fresh connection per request to /api/inbox
+at the same moment (a Monday-morning refresh). Reported: wall time,
+successful req/s, latency percentiles of successful calls, 503s, and the
+peak number of server threads handling connections.
+"""
+
+import argparse
+import statistics
+import threading
+import time
+from http.client import HTTPConnection
+
+from _support import db, http, login, start_server, stop_server, temp_db_path
+
+CONFIGS = [
+    ("threads", {"server_mode": "threads"}),
+    ("pool 16/64", {"server_mode": "pool", "threads": 16, "max_queue": 64}),
+    ("pool 8/256", {"server_mode": "pool", "threads": 8, "max_queue": 256}),
+]
+
+
+def server_threads() -> int:
+    return sum(1 for t in threading.enumerate() if "process_request_thread" in t.name or t.name.startswith("oa-worker"))
+
+
+def burst(server_kwargs: dict, *, clients: int, requests: int) -> None:
+    db_path = temp_db_path("pool")
+    db.init_db(db_path)
+    httpd, thread = start_server(db_path, **server_kwargs)
+    port = httpd.server_address[1]
+    try:
+        cookie = login(port, "user", "user")
+        for i in range(20):
+            http(port, "POST", "/api/requests", cookie=cookie, json_body={"type": "generic", "title": f"t{i}", "body": "b"})
+
+        latencies: list[float] = []
+        busy = [0]
+        failed = [0]
+        lock = threading.Lock()
+        start = threading.Barrier(clients + 1)
+
+        def client() -> None:
+            start.wait()
+            for _ in range(requests):
+                t0 = time.perf_counter()
+                try:
+                    conn = HTTPConnection("127.0.0.1", port, timeout=60)
+                    conn.request("GET", "/api/inbox", headers={"Cookie": cookie, "Connection": "close"})
+                    res = conn.getresponse()
+                    res.read()
+                    conn.close()
+                except OSError:
+                    with lock:
+                        failed[0] += 1
+                    continue
+                with lock:
+                    if res.status == 200:
+                        latencies.append(time.perf_counter() - t0)
+                    elif res.status == 503:
+                        busy[0] += 1
+                    else:
+                        failed[0] += 1
+
+        workers = [threading.Thread(target=client) for _ in range(clients)]
+        for t in workers:
+            t.start()
+        peak = [0]
+        done = threading.Event()
+
+        def sample() -> None:
+            while not done.is_set():
+                peak[0] = max(peak[0], server_threads())
+                time.sleep(0.005)
+
+        sampler = threading.Thread(target=sample)
+        sampler.start()
+        started = time.perf_counter()
+        start.wait()
+        for t in workers:
+            t.join()
+        elapsed = time.perf_counter() - started
+        done.set()
+        sampler.join()
+
+        lat = sorted(latencies)
+        p50 = statistics.median(lat) * 1000 if lat else 0.0
+        p99 = lat[int(len(lat) * 0.99) - 1] * 1000 if lat else 0.0
+        print(
+            f"{elapsed:7.2f} s {len(lat) / elapsed:8.0f} ok/s  p50 {p50:7.1f} ms  p99 {p99:7.1f} ms"
+            f"  503 {busy[0]:5}  err {failed[0]:4}  threads {peak[0]:4}"
+        )
+    finally:
+        stop_server(httpd, thread)
+        for suffix in ("", "-wal", "-shm"):
+            db_path.with_name(db_path.name + suffix).unlink(missing_ok=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{args.clients} clients x {args.requests} requests")
+    for label, kwargs in CONFIGS:
+        print(f"  {label:12}", end="", flush=True)
+        burst(kwargs, clients=args.clients, requests=args.requests)
+
+
+if __name__ == "__main__":
+    main()
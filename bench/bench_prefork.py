@@ -0,0 +1,77 @@
+"""CPU-bound requests: one server process vs `--workers N` pre-forked processes.
+
+    python bench/bench_prefork.py [--workers 4] [--seconds 3] [--threads 16]
+
+Starts `python -m oa_server` as a subprocess per configuration and measures
+POST /api/login (PBKDF2) and GET /api/requests (JSON serialization) req/s from
+`--threads` client threads. Within one process both are held to a single core
+by the GIL; the gain from more workers is bounded by the cores available
+(`os.cpu_count()` is printed) and by this client sharing them.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from _support import db, http, login, run_concurrent, temp_db_path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def start(db_path: Path, workers: int) -> tuple[subprocess.Popen, int]:
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "oa_server", "--port", "0", "--db", str(db_path), "--workers", str(workers)],
+        cwd=ROOT,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    # "OA server running on http://127.0.0.1:<port>/ ..."
+    line = proc.stdout.readline()
+    return proc, int(line.split("127.0.0.1:")[1].split("/")[0])
+
+
+def run(workers: int, *, seconds: float, threads: int) -> str:
+    db_path = temp_db_path("prefork")
+    db.init_db(db_path)
+    proc, port = start(db_path, workers)
+    try:
+        cookie = login(port, "user", "user")
+        for i in range(50):
+            http(port, "POST", "/api/requests", cookie=cookie, json_body={"type": "generic", "title": f"t{i}", "body": "b" * 200})
+
+        def do_login() -> None:
+            login(port, "user", "user")
+
+        def do_list() -> None:
+            status, _, _ = http(port, "GET", "/api/requests", cookie=cookie)
+            if status != 200:
+                raise RuntimeError(f"list: {status}")
+
+        n_login, t_login = run_concurrent(do_login, threads=threads, seconds=seconds)
+        n_list, t_list = run_concurrent(do_list, threads=threads, seconds=seconds)
+        return f"login {n_login / t_login:7.1f} req/s   list {n_list / t_list:7.1f} req/s"
+    finally:
+        proc.terminate()
+        proc.wait(30)
+        proc.stdout.close()
+        for suffix in ("", "-wal", "-shm"):
+            db_path.with_name(db_path.name + suffix).unlink(missing_ok=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+
+    print(f"cpu_count={os.cpu_count()}, {args.threads} client threads")
+    for workers in (1, args.workers):
+        print(f"  workers={workers:<3}", run(workers, seconds=args.seconds, threads=args.threads), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""API dispatch cost: the old linear `try_handle` chain vs the compiled Router.
+
+    python bench/bench_router.py [--number 200000]
+
+"chain" replays the old dispatch: the `path ==` / `startswith` / `endswith`
+checks of every api_* module, in module order, until one matches. "router"
+is `routes.ROUTER.resolve`. The last rows pad the router with synthetic
+endpoints to show lookup cost does not grow with the endpoint count.
+"""
+
+import argparse
+import timeit
+
+import _support  # noqa: F401  (puts the repo root on sys.path)
+
+from oa_server._server.router import Router
+from oa_server._server.routes import ROUTER, build_router
+
+
+def _eq(p):
+    return lambda path: path == p
+
+
+def _pre_suf(prefix, suffix):
+    return lambda path: path.startswith(prefix) and path.endswith(suffix)
+
+
+GET_CHAIN = [
+    _eq("/api/me"),
+    _eq("/api/workflows"), _eq("/api/admin/workflows"), _pre_suf("/api/admin/workflows/", ""),
+    _eq("/api/admin/roles"), _eq("/api/admin/metrics"), _eq("/api/admin/departments"), _eq("/api/org/tree"),
+    _eq("/api/requests"), _pre_suf("/api/requests/", ""),
+    _eq("/api/inbox"),
+    _eq("/api/notifications"),
+    _pre_suf("/api/attachments/", "/download"),
+    _eq("/api/users"),
+]
+POST_CHAIN = [
+    _eq("/api/login"), _eq("/api/logout"),
+    _eq("/api/me/delegation"),
+    _eq("/api/requests"),
+    *[_pre_suf("/api/requests/", s) for s in ("/approve", "/reject", "/resubmit", "/watchers", "/attachments", "/withdraw", "/void")],
+    *[_pre_suf("/api/tasks/", s) for s in ("/approve", "/reject", "/return", "/addsign", "/transfer")],
+    _pre_suf("/api/notifications/", "/read"),
+    _pre_suf("/api/users/", ""),
+    _eq("/api/admin/workflows"), _eq("/api/admin/roles"), _eq("/api/admin/departments"), _eq("/api/admin/workflows/delete"),
+]
+CASES = [
+    ("GET", "/api/me"),
+    ("GET", "/api/inbox"),
+    ("GET", "/api/requests/123"),
+    ("POST", "/api/tasks/123/transfer"),
+    ("POST", "/api/admin/workflows/delete"),
+    ("GET", "/api/nope"),
+]
+
+
+def chain(method, path):
+    for pred in GET_CHAIN if method == "GET" else POST_CHAIN:
+        if pred(path):
+            return pred
+    return None
+
+
+def padded_router(extra: int) -> Router:
+    router = build_router()
+    for i in range(extra):
+        router.add("GET", f"/api/ext{i}/items", chain)
+        router.add("POST", f"/api/ext{i}/items/{{item_id:int}}/archive", chain)
+    return router
+
+
+def ns_per_call(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e9
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=200_000)
+    args = parser.parse_args()
+
+    print(f"{'route':<38}{'chain':>10}{'router':>10}")
+    for method, path in CASES:
+        before = ns_per_call(lambda: chain(method, path), args.number)
+        after = ns_per_call(lambda: ROUTER.resolve(method, path), args.number)
+        print(f"{method + ' ' + path:<38}{before:>7.0f} ns{after:>7.0f} ns")
+
+    print(f"\n{'endpoints':<12}{'static':>10}{'param':>10}{'miss':>10}")
+    for extra in (0, 100, 1000):
+        router = padded_router(extra)
+        cols = [
+            ns_per_call(lambda: router.resolve("GET", "/api/inbox"), args.number),
+            ns_per_call(lambda: router.resolve("POST", "/api/tasks/123/transfer"), args.number),
+            ns_per_call(lambda: router.resolve("GET", "/api/nope/123"), args.number),
+        ]
+        print(f"{29 + 2 * extra:<12}" + "".join(f"{c:>7.0f} ns" for c in cols))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Request search latency: FTS5 index vs the LIKE '%q%' fallback.
+
+    python bench/bench_search.py [--requests 100000 1000000] [--repeat 20]
+
+Each query is run through `db.list_requests` (admin scope, first page of 50),
+first with the `requests_fts` index, then with the index dropped so the same
+call falls back to LIKE.
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+
+from _support import db, temp_db_path
+
+WORDS = ["报销", "差旅", "采购", "请假", "办公", "设备", "培训", "会议", "年度", "预算", "季度", "合同"]
+PLACES = ["上海", "北京", "深圳", "杭州", "成都"]
+QUERIES = ["差旅", "上海 合同", "invoice", "inv-4242", "零匹配"]
+
+
+def seed(db_path, count: int) -> None:
+    rnd = random.Random(42)
+    now = int(time.time())
+
+    def rows():
+        for i in range(count):
+            title = f"{rnd.choice(WORDS)}{rnd.choice(WORDS)} {rnd.choice(PLACES)}"
+            body = f"invoice INV-{i} {rnd.choice(WORDS)}"
+            payload = json.dumps({"reason": rnd.choice(WORDS) + rnd.choice(PLACES)}, ensure_ascii=False)
+            yield (2, "generic", title, body, payload, "pending", now, now)
+
+    with db.connect(db_path) as conn:
+        conn.executemany(
+            "INSERT INTO requests(user_id,request_type,title,body,payload_json,status,created_at,updated_at) VALUES(?,?,?,?,?,?,?,?)",
+            rows(),
+        )
+        started = time.perf_counter()
+        db.create_request_index(conn)
+        print(f"  FTS backfill: {time.perf_counter() - started:.1f} s")
+
+
+def latency_ms(conn, q: str, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        db.list_requests(conn, 1, True, limit=51, q=q)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for count in args.requests:
+        path = temp_db_path("search")
+        try:
+            print(f"{count} requests")
+            db.init_db(path)
+            seed(path, count)
+            with db.connect(path) as conn:
+                fts = {q: latency_ms(conn, q, args.repeat) for q in QUERIES}
+                conn.execute("DROP TRIGGER requests_fts_delete")
+                conn.execute("DROP TABLE requests_fts")
+                like = {q: latency_ms(conn, q, args.repeat) for q in QUERIES}
+            for q in QUERIES:
+                print(f"  {q!r:14} fts {fts[q]:9.2f} ms   like {like[q]:9.2f} ms")
+        finally:
+            for suffix in ("", "-wal", "-shm"):
+                path.with_name(path.name + suffix).unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""init_db startup time: empty DB vs a large DB, with and without recorded migrations.
+
+    python bench/bench_startup.py [--requests 1000000]
+
+"replay all" deletes the `schema_migrations` rows first, which is what every
+boot cost before migrations were tracked.
+"""
+
+import argparse
+import time
+
+from _support import db, temp_db_path
+
+
+def timed(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return (time.perf_counter() - started) * 1000
+
+
+def seed_requests(db_path, count: int) -> None:
+    now = int(time.time())
+    with db.connect(db_path) as conn:
+        conn.executemany(
+            "INSERT INTO requests(user_id,request_type,title,body,status,created_at,updated_at) VALUES(?,?,?,?,?,?,?)",
+            ((2, "generic", f"报销：bench {i}", "b", "pending", now, now) for i in range(count)),
+        )
+
+
+def replay_all(db_path) -> float:
+    with db.connect(db_path) as conn:
+        conn.execute("DELETE FROM schema_migrations")
+    return timed(lambda: db.init_db(db_path))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    paths = []
+    try:
+        empty = temp_db_path("startup_empty")
+        paths.append(empty)
+        first = timed(lambda: db.init_db(empty))
+        print(f"empty DB, first boot:        {first:9.1f} ms")
+        print(f"empty DB, up to date:        {timed(lambda: db.init_db(empty)):9.1f} ms")
+        print(f"empty DB, replay all:        {replay_all(empty):9.1f} ms")
+
+        big = temp_db_path("startup_big")
+        paths.append(big)
+        db.init_db(big)
+        seed_requests(big, args.requests)
+        print(f"{args.requests} requests, up to date: {timed(lambda: db.init_db(big)):9.1f} ms")
+        print(f"{args.requests} requests, replay all: {replay_all(big):9.1f} ms")
+    finally:
+        for p in paths:
+            for suffix in ("", "-wal", "-shm"):
+                p.with_name(p.name + suffix).unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Static assets of one SPA page load: full fetch, gzip fetch, and ETag revalidation.
+
+    python bench/bench_static.py [--seconds 3] [--threads 6]
+
+A page load fetches index.html plus every stylesheet/script it references,
+over one keep-alive connection per client thread. "plain" is a first visit
+without compression, "gzip" a first visit with `Accept-Encoding: gzip`, and
+"revalidate" a repeat visit sending each asset's ETag back (all 304s).
+"""
+
+import argparse
+import re
+import threading
+from http.client import HTTPConnection
+from pathlib import Path
+
+from _support import db, run_concurrent, start_server, stop_server, temp_db_path
+
+
+def asset_paths() -> list[str]:
+    html = Path("frontend/index.html").read_text(encoding="utf-8")
+    return ["/index.html", *re.findall(r'(?:src|href)="(/[^"]+\.(?:js|css))"', html)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--threads", type=int, default=6)
+    args = parser.parse_args()
+
+    paths = asset_paths()
+    db_path = temp_db_path("static")
+    db.init_db(db_path)
+    httpd, thread = start_server(db_path)
+    port = httpd.server_address[1]
+    try:
+        etags: dict[str, str] = {}
+        conn = HTTPConnection("127.0.0.1", port, timeout=30)
+        for path in paths:
+            conn.request("GET", path)
+            res = conn.getresponse()
+            res.read()
+            etags[path] = res.getheader("ETag") or ""
+        conn.close()
+
+        print(f"{len(paths)} assets per page load, {args.threads} threads")
+        for label, headers_for, expected in (
+            ("plain", lambda p: {}, 200),
+            ("gzip", lambda p: {"Accept-Encoding": "gzip"}, 200),
+            ("revalidate", lambda p: {"If-None-Match": etags[p]}, 304),
+        ):
+            local = threading.local()
+            sizes: list[int] = []
+
+            def page_load() -> None:
+                conn = getattr(local, "conn", None)
+                if conn is None:
+                    conn = local.conn = HTTPConnection("127.0.0.1", port, timeout=30)
+                total = 0
+                for path in paths:
+                    conn.request("GET", path, headers=headers_for(path))
+                    res = conn.getresponse()
+                    total += len(res.read())
+                    if res.status != expected:
+                        raise RuntimeError(f"{path}: {res.status}")
+                sizes.append(total)
+
+            n, elapsed = run_concurrent(page_load, threads=args.threads, seconds=args.seconds)
+            print(f"  {label:10} {n / elapsed:8.1f} page loads/s  {sizes[0] / 1024:7.1f} KiB body per load", flush=True)
+    finally:
+        stop_server(httpd, thread)
+        for suffix in ("", "-wal", "-shm"):
+            db_path.with_name(db_path.name + suffix).unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
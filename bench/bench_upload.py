@@ -0,0 +1,126 @@
+"""Attachment upload: base64-in-JSON vs streaming raw body vs streaming multipart.
+
+    python bench/bench_upload.py [--mb 4] [--big-mb 100]
+
+Each mode uploads one `--mb` file (the JSON path's 5 MB cap applies) and the
+streaming modes also one `--big-mb` file. "resumable" is an upload session fed
+8 MiB chunks, then finalized (chunks are re-read and hashed into one blob).
+Reported are MB/s and the peak Python heap allocated while the upload runs
+(tracemalloc, started after the client body is prepared), i.e. how much of the
+file the server holds at once; for "resumable" that peak is mostly the client's
+own chunk buffers, which share the process.
+Last, the attachment bytes uploaded vs stored on disk after deduplication.
+"""
+
+import argparse
+import base64
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from http.client import HTTPConnection
+from pathlib import Path
+
+from _support import db, http, login, start_server, stop_server, temp_db_path
+
+BOUNDARY = "----oaBench"
+# Chunk size the frontend uses for resumable uploads.
+RESUMABLE_CHUNK = 8 * 1024 * 1024
+
+
+def upload(port: int, path: str, body, headers: dict[str, str], cookie: str, *, method: str = "POST", expect: int = 201) -> None:
+    conn = HTTPConnection("127.0.0.1", port, timeout=120)
+    conn.request(method, path, body=body, headers={"Cookie": cookie, **headers})
+    res = conn.getresponse()
+    res.read()
+    conn.close()
+    if res.status != expect:
+        raise RuntimeError(f"upload: {res.status}")
+
+
+def measure(label: str, size: int, send) -> None:
+    tracemalloc.start()
+    started = time.perf_counter()
+    send()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    mb = size / 1024 / 1024
+    print(f"  {label:10} {mb:6.0f} MB  {mb / elapsed:8.1f} MB/s  peak heap {peak / 1024 / 1024:8.2f} MiB", flush=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mb", type=float, default=4.0)
+    parser.add_argument("--big-mb", type=float, default=100.0)
+    args = parser.parse_args()
+
+    db_path = temp_db_path("upload")
+    db.init_db(db_path)
+    files_dir = tempfile.TemporaryDirectory(prefix="oa_upload_")
+    httpd, thread = start_server(
+        db_path, attachments_dir=Path(files_dir.name), max_upload_bytes=int(max(args.mb, args.big_mb) * 1024 * 1024) + 1
+    )
+    port = httpd.server_address[1]
+    try:
+        cookie = login(port, "user", "user")
+        _, _, raw = http(port, "POST", "/api/requests", cookie=cookie, json_body={"type": "generic", "title": "u", "body": "b"})
+        path = f"/api/requests/{json.loads(raw)['id']}/attachments"
+
+        for mb in (args.mb, args.big_mb):
+            size = int(mb * 1024 * 1024)
+            with tempfile.TemporaryFile() as f:
+                for _ in range(size // (1024 * 1024)):
+                    f.write(os.urandom(1024 * 1024))
+                f.write(os.urandom(size % (1024 * 1024)))
+                print(f"{mb:g} MB file")
+                if size <= 5 * 1024 * 1024:
+                    f.seek(0)
+                    body = json.dumps({"filename": "a.bin", "content_base64": base64.b64encode(f.read()).decode("ascii")}).encode()
+                    measure("json", size, lambda: upload(port, path, body, {"Content-Type": "application/json"}, cookie))
+                    del body
+
+                f.seek(0)
+                measure("raw", size, lambda: upload(port, path + "?filename=a.bin", f, {"Content-Type": "application/octet-stream", "Content-Length": str(size)}, cookie))
+
+                head = f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="a.bin"\r\n\r\n'.encode()
+                tail = f"\r\n--{BOUNDARY}--\r\n".encode()
+
+                def parts():
+                    yield head
+                    f.seek(0)
+                    while chunk := f.read(64 * 1024):
+                        yield chunk
+                    yield tail
+
+                headers = {"Content-Type": f"multipart/form-data; boundary={BOUNDARY}", "Content-Length": str(len(head) + size + len(tail))}
+                measure("multipart", size, lambda: upload(port, path, parts(), headers, cookie))
+
+                def resumable():
+                    sessions = path.replace("/attachments", "/uploads")
+                    _, _, raw = http(port, "POST", sessions, cookie=cookie, json_body={"filename": "a.bin", "size": size})
+                    upload_id = json.loads(raw)["id"]
+                    f.seek(0)
+                    offset = 0
+                    while chunk := f.read(RESUMABLE_CHUNK):
+                        upload(port, f"/api/uploads/{upload_id}?offset={offset}", chunk, {}, cookie, method="PUT", expect=200)
+                        offset += len(chunk)
+                    upload(port, f"/api/uploads/{upload_id}/finalize", b"", {}, cookie)
+
+                measure("resumable", size, resumable)
+
+        # Every mode uploaded the same bytes: content addressing stores each file once.
+        with db.connect(db_path) as conn:
+            logical = conn.execute("SELECT COUNT(*) AS n, SUM(size) AS b FROM attachments").fetchone()
+        on_disk = sum(p.stat().st_size for p in Path(files_dir.name).rglob("*") if p.is_file())
+        print(f"{logical['n']} uploads, {logical['b'] / 1024 / 1024:.0f} MB uploaded, {on_disk / 1024 / 1024:.0f} MB on disk")
+    finally:
+        stop_server(httpd, thread)
+        files_dir.cleanup()
+        for suffix in ("", "-wal", "-shm"):
+            db_path.with_name(db_path.name + suffix).unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -43,6 +43,7 @@ function renderWfStepsEditor(steps) {
     ["min_days", "最少天数"],
     ["dept_in", "部门包含"],
     ["category_in", "类别包含"],
+    ["expr", "表达式"],
   ];
 
   wfStepsDraft.forEach((s, idx) => {
@@ -164,7 +165,12 @@ function renderWfStepsEditor(steps) {
 
     const conditionValue = document.createElement("input");
     conditionValue.style.flex = "1";
-    conditionValue.placeholder = conditionKind.value ? "例如：5000 / IT,HR" : "（无）";
+    conditionValue.placeholder =
+      conditionKind.value === "expr"
+        ? "例如：min_amount(5000) and (dept_in(IT,HR) or category_in(差旅))"
+        : conditionKind.value
+          ? "例如：5000 / IT,HR"
+          : "（无）";
     conditionValue.value = s.condition_value == null ? "" : String(s.condition_value);
     conditionValue.oninput = () => {
       wfStepsDraft[idx].condition_value = conditionValue.value.trim() || null;
@@ -27,6 +27,7 @@ function _wfConditionSummary(step) {
     min_days: "最少天数",
     dept_in: "部门包含",
     category_in: "类别包含",
+    expr: "表达式",
   };
   const label = map[kind] || kind;
   return v ? `${label}：${v}` : label;
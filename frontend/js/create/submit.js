@@ -29,15 +29,7 @@ function bindCreateSubmit() {
       const created = await api("/api/requests", { method: "POST", body: { workflow: wfKey, type, title, body, payload } });
       const file = $("#attachFile").files && $("#attachFile").files[0];
       if (file) {
-        const content_base64 = await readFileAsBase64(file);
-        await api(`/api/requests/${created.id}/attachments`, {
-          method: "POST",
-          body: {
-            filename: file.name,
-            content_type: file.type || "application/octet-stream",
-            content_base64,
-          },
-        });
+        await uploadFile(`/api/requests/${created.id}/attachments`, file);
       }
       resetCreateForm();
       currentTab = "requests";
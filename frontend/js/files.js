@@ -1,13 +1,61 @@
-function readFileAsBase64(file) {
-  return new Promise((resolve, reject) => {
-    const r = new FileReader();
-    r.onerror = () => reject(r.error || new Error("read_failed"));
-    r.onload = () => {
-      const s = String(r.result || "");
-      const i = s.indexOf(",");
-      resolve(i >= 0 ? s.slice(i + 1) : s);
-    };
-    r.readAsDataURL(file);
+// Files above this go through a resumable upload session, sent in chunks of the same size.
+const UPLOAD_CHUNK = 8 * 1024 * 1024;
+
+async function uploadJson(path, init) {
+  const res = await fetch(path, { credentials: "include", ...init });
+  const data = await res.json().catch(() => ({}));
+  if (!res.ok) {
+    const err = new Error(data?.error || "request_failed");
+    err.code = data?.error || "request_failed";
+    err.data = data;
+    throw err;
+  }
+  return data;
+}
+
+async function uploadFile(path, file) {
+  if (file.size > UPLOAD_CHUNK) {
+    // `/api/requests/{id}/attachments` -> `/api/requests/{id}/uploads`
+    return uploadResumable(path.replace(/\/attachments$/, "/uploads"), file);
+  }
+  // Raw body: the server streams it to disk, so large files never pass through base64/JSON.
+  const sep = path.includes("?") ? "&" : "?";
+  return uploadJson(`${path}${sep}filename=${encodeURIComponent(file.name)}`, {
+    method: "POST",
+    headers: { "Content-Type": file.type || "application/octet-stream" },
+    body: file,
   });
 }
 
+async function uploadResumable(sessionsPath, file, { retries = 5 } = {}) {
+  const session = await uploadJson(sessionsPath, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ filename: file.name, content_type: file.type || "application/octet-stream", size: file.size }),
+  });
+  let offset = session.offset;
+  let failures = 0;
+  while (offset < file.size) {
+    try {
+      const res = await uploadJson(`/api/uploads/${session.id}?offset=${offset}`, {
+        method: "PUT",
+        headers: { "Content-Type": "application/octet-stream" },
+        body: file.slice(offset, offset + UPLOAD_CHUNK),
+      });
+      offset = res.offset;
+      failures = 0;
+    } catch (e) {
+      if (e.code === "offset_mismatch") {
+        offset = e.data.offset;
+        continue;
+      }
+      // fetch() rejects without a code on network errors; 503 busy is worth a retry too.
+      const retriable = !e.code || e.code === "busy";
+      if (!retriable || ++failures > retries) throw e;
+      // Wait, ask the server how far it got, and carry on from there.
+      await new Promise((r) => setTimeout(r, 1000 * failures));
+      offset = await uploadJson(`/api/uploads/${session.id}`).then((r) => r.offset, () => offset);
+    }
+  }
+  return uploadJson(`/api/uploads/${session.id}/finalize`, { method: "POST" });
+}
@@ -1,15 +1,47 @@
+const REQUESTS_PAGE_SIZE = 50;
+
+function requestsPageUrl(scope, cursor) {
+  let url = `/api/requests?scope=${encodeURIComponent(scope)}&limit=${REQUESTS_PAGE_SIZE}`;
+  if (cursor) url += `&cursor=${encodeURIComponent(cursor)}`;
+  return url;
+}
+
 async function refreshRequests() {
   const list = $("#requestsList");
   if (!currentMe) return;
   const scope = currentMe.role === "admin" && $("#scopeAll").checked ? "all" : "mine";
-  const data = await api(`/api/requests?scope=${encodeURIComponent(scope)}`);
+  const data = await api(requestsPageUrl(scope, null));
   renderRequests(list, data.items || []);
+  renderLoadMore(list, scope, data.next_cursor);
+}
+
+function renderLoadMore(list, scope, cursor) {
+  if (!cursor) return;
+  const btn = document.createElement("button");
+  btn.className = "btn btn-secondary";
+  btn.textContent = "加载更多";
+  btn.onclick = async () => {
+    btn.disabled = true;
+    try {
+      const data = await api(requestsPageUrl(scope, cursor));
+      btn.remove();
+      appendRequestItems(list, data.items || []);
+      renderLoadMore(list, scope, data.next_cursor);
+    } catch (e) {
+      btn.disabled = false;
+      btn.textContent = e.code || "加载失败";
+    }
+  };
+  list.appendChild(btn);
 }
 
 function renderRequests(list, items) {
   if (!items.length) return renderEmpty(list, "暂无申请");
   list.innerHTML = "";
+  appendRequestItems(list, items);
+}
 
+function appendRequestItems(list, items) {
   for (const item of items) {
     const el = document.createElement("div");
     el.className = "item";
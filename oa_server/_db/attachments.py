@@ -13,14 +13,15 @@ def create_attachment(
     content_type: str | None,
     size: int,
     storage_path: str,
+    sha256: str | None = None,
 ) -> int:
     now = int(time.time())
     cur = conn.execute(
         """
-        INSERT INTO attachments(request_id,uploader_user_id,filename,content_type,size,storage_path,created_at)
-        VALUES(?,?,?,?,?,?,?)
+        INSERT INTO attachments(request_id,uploader_user_id,filename,content_type,size,storage_path,sha256,created_at)
+        VALUES(?,?,?,?,?,?,?,?)
         """,
-        (request_id, uploader_user_id, filename, content_type, size, storage_path, now),
+        (request_id, uploader_user_id, filename, content_type, size, storage_path, sha256, now),
     )
     return int(cur.lastrowid)
 
@@ -41,3 +42,115 @@ def list_request_attachments(conn: sqlite3.Connection, request_id: int):
         (request_id,),
     ).fetchall()
 
+
+
+def list_archive_attachments(
+    conn: sqlite3.Connection,
+    user_id: int,
+    is_admin: bool,
+    *,
+    after_id: int = 0,
+    request_id: int | None = None,
+    created_from: int | None = None,
+    created_to: int | None = None,
+    limit: int = 500,
+):
+    """Attachments visible to the user with id > `after_id`, oldest first: one keyset page of a ZIP export.
+
+    Non-admins see their own requests' attachments only; `created_from`/`created_to`
+    bound the request's creation time.
+    """
+    where = ["a.id > ?"]
+    params: list[object] = [after_id]
+    if not is_admin:
+        where.append("r.user_id = ?")
+        params.append(user_id)
+    if request_id is not None:
+        where.append("a.request_id = ?")
+        params.append(request_id)
+    if created_from is not None:
+        where.append("r.created_at >= ?")
+        params.append(created_from)
+    if created_to is not None:
+        where.append("r.created_at <= ?")
+        params.append(created_to)
+    params.append(limit)
+    return conn.execute(
+        f"""
+        SELECT a.id, a.request_id, a.filename, a.size, a.storage_path, a.created_at
+        FROM attachments a
+        JOIN requests r ON r.id = a.request_id
+        WHERE {" AND ".join(where)}
+        ORDER BY a.id ASC
+        LIMIT ?
+        """,
+        params,
+    ).fetchall()
+
+
+def referenced_blobs(conn: sqlite3.Connection, digests: list[str]) -> set[str]:
+    """The subset of `digests` (blob SHA-256 hex) that at least one attachment row still points at."""
+    if not digests:
+        return set()
+    marks = ",".join("?" * len(digests))
+    rows = conn.execute(f"SELECT DISTINCT sha256 FROM attachments WHERE sha256 IN ({marks})", digests).fetchall()
+    return {str(r["sha256"]) for r in rows}
+
+
+def count_blob_refs(conn: sqlite3.Connection, digest: str) -> int:
+    row = conn.execute("SELECT COUNT(*) AS n FROM attachments WHERE sha256=?", (digest,)).fetchone()
+    return int(row["n"])
+
+
+def create_upload_session(
+    conn: sqlite3.Connection,
+    upload_id: str,
+    *,
+    request_id: int,
+    user_id: int,
+    filename: str,
+    content_type: str | None,
+    size: int,
+    sha256: str | None,
+    expires_at: int,
+) -> None:
+    conn.execute(
+        """
+        INSERT INTO upload_sessions(id,request_id,user_id,filename,content_type,size,sha256,received,created_at,expires_at)
+        VALUES(?,?,?,?,?,?,?,0,?,?)
+        """,
+        (upload_id, request_id, user_id, filename, content_type, size, sha256, int(time.time()), expires_at),
+    )
+
+
+def get_upload_session(conn: sqlite3.Connection, upload_id: str):
+    return conn.execute("SELECT * FROM upload_sessions WHERE id=?", (upload_id,)).fetchone()
+
+
+def advance_upload_session(conn: sqlite3.Connection, upload_id: str, *, offset: int, received: int, expires_at: int) -> bool:
+    """Move `received` from `offset` to `received`; False when another chunk got there first."""
+    cur = conn.execute(
+        "UPDATE upload_sessions SET received=?, expires_at=? WHERE id=? AND received=?",
+        (received, expires_at, upload_id, offset),
+    )
+    return cur.rowcount == 1
+
+
+def delete_upload_session(conn: sqlite3.Connection, upload_id: str) -> bool:
+    return conn.execute("DELETE FROM upload_sessions WHERE id=?", (upload_id,)).rowcount == 1
+
+
+def delete_expired_upload_sessions(conn: sqlite3.Connection, now: int, *, limit: int) -> list[str]:
+    """Delete up to `limit` upload sessions that expired by `now`; returns their ids (to remove their chunks)."""
+    rows = conn.execute("SELECT id FROM upload_sessions WHERE expires_at <= ? LIMIT ?", (now, limit)).fetchall()
+    ids = [str(r["id"]) for r in rows]
+    conn.executemany("DELETE FROM upload_sessions WHERE id=?", [(i,) for i in ids])
+    return ids
+
+
+def existing_upload_sessions(conn: sqlite3.Connection, upload_ids: list[str]) -> set[str]:
+    if not upload_ids:
+        return set()
+    marks = ",".join("?" * len(upload_ids))
+    rows = conn.execute(f"SELECT id FROM upload_sessions WHERE id IN ({marks})", upload_ids).fetchall()
+    return {str(r["id"]) for r in rows}
@@ -1,24 +1,63 @@
 from __future__ import annotations
 
+import queue
 import sqlite3
+import threading
+import time
 from contextlib import contextmanager
 from pathlib import Path
 from typing import Iterator
 
 
-def _connect_raw(db_path: Path) -> sqlite3.Connection:
+# journal_mode, synchronous per durability profile:
+# - fast: no journal, no fsync (old default; a crash mid-write can corrupt the DB)
+# - wal: WAL journal, readers never block on the writer; fsync at checkpoints only
+# - strict: WAL journal, fsync on every commit
+DURABILITY_PROFILES: dict[str, tuple[str, str]] = {
+    "fast": ("OFF", "OFF"),
+    "wal": ("WAL", "NORMAL"),
+    "strict": ("WAL", "FULL"),
+}
+DEFAULT_DURABILITY = "wal"
+BUSY_TIMEOUT_MS = 5000
+
+
+class Connection(sqlite3.Connection):
+    """sqlite3 connection that remembers the database file it was opened on.
+
+    In-process caches (permissions, workflow catalog) key on `db_key` so that
+    several databases in one process (tests, benchmarks) never share entries.
+    """
+
+    db_key = ""
+
+
+def db_key(conn: sqlite3.Connection) -> str:
+    key = getattr(conn, "db_key", "")
+    if not key:
+        row = conn.execute("PRAGMA database_list").fetchone()
+        key = str(row[2]) or f":memory:{id(conn)}"
+    return key
+
+
+def _connect_raw(db_path: Path, durability: str = DEFAULT_DURABILITY) -> sqlite3.Connection:
+    if durability not in DURABILITY_PROFILES:
+        raise ValueError("invalid_durability")
+    journal_mode, synchronous = DURABILITY_PROFILES[durability]
     db_path.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(str(db_path))
+    conn = sqlite3.connect(str(db_path), check_same_thread=False, factory=Connection)
+    conn.db_key = str(db_path.resolve())
     conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=OFF")
-    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA journal_mode={journal_mode}")
+    conn.execute(f"PRAGMA synchronous={synchronous}")
     conn.execute("PRAGMA foreign_keys=ON")
     return conn
 
 
 @contextmanager
-def connect(db_path: Path) -> Iterator[sqlite3.Connection]:
-    conn = _connect_raw(db_path)
+def connect(db_path: Path, *, durability: str = DEFAULT_DURABILITY) -> Iterator[sqlite3.Connection]:
+    conn = _connect_raw(db_path, durability)
     try:
         yield conn
         conn.commit()
@@ -28,3 +67,120 @@ def connect(db_path: Path) -> Iterator[sqlite3.Connection]:
     finally:
         conn.close()
 
+
+class ConnectionPool:
+    """Bounded pool of SQLite connections shared by the HTTP worker threads.
+
+    `max_size` caps the number of open connections; `acquire` blocks up to
+    `timeout` seconds when all of them are checked out and then raises
+    `TimeoutError`. Idle connections are health-checked with `SELECT 1` before
+    reuse once they have been idle for `health_check_after` seconds.
+    `max_size=0` disables pooling: every checkout opens a fresh connection.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        *,
+        max_size: int = 8,
+        timeout: float = 10.0,
+        health_check_after: float = 30.0,
+        durability: str = DEFAULT_DURABILITY,
+    ):
+        if durability not in DURABILITY_PROFILES:
+            raise ValueError("invalid_durability")
+        self.db_path = db_path
+        self.durability = durability
+        self.max_size = max(0, int(max_size))
+        self.timeout = timeout
+        self.health_check_after = health_check_after
+        self._idle: queue.LifoQueue[tuple[sqlite3.Connection, float]] = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.max_size) if self.max_size else None
+        self._lock = threading.Lock()
+        self._open = 0
+        self._closed = False
+
+    def _new_connection(self) -> sqlite3.Connection:
+        conn = _connect_raw(self.db_path, self.durability)
+        with self._lock:
+            self._open += 1
+        return conn
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            self._open -= 1
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def _healthy(self, conn: sqlite3.Connection, idle_since: float) -> bool:
+        if time.monotonic() - idle_since < self.health_check_after:
+            return True
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def acquire(self) -> sqlite3.Connection:
+        if self._closed:
+            raise RuntimeError("pool_closed")
+        if self._slots is None:
+            return self._new_connection()
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError("db_pool_exhausted")
+        try:
+            while True:
+                try:
+                    conn, idle_since = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._new_connection()
+                if self._healthy(conn, idle_since):
+                    return conn
+                self._discard(conn)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        if self._slots is None:
+            self._discard(conn)
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            self._slots.release()
+            return
+        if self._closed:
+            self._discard(conn)
+        else:
+            self._idle.put((conn, time.monotonic()))
+        self._slots.release()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self.acquire()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.release(conn)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"max_size": self.max_size, "open": self._open, "idle": self._idle.qsize()}
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
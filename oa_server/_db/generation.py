@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import multiprocessing
+import threading
+
+
+class Generation:
+    """Counter that in-process caches compare against to notice writes.
+
+    Until `share()` is called the value is a plain int. `share()` moves it into
+    shared memory; it must run before the pre-fork supervisor forks its workers,
+    so that a bump in any worker process is seen by the caches of all of them.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._value = 0
+        self._shared = None
+        self._shared_lock = None
+
+    @property
+    def value(self) -> int:
+        shared = self._shared
+        # An aligned 8-byte read needs no lock; only bumps are serialised.
+        return self._value if shared is None else shared.value
+
+    def bump(self) -> None:
+        with self._lock:
+            if self._shared is None:
+                self._value += 1
+                return
+            with self._shared_lock:
+                self._shared.value += 1
+
+    def share(self) -> None:
+        with self._lock:
+            if self._shared is None:
+                ctx = multiprocessing.get_context("fork")
+                self._shared = ctx.RawValue("q", self._value)
+                self._shared_lock = ctx.Lock()
+
+
+def share_cache_generations() -> None:
+    """Share the permission-matrix and workflow-catalog generations with forked workers."""
+    from . import rbac, workflow_variants
+
+    rbac._generation.share()
+    workflow_variants._catalog_generation.share()
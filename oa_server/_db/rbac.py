@@ -1,8 +1,12 @@
 from __future__ import annotations
 
 import sqlite3
+import threading
 import time
 
+from .connection import db_key
+from .generation import Generation
+
 
 _DEFAULT_USER_PERMISSIONS = [
     "requests:create",
@@ -14,6 +18,53 @@ _DEFAULT_USER_PERMISSIONS = [
 ]
 
 
+# In-process permission matrix per database: role -> frozenset of permission
+# keys, loaded in one query and reused until the generation changes. Writers
+# bump the generation inside their transaction and callers bump it again after
+# commit: a reader that rebuilt the matrix from not-yet-committed state between
+# the two would otherwise cache it under the new generation. Pre-fork workers
+# share the generation (see `share_cache_generations`); MATRIX_TTL bounds how
+# long edits made outside the server (a direct DB edit) stay invisible.
+MATRIX_TTL = 60.0
+
+_matrix_lock = threading.Lock()
+_generation = Generation()
+_matrices: dict[str, tuple[int, float, dict[str, frozenset[str]]]] = {}
+
+
+def invalidate_permission_cache() -> None:
+    with _matrix_lock:
+        _generation.bump()
+
+
+def permission_matrix(conn: sqlite3.Connection) -> dict[str, frozenset[str]]:
+    key = db_key(conn)
+    cached = _matrices.get(key)
+    gen = _generation.value
+    if cached is not None and cached[0] == gen and time.monotonic() - cached[1] < MATRIX_TTL:
+        return cached[2]
+    grouped: dict[str, set[str]] = {}
+    for r in conn.execute("SELECT role_name, permission_key FROM role_permissions"):
+        grouped.setdefault(str(r["role_name"]), set()).add(str(r["permission_key"]))
+    matrix = {role: frozenset(keys) for role, keys in grouped.items()}
+    with _matrix_lock:
+        if _generation.value == gen:
+            _matrices[key] = (gen, time.monotonic(), matrix)
+    return matrix
+
+
+def permission_granted(granted: frozenset[str], permission_key: str) -> bool:
+    """`*` grants everything, `area:*` grants every `area:...` key."""
+    if permission_key in granted or "*" in granted:
+        return True
+    area, sep, _ = permission_key.partition(":")
+    return bool(sep) and f"{area}:*" in granted
+
+
+def role_permissions(conn: sqlite3.Connection, role_name: str) -> frozenset[str]:
+    return permission_matrix(conn).get(role_name, frozenset())
+
+
 def ensure_default_roles(conn: sqlite3.Connection) -> None:
     now = int(time.time())
     conn.execute("INSERT OR IGNORE INTO roles(name,created_at) VALUES(?,?)", ("admin", now))
@@ -27,11 +78,13 @@ def ensure_default_roles(conn: sqlite3.Connection) -> None:
             "INSERT OR IGNORE INTO role_permissions(role_name,permission_key,created_at) VALUES(?,?,?)",
             [("user", p, now) for p in _DEFAULT_USER_PERMISSIONS],
         )
+        invalidate_permission_cache()
 
 
 def upsert_role(conn: sqlite3.Connection, role_name: str) -> None:
     now = int(time.time())
     conn.execute("INSERT OR IGNORE INTO roles(name,created_at) VALUES(?,?)", (role_name, now))
+    invalidate_permission_cache()
 
 
 def replace_role_permissions(conn: sqlite3.Connection, role_name: str, permissions: list[str]) -> None:
@@ -41,6 +94,7 @@ def replace_role_permissions(conn: sqlite3.Connection, role_name: str, permissio
         "INSERT OR IGNORE INTO role_permissions(role_name,permission_key,created_at) VALUES(?,?,?)",
         [(role_name, p, now) for p in permissions],
     )
+    invalidate_permission_cache()
 
 
 def list_roles(conn: sqlite3.Connection):
@@ -61,9 +115,4 @@ def role_exists(conn: sqlite3.Connection, role_name: str) -> bool:
 
 
 def role_has_permission(conn: sqlite3.Connection, role_name: str, permission_key: str) -> bool:
-    row = conn.execute(
-        "SELECT 1 FROM role_permissions WHERE role_name=? AND permission_key=? LIMIT 1",
-        (role_name, permission_key),
-    ).fetchone()
-    return row is not None
-
+    return permission_granted(role_permissions(conn, role_name), permission_key)
@@ -2,6 +2,9 @@ from __future__ import annotations
 
 import sqlite3
 import time
+from typing import Iterator
+
+from .search import fts_available, fts_query, index_request
 
 
 def create_request(
@@ -21,42 +24,96 @@ def create_request(
     )
     if payload_json is not None:
         conn.execute("UPDATE requests SET payload_json=? WHERE id=?", (payload_json, int(cur.lastrowid)))
+    index_request(conn, int(cur.lastrowid), title=title, body=body, payload_json=payload_json)
     return int(cur.lastrowid)
 
 
-def list_requests(conn: sqlite3.Connection, user_id: int, is_admin: bool):
-    if is_admin:
-        return conn.execute(
-            """
-            SELECT
-              r.*,
-              u.username AS owner_username,
-              d.username AS decided_by_username,
-              wf.name AS workflow_name,
-              wf.category AS workflow_category,
-              wf.scope_kind AS workflow_scope_kind,
-              wf.scope_value AS workflow_scope_value,
-              t.id AS pending_task_id,
-              t.step_key AS pending_step_key,
-              t.assignee_user_id AS pending_assignee_user_id,
-              t.assignee_role AS pending_assignee_role,
-              au.username AS pending_assignee_username
-            FROM requests r
-            JOIN users u ON u.id = r.user_id
-            LEFT JOIN users d ON d.id = r.decided_by
-            LEFT JOIN workflow_variants wf ON wf.workflow_key = r.workflow_key
-            LEFT JOIN tasks t ON t.id = (
-              SELECT id FROM tasks
-              WHERE request_id = r.id AND status='pending'
-              ORDER BY id DESC LIMIT 1
-            )
-            LEFT JOIN users au ON au.id = t.assignee_user_id
-            ORDER BY r.id DESC
-            """
-        ).fetchall()
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
 
-    return conn.execute(
-        """
+
+def _request_list_filters(
+    conn: sqlite3.Connection,
+    user_id: int,
+    is_admin: bool,
+    *,
+    before_id: int | None = None,
+    status: str | None = None,
+    request_type: str | None = None,
+    owner: str | None = None,
+    created_from: int | None = None,
+    created_to: int | None = None,
+    q: str | None = None,
+    rank: bool = False,
+) -> tuple[str, list[str], list[object], str]:
+    """FROM clause, WHERE terms, params and ORDER BY shared by the request listing and export."""
+    where: list[str] = []
+    params: list[object] = []
+    if not is_admin:
+        where.append("r.user_id = ?")
+        params.append(user_id)
+    if before_id is not None:
+        where.append("r.id < ?")
+        params.append(before_id)
+    if status:
+        where.append("r.status = ?")
+        params.append(status)
+    if request_type:
+        where.append("r.request_type = ?")
+        params.append(request_type)
+    if owner:
+        if owner.isdigit():
+            where.append("r.user_id = ?")
+            params.append(int(owner))
+        else:
+            where.append("u.username = ?")
+            params.append(owner)
+    if created_from is not None:
+        where.append("r.created_at >= ?")
+        params.append(created_from)
+    if created_to is not None:
+        where.append("r.created_at <= ?")
+        params.append(created_to)
+    from_clause = "requests r"
+    order_by = "r.id DESC"
+    if q:
+        match = fts_query(q) if fts_available(conn) else None
+        if match:
+            # The FTS index drives the loop (CROSS JOIN pins it as the outer table): FTS5 walks its
+            # doclist in rowid order, so a page of a common term stops after `limit` hits instead of
+            # collecting every match first.
+            from_clause = "requests_fts CROSS JOIN requests r ON r.id = requests_fts.rowid"
+            where.append("requests_fts MATCH ?")
+            params.append(match)
+            if before_id is not None:
+                where.append("requests_fts.rowid < ?")
+                params.append(before_id)
+            # Title hits weigh more than body, body more than payload values.
+            order_by = "bm25(requests_fts, 10.0, 2.0, 1.0), r.id DESC" if rank else "requests_fts.rowid DESC"
+        else:
+            pattern = f"%{_escape_like(q)}%"
+            where.append("(r.title LIKE ? ESCAPE '\\' OR r.body LIKE ? ESCAPE '\\')")
+            params.extend([pattern, pattern])
+    return from_clause, where, params, order_by
+
+
+def list_requests(
+    conn: sqlite3.Connection,
+    user_id: int,
+    is_admin: bool,
+    *,
+    limit: int | None = None,
+    **filters,
+):
+    """Requests newest first, optionally filtered and keyset-paginated.
+
+    `before_id` is the keyset cursor (rows with `id < before_id`); with `limit`
+    each page is an index range walk, independent of table size. `q` goes
+    through the FTS5 index when it exists (LIKE otherwise); `rank=True` orders
+    matches by bm25 relevance instead of id.
+    """
+    from_clause, where, params, order_by = _request_list_filters(conn, user_id, is_admin, **filters)
+    sql = f"""
         SELECT
           r.*,
           u.username AS owner_username,
@@ -70,7 +127,7 @@ def list_requests(conn: sqlite3.Connection, user_id: int, is_admin: bool):
           t.assignee_user_id AS pending_assignee_user_id,
           t.assignee_role AS pending_assignee_role,
           au.username AS pending_assignee_username
-        FROM requests r
+        FROM {from_clause}
         JOIN users u ON u.id = r.user_id
         LEFT JOIN users d ON d.id = r.decided_by
         LEFT JOIN workflow_variants wf ON wf.workflow_key = r.workflow_key
@@ -80,11 +137,73 @@ def list_requests(conn: sqlite3.Connection, user_id: int, is_admin: bool):
           ORDER BY id DESC LIMIT 1
         )
         LEFT JOIN users au ON au.id = t.assignee_user_id
-        WHERE r.user_id = ?
-        ORDER BY r.id DESC
-        """,
-        (user_id,),
-    ).fetchall()
+        {"WHERE " + " AND ".join(where) if where else ""}
+        ORDER BY {order_by}
+        """
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return conn.execute(sql, tuple(params)).fetchall()
+
+
+# Columns `/api/requests?format=csv|ndjson` may select, mapped to plain SQL
+# expressions: exports skip the pending-task/workflow joins of the listing.
+EXPORT_COLUMNS: dict[str, str] = {
+    "id": "r.id",
+    "type": "r.request_type",
+    "title": "r.title",
+    "body": "r.body",
+    "status": "r.status",
+    "owner_id": "r.user_id",
+    "owner_username": "u.username",
+    "workflow_key": "r.workflow_key",
+    "created_at": "r.created_at",
+    "updated_at": "r.updated_at",
+    "decided_at": "r.decided_at",
+    "decided_by_username": "d.username",
+    "payload": "r.payload_json",
+}
+DEFAULT_EXPORT_COLUMNS = ("id", "type", "title", "body", "status", "owner_username", "created_at")
+
+
+def iter_request_export(
+    conn: sqlite3.Connection,
+    user_id: int,
+    is_admin: bool,
+    *,
+    columns: tuple[str, ...] = DEFAULT_EXPORT_COLUMNS,
+    batch_size: int = 500,
+    **filters,
+) -> Iterator[list[tuple]]:
+    """Yield matching rows as plain tuples (in `columns` order), `batch_size` at a time.
+
+    Rows come straight off one cursor, so memory stays flat however many rows match.
+    """
+    unknown = [c for c in columns if c not in EXPORT_COLUMNS]
+    if unknown or not columns:
+        raise ValueError("invalid_columns")
+    filters.pop("rank", None)
+    from_clause, where, params, order_by = _request_list_filters(conn, user_id, is_admin, **filters)
+    decided_join = "LEFT JOIN users d ON d.id = r.decided_by" if "decided_by_username" in columns else ""
+    sql = f"""
+        SELECT {", ".join(EXPORT_COLUMNS[c] for c in columns)}
+        FROM {from_clause}
+        JOIN users u ON u.id = r.user_id
+        {decided_join}
+        {"WHERE " + " AND ".join(where) if where else ""}
+        ORDER BY {order_by}
+        """
+    cur = conn.cursor()
+    cur.row_factory = None
+    try:
+        cur.execute(sql, tuple(params))
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                return
+            yield rows
+    finally:
+        cur.close()
 
 
 def get_request(conn: sqlite3.Connection, request_id: int):
@@ -148,6 +267,7 @@ def reset_request_for_resubmit(conn: sqlite3.Connection, request_id: int, *, tit
         """,
         (title, body, payload_json, now, request_id),
     )
+    index_request(conn, request_id, title=title, body=body, payload_json=payload_json)
 
 
 def decide_request(conn: sqlite3.Connection, request_id: int, status: str, decided_by: int) -> None:
@@ -3,10 +3,12 @@ from __future__ import annotations
 import sqlite3
 import time
 from pathlib import Path
+from typing import Callable
 
 from ..auth import hash_password
-from .connection import connect
+from .connection import DEFAULT_DURABILITY, connect
 from .rbac import ensure_default_roles
+from .search import create_request_index
 from .workflows_legacy import ensure_default_workflows, migrate_workflows
 from .workflow_variants import ensure_workflow_variants, migrate_workflow_variants
 
@@ -22,197 +24,306 @@ def _ensure_column(conn: sqlite3.Connection, table: str, column: str, ddl: str)
     conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
 
 
-def init_db(db_path: Path) -> None:
-    with connect(db_path) as conn:
-        conn.executescript(
+def _migrate_base_schema(conn: sqlite3.Connection) -> None:
+    conn.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS users (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          username TEXT NOT NULL UNIQUE,
+          password_hash TEXT NOT NULL,
+          role TEXT NOT NULL,
+          created_at INTEGER NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS sessions (
+          token TEXT PRIMARY KEY,
+          user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+          expires_at INTEGER NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS requests (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+          title TEXT NOT NULL,
+          body TEXT NOT NULL,
+          status TEXT NOT NULL,
+          decided_by INTEGER REFERENCES users(id),
+          decided_at INTEGER,
+          created_at INTEGER NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS tasks (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          request_id INTEGER NOT NULL REFERENCES requests(id) ON DELETE CASCADE,
+          step_key TEXT NOT NULL,
+          assignee_user_id INTEGER REFERENCES users(id),
+          assignee_role TEXT,
+          status TEXT NOT NULL,
+          decided_by INTEGER REFERENCES users(id),
+          decided_at INTEGER,
+          comment TEXT,
+          created_at INTEGER NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS request_events (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          request_id INTEGER NOT NULL REFERENCES requests(id) ON DELETE CASCADE,
+          event_type TEXT NOT NULL,
+          actor_user_id INTEGER REFERENCES users(id),
+          message TEXT,
+          created_at INTEGER NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS request_watchers (
+          request_id INTEGER NOT NULL REFERENCES requests(id) ON DELETE CASCADE,
+          user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+          kind TEXT NOT NULL,
+          created_at INTEGER NOT NULL,
+          UNIQUE(request_id, user_id, kind)
+        );
+
+        CREATE TABLE IF NOT EXISTS notifications (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+          request_id INTEGER REFERENCES requests(id) ON DELETE CASCADE,
+          event_type TEXT NOT NULL,
+          actor_user_id INTEGER REFERENCES users(id),
+          message TEXT,
+          created_at INTEGER NOT NULL,
+          read_at INTEGER
+        );
+
+        CREATE TABLE IF NOT EXISTS attachments (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          request_id INTEGER NOT NULL REFERENCES requests(id) ON DELETE CASCADE,
+          uploader_user_id INTEGER NOT NULL REFERENCES users(id),
+          filename TEXT NOT NULL,
+          content_type TEXT,
+          size INTEGER NOT NULL,
+          storage_path TEXT NOT NULL,
+          created_at INTEGER NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS roles (
+          name TEXT PRIMARY KEY,
+          created_at INTEGER NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS role_permissions (
+          role_name TEXT NOT NULL REFERENCES roles(name) ON DELETE CASCADE,
+          permission_key TEXT NOT NULL,
+          created_at INTEGER NOT NULL,
+          UNIQUE(role_name, permission_key)
+        );
+
+        CREATE TABLE IF NOT EXISTS delegations (
+          delegator_user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+          delegate_user_id INTEGER REFERENCES users(id),
+          active INTEGER NOT NULL,
+          created_at INTEGER NOT NULL,
+          revoked_at INTEGER
+        );
+
+        CREATE TABLE IF NOT EXISTS departments (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          name TEXT NOT NULL UNIQUE,
+          parent_id INTEGER REFERENCES departments(id) ON DELETE SET NULL,
+          created_at INTEGER NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS workflow_definitions (
+          request_type TEXT PRIMARY KEY,
+          name TEXT NOT NULL,
+          enabled INTEGER NOT NULL,
+          created_at INTEGER NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS workflow_steps (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          request_type TEXT NOT NULL REFERENCES workflow_definitions(request_type) ON DELETE CASCADE,
+          step_order INTEGER NOT NULL,
+          step_key TEXT NOT NULL,
+          assignee_kind TEXT NOT NULL,
+          assignee_value TEXT,
+          condition_kind TEXT,
+          condition_value TEXT,
+          created_at INTEGER NOT NULL,
+          UNIQUE(request_type, step_order)
+        );
+
+        -- Workflow catalog v2: supports grouping + multiple variants per request_type (e.g. dept-specific).
+        CREATE TABLE IF NOT EXISTS workflow_variants (
+          workflow_key TEXT PRIMARY KEY,
+          request_type TEXT NOT NULL,
+          name TEXT NOT NULL,
+          category TEXT NOT NULL,
+          scope_kind TEXT NOT NULL,
+          scope_value TEXT,
+          enabled INTEGER NOT NULL,
+          is_default INTEGER NOT NULL,
+          created_at INTEGER NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS workflow_variant_steps (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          workflow_key TEXT NOT NULL REFERENCES workflow_variants(workflow_key) ON DELETE CASCADE,
+          step_order INTEGER NOT NULL,
+          step_key TEXT NOT NULL,
+          assignee_kind TEXT NOT NULL,
+          assignee_value TEXT,
+          condition_kind TEXT,
+          condition_value TEXT,
+          created_at INTEGER NOT NULL,
+          UNIQUE(workflow_key, step_order)
+        );
+        """
+    )
+
+    _ensure_column(conn, "users", "dept", "TEXT")
+    _ensure_column(conn, "users", "manager_id", "INTEGER")
+    _ensure_column(conn, "users", "dept_id", "INTEGER")
+    _ensure_column(conn, "users", "position", "TEXT")
+    _ensure_column(conn, "requests", "request_type", "TEXT NOT NULL DEFAULT 'generic'")
+    _ensure_column(conn, "requests", "workflow_key", "TEXT")
+    _ensure_column(conn, "requests", "payload_json", "TEXT")
+    _ensure_column(conn, "requests", "updated_at", "INTEGER")
+    _ensure_column(conn, "tasks", "step_order", "INTEGER")
+    _ensure_column(conn, "workflow_steps", "condition_kind", "TEXT")
+    _ensure_column(conn, "workflow_steps", "condition_value", "TEXT")
+
+
+def _migrate_default_users(conn: sqlite3.Connection) -> None:
+    existing = conn.execute("SELECT COUNT(1) AS c FROM users").fetchone()["c"]
+    if existing == 0:
+        now = int(time.time())
+        cur = conn.execute(
+            "INSERT INTO users(username,password_hash,role,created_at) VALUES(?,?,?,?)",
+            ("admin", hash_password("admin"), "admin", now),
+        )
+        admin_id = int(cur.lastrowid)
+        conn.execute(
+            "INSERT INTO users(username,password_hash,role,created_at,manager_id) VALUES(?,?,?,?,?)",
+            ("user", hash_password("user"), "user", now, admin_id),
+        )
+    else:
+        admin = conn.execute("SELECT id FROM users WHERE role='admin' ORDER BY id LIMIT 1").fetchone()
+        if admin:
+            conn.execute(
+                "UPDATE users SET manager_id=? WHERE username='user' AND (manager_id IS NULL OR manager_id='')",
+                (int(admin["id"]),),
+            )
+
+
+def _migrate_workflow_catalog(conn: sqlite3.Connection) -> None:
+    ensure_default_workflows(conn)
+    migrate_workflows(conn)
+    ensure_workflow_variants(conn)
+    migrate_workflow_variants(conn)
+
+
+# Secondary indexes for the hot read paths (inbox, request detail, notifications,
+# "mine" request list, session sweeps).
+_INDEXES_V1: list[tuple[str, str]] = [
+    ("idx_tasks_status_assignee_user", "tasks(status, assignee_user_id)"),
+    ("idx_tasks_status_assignee_role", "tasks(status, assignee_role)"),
+    ("idx_tasks_request_status", "tasks(request_id, status, id)"),
+    ("idx_request_events_request", "request_events(request_id, id)"),
+    ("idx_notifications_user", "notifications(user_id, id)"),
+    ("idx_attachments_request", "attachments(request_id, id)"),
+    ("idx_requests_user", "requests(user_id, id)"),
+    ("idx_sessions_expires", "sessions(expires_at)"),
+    ("idx_delegations_delegate", "delegations(delegate_user_id, active)"),
+]
+
+
+# Keyset pages of `/api/requests` filtered by status / type.
+_INDEXES_V2: list[tuple[str, str]] = [
+    ("idx_requests_status", "requests(status, id)"),
+    ("idx_requests_type", "requests(request_type, id)"),
+]
+
+
+# Per-user session lookups for the maintenance sweeper's sessions-per-user cap.
+_INDEXES_V3: list[tuple[str, str]] = [
+    ("idx_sessions_user", "sessions(user_id, expires_at)"),
+]
+
+
+def _migrate_attachment_hashes(conn: sqlite3.Connection) -> None:
+    # Content-addressed uploads: rows sharing a digest share one blob file, and the
+    # index turns "is this blob still referenced?" into a lookup. Older rows keep NULL.
+    _ensure_column(conn, "attachments", "sha256", "TEXT")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_attachments_sha256 ON attachments(sha256)")
+
+
+def _migrate_upload_sessions(conn: sqlite3.Connection) -> None:
+    # Resumable uploads in progress; the chunks themselves live on disk next to the blobs.
+    conn.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS upload_sessions (
+          id TEXT PRIMARY KEY,
+          request_id INTEGER NOT NULL REFERENCES requests(id) ON DELETE CASCADE,
+          user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+          filename TEXT NOT NULL,
+          content_type TEXT,
+          size INTEGER NOT NULL,
+          sha256 TEXT,
+          received INTEGER NOT NULL,
+          created_at INTEGER NOT NULL,
+          expires_at INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_upload_sessions_expires ON upload_sessions(expires_at);
+        """
+    )
+
+
+def _create_indexes(conn: sqlite3.Connection, indexes: list[tuple[str, str]]) -> None:
+    for name, target in indexes:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+
+
+# Numbered migrations, applied once each and recorded in `schema_migrations`.
+# Never renumber or edit an applied entry; append a new one instead. Every
+# migration must stay idempotent so DBs created before `schema_migrations`
+# existed can replay the whole list.
+MIGRATIONS: list[tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, "base_schema", _migrate_base_schema),
+    (2, "default_users", _migrate_default_users),
+    (3, "workflow_catalog", _migrate_workflow_catalog),
+    (4, "default_roles", ensure_default_roles),
+    (5, "indexes_v1", lambda conn: _create_indexes(conn, _INDEXES_V1)),
+    (6, "indexes_v2", lambda conn: _create_indexes(conn, _INDEXES_V2)),
+    # Skipped silently when SQLite is built without FTS5; search then falls back to LIKE.
+    (7, "requests_fts", create_request_index),
+    (8, "indexes_v3", lambda conn: _create_indexes(conn, _INDEXES_V3)),
+    (9, "attachment_hashes", _migrate_attachment_hashes),
+    (10, "upload_sessions", _migrate_upload_sessions),
+]
+
+
+def applied_migrations(conn: sqlite3.Connection) -> set[int]:
+    rows = conn.execute("SELECT version FROM schema_migrations").fetchall()
+    return {int(r["version"]) for r in rows}
+
+
+def init_db(db_path: Path, *, durability: str = DEFAULT_DURABILITY) -> None:
+    with connect(db_path, durability=durability) as conn:
+        conn.execute(
             """
-            CREATE TABLE IF NOT EXISTS users (
-              id INTEGER PRIMARY KEY AUTOINCREMENT,
-              username TEXT NOT NULL UNIQUE,
-              password_hash TEXT NOT NULL,
-              role TEXT NOT NULL,
-              created_at INTEGER NOT NULL
-            );
-
-            CREATE TABLE IF NOT EXISTS sessions (
-              token TEXT PRIMARY KEY,
-              user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
-              expires_at INTEGER NOT NULL
-            );
-
-            CREATE TABLE IF NOT EXISTS requests (
-              id INTEGER PRIMARY KEY AUTOINCREMENT,
-              user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
-              title TEXT NOT NULL,
-              body TEXT NOT NULL,
-              status TEXT NOT NULL,
-              decided_by INTEGER REFERENCES users(id),
-              decided_at INTEGER,
-              created_at INTEGER NOT NULL
-            );
-
-            CREATE TABLE IF NOT EXISTS tasks (
-              id INTEGER PRIMARY KEY AUTOINCREMENT,
-              request_id INTEGER NOT NULL REFERENCES requests(id) ON DELETE CASCADE,
-              step_key TEXT NOT NULL,
-              assignee_user_id INTEGER REFERENCES users(id),
-              assignee_role TEXT,
-              status TEXT NOT NULL,
-              decided_by INTEGER REFERENCES users(id),
-              decided_at INTEGER,
-              comment TEXT,
-              created_at INTEGER NOT NULL
-            );
-
-            CREATE TABLE IF NOT EXISTS request_events (
-              id INTEGER PRIMARY KEY AUTOINCREMENT,
-              request_id INTEGER NOT NULL REFERENCES requests(id) ON DELETE CASCADE,
-              event_type TEXT NOT NULL,
-              actor_user_id INTEGER REFERENCES users(id),
-              message TEXT,
-              created_at INTEGER NOT NULL
-            );
-
-            CREATE TABLE IF NOT EXISTS request_watchers (
-              request_id INTEGER NOT NULL REFERENCES requests(id) ON DELETE CASCADE,
-              user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
-              kind TEXT NOT NULL,
-              created_at INTEGER NOT NULL,
-              UNIQUE(request_id, user_id, kind)
-            );
-
-            CREATE TABLE IF NOT EXISTS notifications (
-              id INTEGER PRIMARY KEY AUTOINCREMENT,
-              user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
-              request_id INTEGER REFERENCES requests(id) ON DELETE CASCADE,
-              event_type TEXT NOT NULL,
-              actor_user_id INTEGER REFERENCES users(id),
-              message TEXT,
-              created_at INTEGER NOT NULL,
-              read_at INTEGER
-            );
-
-            CREATE TABLE IF NOT EXISTS attachments (
-              id INTEGER PRIMARY KEY AUTOINCREMENT,
-              request_id INTEGER NOT NULL REFERENCES requests(id) ON DELETE CASCADE,
-              uploader_user_id INTEGER NOT NULL REFERENCES users(id),
-              filename TEXT NOT NULL,
-              content_type TEXT,
-              size INTEGER NOT NULL,
-              storage_path TEXT NOT NULL,
-              created_at INTEGER NOT NULL
-            );
-
-            CREATE TABLE IF NOT EXISTS roles (
-              name TEXT PRIMARY KEY,
-              created_at INTEGER NOT NULL
-            );
-
-            CREATE TABLE IF NOT EXISTS role_permissions (
-              role_name TEXT NOT NULL REFERENCES roles(name) ON DELETE CASCADE,
-              permission_key TEXT NOT NULL,
-              created_at INTEGER NOT NULL,
-              UNIQUE(role_name, permission_key)
-            );
-
-            CREATE TABLE IF NOT EXISTS delegations (
-              delegator_user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
-              delegate_user_id INTEGER REFERENCES users(id),
-              active INTEGER NOT NULL,
-              created_at INTEGER NOT NULL,
-              revoked_at INTEGER
-            );
-
-            CREATE TABLE IF NOT EXISTS departments (
-              id INTEGER PRIMARY KEY AUTOINCREMENT,
-              name TEXT NOT NULL UNIQUE,
-              parent_id INTEGER REFERENCES departments(id) ON DELETE SET NULL,
-              created_at INTEGER NOT NULL
-            );
-
-            CREATE TABLE IF NOT EXISTS workflow_definitions (
-              request_type TEXT PRIMARY KEY,
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+              version INTEGER PRIMARY KEY,
               name TEXT NOT NULL,
-              enabled INTEGER NOT NULL,
-              created_at INTEGER NOT NULL
-            );
-
-            CREATE TABLE IF NOT EXISTS workflow_steps (
-              id INTEGER PRIMARY KEY AUTOINCREMENT,
-              request_type TEXT NOT NULL REFERENCES workflow_definitions(request_type) ON DELETE CASCADE,
-              step_order INTEGER NOT NULL,
-              step_key TEXT NOT NULL,
-              assignee_kind TEXT NOT NULL,
-              assignee_value TEXT,
-              condition_kind TEXT,
-              condition_value TEXT,
-              created_at INTEGER NOT NULL,
-              UNIQUE(request_type, step_order)
-            );
-
-            -- Workflow catalog v2: supports grouping + multiple variants per request_type (e.g. dept-specific).
-            CREATE TABLE IF NOT EXISTS workflow_variants (
-              workflow_key TEXT PRIMARY KEY,
-              request_type TEXT NOT NULL,
-              name TEXT NOT NULL,
-              category TEXT NOT NULL,
-              scope_kind TEXT NOT NULL,
-              scope_value TEXT,
-              enabled INTEGER NOT NULL,
-              is_default INTEGER NOT NULL,
-              created_at INTEGER NOT NULL
-            );
-
-            CREATE TABLE IF NOT EXISTS workflow_variant_steps (
-              id INTEGER PRIMARY KEY AUTOINCREMENT,
-              workflow_key TEXT NOT NULL REFERENCES workflow_variants(workflow_key) ON DELETE CASCADE,
-              step_order INTEGER NOT NULL,
-              step_key TEXT NOT NULL,
-              assignee_kind TEXT NOT NULL,
-              assignee_value TEXT,
-              condition_kind TEXT,
-              condition_value TEXT,
-              created_at INTEGER NOT NULL,
-              UNIQUE(workflow_key, step_order)
-            );
+              applied_at INTEGER NOT NULL
+            )
             """
         )
-
-        _ensure_column(conn, "users", "dept", "TEXT")
-        _ensure_column(conn, "users", "manager_id", "INTEGER")
-        _ensure_column(conn, "users", "dept_id", "INTEGER")
-        _ensure_column(conn, "users", "position", "TEXT")
-        _ensure_column(conn, "requests", "request_type", "TEXT NOT NULL DEFAULT 'generic'")
-        _ensure_column(conn, "requests", "workflow_key", "TEXT")
-        _ensure_column(conn, "requests", "payload_json", "TEXT")
-        _ensure_column(conn, "requests", "updated_at", "INTEGER")
-        _ensure_column(conn, "tasks", "step_order", "INTEGER")
-        _ensure_column(conn, "workflow_steps", "condition_kind", "TEXT")
-        _ensure_column(conn, "workflow_steps", "condition_value", "TEXT")
-
-        existing = conn.execute("SELECT COUNT(1) AS c FROM users").fetchone()["c"]
-        if existing == 0:
-            now = int(time.time())
-            cur = conn.execute(
-                "INSERT INTO users(username,password_hash,role,created_at) VALUES(?,?,?,?)",
-                ("admin", hash_password("admin"), "admin", now),
-            )
-            admin_id = int(cur.lastrowid)
+        applied = applied_migrations(conn)
+        for version, name, migrate in MIGRATIONS:
+            if version in applied:
+                continue
+            migrate(conn)
             conn.execute(
-                "INSERT INTO users(username,password_hash,role,created_at,manager_id) VALUES(?,?,?,?,?)",
-                ("user", hash_password("user"), "user", now, admin_id),
+                "INSERT OR IGNORE INTO schema_migrations(version,name,applied_at) VALUES(?,?,?)",
+                (version, name, int(time.time())),
             )
-        else:
-            admin = conn.execute("SELECT id FROM users WHERE role='admin' ORDER BY id LIMIT 1").fetchone()
-            if admin:
-                conn.execute(
-                    "UPDATE users SET manager_id=? WHERE username='user' AND (manager_id IS NULL OR manager_id='')",
-                    (int(admin["id"]),),
-                )
-
-        ensure_default_workflows(conn)
-        migrate_workflows(conn)
-        ensure_workflow_variants(conn)
-        migrate_workflow_variants(conn)
-        ensure_default_roles(conn)
-
+            conn.commit()
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import json
+import re
+import sqlite3
+from typing import Any
+
+# Full-text index over requests (title, body, flattened payload values).
+#
+# FTS5's built-in tokenizers do not segment Chinese: unicode61 turns a whole
+# run of ideographs into one token and trigram cannot match the 1-2 character
+# queries that are normal for Chinese titles (`报销`, `请假`). Text is therefore
+# pre-segmented here before it reaches FTS5: runs of CJK characters become
+# overlapping bigrams plus the run's last character, other text stays as words
+# for unicode61. A CJK query then becomes a phrase of bigrams, which matches
+# exactly where the original substring occurs.
+
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af"
+_SEGMENT_RE = re.compile(f"[{_CJK}]+|[^\\W_{_CJK}]+")
+_CJK_RUN_RE = re.compile(f"[{_CJK}]+")
+
+
+def _segments(value: str) -> list[str]:
+    return _SEGMENT_RE.findall(value.lower())
+
+
+def _cjk_bigrams(run: str) -> list[str]:
+    if len(run) == 1:
+        return [run]
+    return [run[i : i + 2] for i in range(len(run) - 1)] + [run[-1]]
+
+
+def search_text(value: str | None) -> str:
+    if not value:
+        return ""
+    tokens: list[str] = []
+    for seg in _segments(value):
+        if _CJK_RUN_RE.fullmatch(seg):
+            tokens.extend(_cjk_bigrams(seg))
+        else:
+            tokens.append(seg)
+    return " ".join(tokens)
+
+
+def _payload_values(obj: Any, out: list[str]) -> None:
+    if isinstance(obj, dict):
+        for v in obj.values():
+            _payload_values(v, out)
+    elif isinstance(obj, list):
+        for v in obj:
+            _payload_values(v, out)
+    elif isinstance(obj, (str, int, float)) and not isinstance(obj, bool):
+        out.append(str(obj))
+
+
+def flatten_payload(payload_json: str | None) -> str:
+    if not payload_json:
+        return ""
+    try:
+        obj = json.loads(payload_json)
+    except Exception:
+        return ""
+    values: list[str] = []
+    _payload_values(obj, values)
+    return " ".join(values)
+
+
+def fts_query(q: str) -> str | None:
+    """Translate a user query into an FTS5 MATCH expression (None if nothing searchable).
+
+    Every segment must match (implicit AND). CJK segments become bigram phrases,
+    single CJK characters and the last word become prefix queries.
+    """
+    segments = _segments(q)
+    if not segments:
+        return None
+    terms: list[str] = []
+    for i, seg in enumerate(segments):
+        last = i == len(segments) - 1
+        if _CJK_RUN_RE.fullmatch(seg):
+            if len(seg) == 1:
+                terms.append(f'"{seg}"*')
+            else:
+                terms.append('"' + " ".join(seg[j : j + 2] for j in range(len(seg) - 1)) + '"')
+        else:
+            terms.append(f'"{seg}"*' if last else f'"{seg}"')
+    return " ".join(terms)
+
+
+def create_request_index(conn: sqlite3.Connection) -> bool:
+    """Create and backfill `requests_fts`; returns False when SQLite lacks FTS5."""
+    try:
+        conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS requests_fts USING fts5(title, body, payload, tokenize='unicode61 remove_diacritics 2')"
+        )
+    except sqlite3.OperationalError:
+        return False
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS requests_fts_delete AFTER DELETE ON requests BEGIN
+          DELETE FROM requests_fts WHERE rowid = old.id;
+        END
+        """
+    )
+    conn.execute("DELETE FROM requests_fts")
+    cur = conn.execute("SELECT id, title, body, payload_json FROM requests ORDER BY id")
+    while True:
+        rows = cur.fetchmany(1000)
+        if not rows:
+            break
+        conn.executemany(
+            "INSERT INTO requests_fts(rowid,title,body,payload) VALUES(?,?,?,?)",
+            [
+                (int(r["id"]), search_text(r["title"]), search_text(r["body"]), search_text(flatten_payload(r["payload_json"])))
+                for r in rows
+            ],
+        )
+    return True
+
+
+def fts_available(conn: sqlite3.Connection) -> bool:
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='requests_fts'").fetchone()
+    return row is not None
+
+
+def index_request(conn: sqlite3.Connection, request_id: int, *, title: str, body: str, payload_json: str | None) -> None:
+    if not fts_available(conn):
+        return
+    conn.execute("DELETE FROM requests_fts WHERE rowid=?", (request_id,))
+    conn.execute(
+        "INSERT INTO requests_fts(rowid,title,body,payload) VALUES(?,?,?,?)",
+        (request_id, search_text(title), search_text(body), search_text(flatten_payload(payload_json))),
+    )
@@ -36,16 +36,16 @@ def list_inbox_tasks(conn: sqlite3.Connection, *, user_id: int, role: str):
         JOIN requests r ON r.id = t.request_id
         JOIN users u ON u.id = r.user_id
         LEFT JOIN users au ON au.id = t.assignee_user_id
-        WHERE t.status='pending'
-          AND (
+        WHERE (
             r.status='pending'
             OR (r.status='changes_requested' AND t.step_key='resubmit')
           )
           AND (
-            t.assignee_user_id = ?
-            OR (t.assignee_role IS NOT NULL AND t.assignee_role = ?)
+            -- status='pending' is repeated per branch so each one can use its own index (MULTI-INDEX OR).
+            (t.status='pending' AND t.assignee_user_id = ?)
+            OR (t.status='pending' AND t.assignee_role = ?)
             OR (
-              t.assignee_user_id IS NOT NULL
+              t.status='pending'
               AND t.assignee_user_id IN (
                 SELECT delegator_user_id FROM delegations WHERE delegate_user_id=? AND active=1
               )
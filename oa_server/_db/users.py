@@ -22,6 +22,12 @@ def list_users(conn: sqlite3.Connection):
     ).fetchall()
 
 
+def replace_password_hash(conn: sqlite3.Connection, user_id: int, new_hash: str, *, old_hash: str) -> bool:
+    """Swap in `new_hash` unless the password changed since `old_hash` was read."""
+    cur = conn.execute("UPDATE users SET password_hash = ? WHERE id = ? AND password_hash = ?", (new_hash, user_id, old_hash))
+    return cur.rowcount == 1
+
+
 _UNSET = object()
 
 
@@ -76,3 +82,31 @@ def get_session_with_user(conn: sqlite3.Connection, token: str):
         """,
         (token,),
     ).fetchone()
+
+
+def delete_expired_sessions(conn: sqlite3.Connection, now: int, *, limit: int) -> int:
+    """Delete up to `limit` sessions that expired by `now` (via idx_sessions_expires); returns how many."""
+    cur = conn.execute(
+        "DELETE FROM sessions WHERE rowid IN (SELECT rowid FROM sessions WHERE expires_at <= ? LIMIT ?)",
+        (now, limit),
+    )
+    return cur.rowcount
+
+
+def trim_user_sessions(conn: sqlite3.Connection, max_per_user: int, *, limit: int) -> list[str]:
+    """Delete all but each user's `max_per_user` newest sessions (at most `limit`); returns the deleted tokens."""
+    over = conn.execute(
+        "SELECT user_id FROM sessions GROUP BY user_id HAVING COUNT(1) > ? LIMIT ?",
+        (max_per_user, limit),
+    ).fetchall()
+    tokens: list[str] = []
+    for row in over:
+        rows = conn.execute(
+            "SELECT token FROM sessions WHERE user_id = ? ORDER BY expires_at DESC LIMIT -1 OFFSET ?",
+            (int(row["user_id"]), max_per_user),
+        ).fetchall()
+        tokens.extend(str(r["token"]) for r in rows[: limit - len(tokens)])
+        if len(tokens) >= limit:
+            break
+    conn.executemany("DELETE FROM sessions WHERE token = ?", [(t,) for t in tokens])
+    return tokens
@@ -3,6 +3,30 @@ from __future__ import annotations
 import sqlite3
 import time
 
+from .generation import Generation
+
+
+# Generation of the workflow catalog, read by the compiled catalog cache in
+# `oa_server/_server/workflow_catalog.py`. Every write to workflow_variants /
+# workflow_variant_steps bumps it; admin handlers bump it again after commit.
+# Pre-fork workers share it (see `share_cache_generations`).
+_catalog_generation = Generation()
+
+
+def invalidate_workflow_catalog() -> None:
+    _catalog_generation.bump()
+
+
+def workflow_catalog_generation() -> int:
+    return _catalog_generation.value
+
+
+def load_workflow_catalog(conn: sqlite3.Connection) -> tuple[list[sqlite3.Row], list[sqlite3.Row]]:
+    """All variants (in rowid order, which is what the default lookups' `LIMIT 1` returned) and all steps."""
+    variants = conn.execute("SELECT * FROM workflow_variants ORDER BY rowid ASC").fetchall()
+    steps = conn.execute("SELECT * FROM workflow_variant_steps ORDER BY workflow_key ASC, step_order ASC").fetchall()
+    return variants, steps
+
 
 def _default_category_for_request_type(request_type: str) -> str:
     if request_type in {
@@ -93,6 +117,7 @@ def ensure_workflow_variants(conn: sqlite3.Connection) -> None:
                     now,
                 ),
             )
+    invalidate_workflow_catalog()
 
 
 def migrate_workflow_variants(conn: sqlite3.Connection) -> None:
@@ -305,6 +330,7 @@ def migrate_workflow_variants(conn: sqlite3.Connection) -> None:
         )
         """,
     )
+    invalidate_workflow_catalog()
 
 
 def list_workflows(conn: sqlite3.Connection):
@@ -398,6 +424,7 @@ def replace_workflow_steps(conn: sqlite3.Connection, request_type: str, *, name:
                 now,
             ),
         )
+    invalidate_workflow_catalog()
 
 
 def get_workflow_variant(conn: sqlite3.Connection, workflow_key: str):
@@ -483,6 +510,7 @@ def upsert_workflow_variant(
                 """,
                 (request_type, workflow_key),
             )
+    invalidate_workflow_catalog()
 
 
 def replace_workflow_variant_steps(conn: sqlite3.Connection, workflow_key: str, steps: list[dict]) -> None:
@@ -507,10 +535,12 @@ def replace_workflow_variant_steps(conn: sqlite3.Connection, workflow_key: str,
                 now,
             ),
         )
+    invalidate_workflow_catalog()
 
 
 def delete_workflow_variant(conn: sqlite3.Connection, workflow_key: str) -> None:
     conn.execute("DELETE FROM workflow_variants WHERE workflow_key = ?", (workflow_key,))
+    invalidate_workflow_catalog()
 
 
 def list_workflow_variants_admin(conn: sqlite3.Connection):
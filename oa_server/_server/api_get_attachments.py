@@ -2,51 +2,174 @@ from __future__ import annotations
 
 from http import HTTPStatus
 from pathlib import Path
+from urllib.parse import parse_qs, quote
 
 from .. import db
-from .ids import parse_attachment_id
+from ..auth import AuthenticatedUser
+from . import streaming
+from .file_response import send_file
+from .router import RouteTable
+from .upload_sessions import get_upload_session, session_to_dict
+from .zip_stream import ZipEntry, unique_name, write_zip
 
+# Attachment rows fetched per query while a ZIP archive streams; the pooled connection is
+# given back between pages, so an archive of thousands of files never pins one.
+ARCHIVE_PAGE_SIZE = 500
 
-def try_handle(handler, path: str, query: str) -> bool:
-    if not (path.startswith("/api/attachments/") and path.endswith("/download")):
-        return False
+routes = RouteTable()
 
+
+def _can_download(user: AuthenticatedUser, req) -> bool:
+    return user.role == "admin" or int(req["user_id"]) == user.id
+
+
+def _attachment_path(attachments_dir: Path, storage_path: str) -> Path | None:
+    """The file of an attachment row, or None if `storage_path` points outside the attachments dir."""
+    candidate = (attachments_dir / Path(storage_path)).resolve()
+    base_dir = attachments_dir.resolve()
+    if base_dir not in candidate.parents and candidate != base_dir:
+        return None
+    return candidate
+
+
+@routes.get("/api/attachments/{attachment_id:int}/download")
+def download_attachment(handler, query: str, *, attachment_id: int) -> None:
     user = handler._require_user()
-    attachment_id = parse_attachment_id(path, suffix="/download")
-    with db.connect(handler.server.db_path) as conn:
+    with handler.db_connection() as conn:
         att = db.get_attachment(conn, attachment_id)
         if not att:
             handler._send_error(HTTPStatus.NOT_FOUND, "not_found")
-            return True
+            return
         req = db.get_request(conn, int(att["request_id"]))
         if not req:
             handler._send_error(HTTPStatus.NOT_FOUND, "not_found")
-            return True
-        if user.role != "admin" and int(req["user_id"]) != user.id:
+            return
+        if not _can_download(user, req):
             handler._send_error(HTTPStatus.FORBIDDEN, "not_authorized")
-            return True
+            return
 
-    rel = Path(str(att["storage_path"]))
-    candidate = (handler.server.attachments_dir / rel).resolve()
-    base_dir = handler.server.attachments_dir.resolve()
-    if base_dir not in candidate.parents and candidate != base_dir:
+    candidate = _attachment_path(handler.server.attachments_dir, str(att["storage_path"]))
+    if candidate is None:
         handler._send_error(HTTPStatus.FORBIDDEN, "forbidden")
-        return True
-    if not candidate.exists() or not candidate.is_file():
-        handler._send_error(HTTPStatus.NOT_FOUND, "not_found")
-        return True
+        return
 
-    data = candidate.read_bytes()
     ctype = "application/octet-stream"
     if att["content_type"] is not None and str(att["content_type"]).strip():
         ctype = str(att["content_type"]).strip()
-    safe = str(att["filename"]).replace('"', "").replace("\r", "").replace("\n", "")
+    name = str(att["filename"]).replace('"', "").replace("\r", "").replace("\n", "")
+    # Header values are latin-1: an ASCII fallback plus the UTF-8 name as `filename*` (RFC 6266).
+    ascii_name = name.encode("ascii", "replace").decode("ascii").replace("?", "_")
+    disposition = f'attachment; filename="{ascii_name}"'
+    if ascii_name != name:
+        disposition += f"; filename*=UTF-8''{quote(name, safe='')}"
+
+    # A large download can take a while; do not hold a pooled connection for it.
+    handler._release_db_connection()
+    try:
+        send_file(
+            handler,
+            candidate,
+            content_type=ctype,
+            headers={"Content-Disposition": disposition},
+            # Blob content never changes under a digest, so it is the natural strong validator.
+            etag=f'"{att["sha256"]}"' if att["sha256"] else None,
+        )
+    except FileNotFoundError:
+        handler._send_error(HTTPStatus.NOT_FOUND, "not_found")
+
+
+def _stream_archive(handler, user: AuthenticatedUser, filename: str, *, per_request_dirs: bool, **filters) -> None:
+    """Send every attachment `user` may download that matches `filters` as one streamed ZIP."""
+    is_admin = user.role == "admin"
+    attachments_dir = handler.server.attachments_dir
+
+    def fetch(after_id: int):
+        with handler.db_connection() as conn:
+            rows = db.list_archive_attachments(
+                conn, user.id, is_admin, after_id=after_id, limit=ARCHIVE_PAGE_SIZE, **filters
+            )
+        handler._release_db_connection()
+        return rows
+
+    def entries(rows):
+        seen: set[str] = set()
+        while rows:
+            for row in rows:
+                path = _attachment_path(attachments_dir, str(row["storage_path"]))
+                if path is None:
+                    continue
+                name = str(row["filename"]) or "file"
+                if per_request_dirs:
+                    name = f"{int(row['request_id'])}/{name}"
+                yield ZipEntry(
+                    name=unique_name(name, seen, int(row["id"])),
+                    path=path,
+                    size=int(row["size"]),
+                    mtime=int(row["created_at"]),
+                )
+            rows = fetch(int(rows[-1]["id"])) if len(rows) == ARCHIVE_PAGE_SIZE else []
 
-    handler.send_response(HTTPStatus.OK)
-    handler.send_header("Content-Type", ctype)
-    handler.send_header("Content-Length", str(len(data)))
-    handler.send_header("Content-Disposition", f'attachment; filename="{safe}"')
-    handler.end_headers()
-    handler.wfile.write(data)
-    return True
+    def on_missing(entry: ZipEntry) -> None:
+        handler.log_error("archive: attachment file missing: %s", entry.path)
 
+    # Run the first query before committing to a 200 so its errors still get a JSON response.
+    first = fetch(0)
+    out = streaming.begin_stream(
+        handler,
+        HTTPStatus.OK,
+        {"Content-Type": "application/zip", "Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+    try:
+        write_zip(out, entries(first), on_missing=on_missing)
+        out.close()
+    except Exception as e:
+        # Headers are already on the wire: cut the body short so the client sees a truncated
+        # transfer (and a ZIP without its central directory) rather than a silently partial one.
+        handler.close_connection = True
+        if not isinstance(e, (BrokenPipeError, ConnectionResetError)):
+            handler.log_error("archive failed: %r", e)
+
+
+@routes.get("/api/requests/{request_id:int}/attachments.zip")
+def download_request_attachments(handler, query: str, *, request_id: int) -> None:
+    user = handler._require_user()
+    with handler.db_connection() as conn:
+        req = db.get_request(conn, request_id)
+        if not req:
+            handler._send_error(HTTPStatus.NOT_FOUND, "not_found")
+            return
+        if not _can_download(user, req):
+            handler._send_error(HTTPStatus.FORBIDDEN, "not_authorized")
+            return
+    _stream_archive(handler, user, f"request-{request_id}-attachments.zip", per_request_dirs=False, request_id=request_id)
+
+
+@routes.get("/api/attachments.zip")
+def download_attachments_archive(handler, query: str) -> None:
+    """Attachments of every request the user may see, one folder per request id.
+
+    `created_from`/`created_to` (unix seconds, inclusive) select requests by creation time.
+    """
+    user = handler._require_user()
+    params = parse_qs(query or "")
+    bounds: dict[str, int | None] = {}
+    try:
+        for name in ("created_from", "created_to"):
+            value = (params.get(name, [""]) or [""])[0].strip()
+            bounds[name] = int(value) if value else None
+    except ValueError:
+        handler._send_error(HTTPStatus.BAD_REQUEST, "invalid_query")
+        return
+    _stream_archive(handler, user, "attachments.zip", per_request_dirs=True, **bounds)
+
+
+@routes.get("/api/uploads/{upload_id}")
+def get_upload(handler, query: str, *, upload_id: str) -> None:
+    user = handler._require_user()
+    try:
+        with handler.db_connection() as conn:
+            row = get_upload_session(conn, user, upload_id)
+    except FileNotFoundError:
+        handler._send_error(HTTPStatus.NOT_FOUND, "not_found")
+        return
+    handler._send_json(HTTPStatus.OK, session_to_dict(row))
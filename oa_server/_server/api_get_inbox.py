@@ -3,15 +3,15 @@ from __future__ import annotations
 from http import HTTPStatus
 
 from .. import db
+from .router import RouteTable
 from .serializers import row_to_inbox_task
 
+routes = RouteTable()
 
-def try_handle(handler, path: str, query: str) -> bool:
-    if path != "/api/inbox":
-        return False
+
+@routes.get("/api/inbox")
+def list_inbox(handler, query: str) -> None:
     user = handler._require_user()
-    with db.connect(handler.server.db_path) as conn:
+    with handler.db_connection() as conn:
         rows = db.list_inbox_tasks(conn, user_id=user.id, role=user.role)
     handler._send_json(HTTPStatus.OK, {"items": [row_to_inbox_task(r) for r in rows]})
-    return True
-
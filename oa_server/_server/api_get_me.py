@@ -3,15 +3,16 @@ from __future__ import annotations
 from http import HTTPStatus
 
 from .. import db
+from .router import RouteTable
 
+routes = RouteTable()
 
-def try_handle(handler, path: str, query: str) -> bool:
-    if path != "/api/me":
-        return False
 
+@routes.get("/api/me")
+def get_me(handler, query: str) -> None:
     user = handler._require_user()
-    with db.connect(handler.server.db_path) as conn:
-        permissions = ["*"] if user.role == "admin" else db.list_role_permissions(conn, user.role)
+    with handler.db_connection() as conn:
+        permissions = ["*"] if user.role == "admin" else sorted(db.role_permissions(conn, user.role))
     handler._send_json(
         HTTPStatus.OK,
         {
@@ -23,5 +24,3 @@ def try_handle(handler, path: str, query: str) -> bool:
             "permissions": permissions,
         },
     )
-    return True
-
@@ -3,15 +3,15 @@ from __future__ import annotations
 from http import HTTPStatus
 
 from .. import db
+from .router import RouteTable
 from .serializers import row_to_notification
 
+routes = RouteTable()
 
-def try_handle(handler, path: str, query: str) -> bool:
-    if path != "/api/notifications":
-        return False
+
+@routes.get("/api/notifications")
+def list_notifications(handler, query: str) -> None:
     user = handler._require_user()
-    with db.connect(handler.server.db_path) as conn:
+    with handler.db_connection() as conn:
         rows = db.list_notifications(conn, user_id=user.id)
     handler._send_json(HTTPStatus.OK, {"items": [row_to_notification(r) for r in rows]})
-    return True
-
@@ -2,77 +2,177 @@ from __future__ import annotations
 
 import csv
 import io
+import json
 from http import HTTPStatus
 from urllib.parse import parse_qs
 
 from .. import db
-from .ids import parse_request_id
+from . import streaming
+from .jsonutil import json_dumps
+from .router import RouteTable
 from .serializers import row_to_attachment, row_to_event, row_to_request, row_to_task
 
 
-def try_handle(handler, path: str, query: str) -> bool:
-    if path == "/api/requests":
-        user = handler._require_user()
-        params = parse_qs(query or "")
-        scope = (params.get("scope", ["default"]) or ["default"])[0]
-        q = (params.get("q", [""]) or [""])[0].strip()
-        out_format = (params.get("format", ["json"]) or ["json"])[0].strip().lower()
-        with db.connect(handler.server.db_path) as conn:
-            if scope == "all":
-                if user.role != "admin" and not db.role_has_permission(conn, user.role, "requests:read_all"):
-                    raise PermissionError("not_authorized")
-                rows = db.list_requests(conn, user.id, True)
-            elif scope == "mine":
-                rows = db.list_requests(conn, user.id, False)
-            else:
-                rows = db.list_requests(conn, user.id, user.role == "admin")
-        if q:
-            ql = q.lower()
-            rows = [r for r in rows if ql in str(r["title"]).lower() or ql in str(r["body"]).lower()]
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+EXPORT_FORMATS = ("csv", "ndjson")
 
+routes = RouteTable()
+
+
+def _param(params: dict[str, list[str]], name: str) -> str:
+    return (params.get(name, [""]) or [""])[0].strip()
+
+
+def _int_param(params: dict[str, list[str]], name: str) -> int | None:
+    value = _param(params, name)
+    if not value:
+        return None
+    return int(value)
+
+
+def _export_columns(params: dict[str, list[str]]) -> tuple[str, ...]:
+    value = _param(params, "columns")
+    if not value:
+        return db.DEFAULT_EXPORT_COLUMNS
+    columns = tuple(c.strip() for c in value.split(",") if c.strip())
+    if not columns or any(c not in db.EXPORT_COLUMNS for c in columns):
+        raise ValueError("invalid_columns")
+    return columns
+
+
+def _csv_batch(rows: list[tuple]) -> bytes:
+    buf = io.StringIO()
+    csv.writer(buf, lineterminator="\n").writerows(rows)
+    return buf.getvalue().encode("utf-8")
+
+
+def _ndjson_batch(columns: tuple[str, ...], rows: list[tuple]) -> bytes:
+    payload_idx = columns.index("payload") if "payload" in columns else None
+    lines = []
+    for row in rows:
+        item = dict(zip(columns, row))
+        if payload_idx is not None and row[payload_idx] is not None:
+            try:
+                item["payload"] = json.loads(row[payload_idx])
+            except ValueError:
+                item["payload"] = None
+        lines.append(json_dumps(item))
+    lines.append("")
+    return "\n".join(lines).encode("utf-8")
+
+
+def _stream_export(handler, conn, user_id: int, is_admin: bool, out_format: str, columns: tuple[str, ...], filters) -> None:
+    if out_format == "csv":
+        headers = {
+            "Content-Type": "text/csv; charset=utf-8",
+            "Content-Disposition": 'attachment; filename="requests.csv"',
+        }
+    else:
+        headers = {
+            "Content-Type": "application/x-ndjson; charset=utf-8",
+            "Content-Disposition": 'attachment; filename="requests.ndjson"',
+        }
+    # Open the cursor before committing to a 200 so query errors still get a JSON error response.
+    batches = db.iter_request_export(conn, user_id, is_admin, columns=columns, **filters)
+    first = next(batches, None)
+    out = streaming.begin_stream(handler, HTTPStatus.OK, headers)
+    try:
         if out_format == "csv":
-            items = [row_to_request(r) for r in rows]
-            buf = io.StringIO()
-            w = csv.writer(buf, lineterminator="\n")
-            w.writerow(["id", "type", "title", "body", "status", "owner_username", "created_at"])
-            for it in items:
-                w.writerow([it["id"], it["type"], it["title"], it["body"], it["status"], it["owner"]["username"], it["created_at"]])
-            data = buf.getvalue().encode("utf-8")
-            handler.send_response(HTTPStatus.OK)
-            handler.send_header("Content-Type", "text/csv; charset=utf-8")
-            handler.send_header("Content-Length", str(len(data)))
-            handler.send_header("Content-Disposition", 'attachment; filename="requests.csv"')
-            handler.end_headers()
-            handler.wfile.write(data)
-            return True
-
-        handler._send_json(HTTPStatus.OK, {"items": [row_to_request(r) for r in rows]})
-        return True
-
-    if path.startswith("/api/requests/"):
-        user = handler._require_user()
-        request_id = parse_request_id(path, suffix="")
-        with db.connect(handler.server.db_path) as conn:
-            row = db.get_request(conn, request_id)
-            if not row:
-                handler._send_error(HTTPStatus.NOT_FOUND, "not_found")
-                return True
-            if user.role != "admin" and int(row["user_id"]) != user.id:
-                handler._send_error(HTTPStatus.FORBIDDEN, "not_authorized")
-                return True
-            tasks = db.list_request_tasks(conn, request_id)
-            events = db.list_request_events(conn, request_id)
-            attachments = db.list_request_attachments(conn, request_id)
-        handler._send_json(
-            HTTPStatus.OK,
-            {
-                "request": row_to_request(row),
-                "tasks": [row_to_task(t) for t in tasks],
-                "events": [row_to_event(e) for e in events],
-                "attachments": [row_to_attachment(a) for a in attachments],
-            },
-        )
-        return True
-
-    return False
+            out.write(_csv_batch([columns]))
+        batch = first
+        while batch is not None:
+            out.write(_csv_batch(batch) if out_format == "csv" else _ndjson_batch(columns, batch))
+            batch = next(batches, None)
+        out.close()
+    except Exception as e:
+        # Headers are already on the wire: all we can do is cut the body short so the client
+        # sees a truncated transfer rather than a silently incomplete file.
+        batches.close()
+        handler.close_connection = True
+        if not isinstance(e, (BrokenPipeError, ConnectionResetError)):
+            handler.log_error("export failed: %r", e)
+
+
+@routes.get("/api/requests")
+def list_requests(handler, query: str) -> None:
+    user = handler._require_user()
+    params = parse_qs(query or "")
+    scope = _param(params, "scope") or "default"
+    q = _param(params, "q")
+    out_format = (_param(params, "format") or "json").lower()
+    try:
+        limit = _int_param(params, "limit")
+        cursor = _int_param(params, "cursor")
+        created_from = _int_param(params, "created_from")
+        created_to = _int_param(params, "created_to")
+    except ValueError:
+        handler._send_error(HTTPStatus.BAD_REQUEST, "invalid_query")
+        return
+    export = out_format in EXPORT_FORMATS
+    if export:
+        try:
+            columns = _export_columns(params)
+        except ValueError:
+            handler._send_error(HTTPStatus.BAD_REQUEST, "invalid_columns")
+            return
+    else:
+        limit = min(max(1, limit or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE)
+    filters = {
+        "before_id": cursor,
+        "status": _param(params, "status") or None,
+        "request_type": _param(params, "type") or None,
+        "owner": _param(params, "owner") or None,
+        "created_from": created_from,
+        "created_to": created_to,
+        "q": q or None,
+        "rank": bool(q) and _param(params, "sort") == "relevance",
+    }
+    with handler.db_connection() as conn:
+        if scope == "all":
+            if user.role != "admin" and not db.role_has_permission(conn, user.role, "requests:read_all"):
+                raise PermissionError("not_authorized")
+            is_admin = True
+        elif scope == "mine":
+            is_admin = False
+        else:
+            is_admin = user.role == "admin"
+        if export:
+            # Exports cover every matching row and are streamed; only the JSON listing is paged.
+            _stream_export(handler, conn, user.id, is_admin, out_format, columns, filters)
+            return
+        # Fetch one extra row to learn whether another page exists.
+        rows = db.list_requests(conn, user.id, is_admin, limit=limit + 1, **filters)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        # Relevance-ranked results are a single best-`limit` page; the keyset cursor only applies to id order.
+        if not filters["rank"]:
+            next_cursor = str(int(rows[-1]["id"]))
+    handler._send_json(HTTPStatus.OK, {"items": [row_to_request(r) for r in rows], "next_cursor": next_cursor})
+
 
+@routes.get("/api/requests/{request_id:int}")
+def get_request(handler, query: str, *, request_id: int) -> None:
+    user = handler._require_user()
+    with handler.db_connection() as conn:
+        row = db.get_request(conn, request_id)
+        if not row:
+            handler._send_error(HTTPStatus.NOT_FOUND, "not_found")
+            return
+        if user.role != "admin" and int(row["user_id"]) != user.id:
+            handler._send_error(HTTPStatus.FORBIDDEN, "not_authorized")
+            return
+        tasks = db.list_request_tasks(conn, request_id)
+        events = db.list_request_events(conn, request_id)
+        attachments = db.list_request_attachments(conn, request_id)
+    handler._send_json(
+        HTTPStatus.OK,
+        {
+            "request": row_to_request(row),
+            "tasks": [row_to_task(t) for t in tasks],
+            "events": [row_to_event(e) for e in events],
+            "attachments": [row_to_attachment(a) for a in attachments],
+        },
+    )
@@ -3,15 +3,15 @@ from __future__ import annotations
 from http import HTTPStatus
 
 from .. import db
+from .router import RouteTable
 from .serializers import row_to_user
 
+routes = RouteTable()
 
-def try_handle(handler, path: str, query: str) -> bool:
-    if path != "/api/users":
-        return False
+
+@routes.get("/api/users")
+def list_users(handler, query: str) -> None:
     handler._require_permission("users:manage")
-    with db.connect(handler.server.db_path) as conn:
+    with handler.db_connection() as conn:
         rows = db.list_users(conn)
     handler._send_json(HTTPStatus.OK, {"items": [row_to_user(r) for r in rows]})
-    return True
-
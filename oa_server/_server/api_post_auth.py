@@ -4,49 +4,64 @@ import time
 from http import HTTPStatus
 
 from .. import db
-from ..auth import new_session_token, parse_cookie_header, verify_password
+from ..auth import needs_rehash, new_session_token, parse_cookie_header
 from .jsonutil import read_json
+from .router import RouteTable
 from .session import SESSION_COOKIE, SESSION_TTL_SECONDS, build_session_cookie
 
+routes = RouteTable()
 
-def try_handle(handler, path: str, query: str) -> bool:
-    if path == "/api/login":
-        payload = read_json(handler) or {}
-        username = str(payload.get("username", "")).strip()
-        password = str(payload.get("password", ""))
-        if not username or not password:
-            handler._send_error(HTTPStatus.BAD_REQUEST, "missing_credentials")
-            return True
-
-        with db.connect(handler.server.db_path) as conn:
-            user = db.get_user_by_username(conn, username)
-            if not user or not verify_password(password, str(user["password_hash"])):
-                handler._send_error(HTTPStatus.UNAUTHORIZED, "invalid_credentials")
-                return True
-
-            token = new_session_token()
-            expires_at = int(time.time()) + SESSION_TTL_SECONDS
-            db.create_session(conn, token, int(user["id"]), expires_at)
-
-        cookie = build_session_cookie(token)
-        handler._send_json(
-            HTTPStatus.OK,
-            {"id": int(user["id"]), "username": str(user["username"]), "role": str(user["role"])},
-            headers={"Set-Cookie": cookie},
-        )
-        return True
-
-    if path == "/api/logout":
-        cookies = parse_cookie_header(handler.headers.get("Cookie"))
-        token = cookies.get(SESSION_COOKIE)
-        if token:
-            with db.connect(handler.server.db_path) as conn:
-                db.delete_session(conn, token)
-        handler._send_empty(
-            HTTPStatus.NO_CONTENT,
-            headers={"Set-Cookie": build_session_cookie("", expires_immediately=True)},
-        )
-        return True
-
-    return False
 
+@routes.post("/api/login")
+def login(handler, query: str) -> None:
+    payload = read_json(handler) or {}
+    username = str(payload.get("username", "")).strip()
+    password = str(payload.get("password", ""))
+    if not username or not password:
+        handler._send_error(HTTPStatus.BAD_REQUEST, "missing_credentials")
+        return
+
+    with handler.db_connection() as conn:
+        user = db.get_user_by_username(conn, username)
+    # Hashing takes ~0.1 s of CPU; give the pooled connection back first.
+    handler._release_db_connection()
+    verifier = handler.server.password_verifier
+    stored = "" if not user else str(user["password_hash"])
+    if not user or not verifier.verify(password, stored):
+        handler._send_error(HTTPStatus.UNAUTHORIZED, "invalid_credentials")
+        return
+    # The only time the plain password is at hand: move it to the configured scheme and cost.
+    new_hash = None
+    if needs_rehash(stored):
+        try:
+            new_hash = verifier.hash(password)
+        except TimeoutError:
+            pass  # busy: the next login will upgrade it
+
+    with handler.db_connection() as conn:
+        if new_hash is not None:
+            db.replace_password_hash(conn, int(user["id"]), new_hash, old_hash=stored)
+        token = new_session_token()
+        expires_at = int(time.time()) + SESSION_TTL_SECONDS
+        db.create_session(conn, token, int(user["id"]), expires_at)
+
+    cookie = build_session_cookie(token)
+    handler._send_json(
+        HTTPStatus.OK,
+        {"id": int(user["id"]), "username": str(user["username"]), "role": str(user["role"])},
+        headers={"Set-Cookie": cookie},
+    )
+
+
+@routes.post("/api/logout")
+def logout(handler, query: str) -> None:
+    cookies = parse_cookie_header(handler.headers.get("Cookie"))
+    token = cookies.get(SESSION_COOKIE)
+    if token:
+        with handler.db_connection() as conn:
+            db.delete_session(conn, token)
+        handler.server.session_cache.invalidate(token)
+    handler._send_empty(
+        HTTPStatus.NO_CONTENT,
+        headers={"Set-Cookie": build_session_cookie("", expires_immediately=True)},
+    )
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from http import HTTPStatus
+from urllib.parse import parse_qs
+
+from .. import db
+from .jsonutil import read_json
+from .router import RouteTable
+from .upload_sessions import (
+    assemble_upload,
+    commit_chunk,
+    create_upload_session,
+    finalize_upload,
+    get_upload_session,
+    remove_chunks,
+    stage_chunk,
+)
+from .uploads import UPLOAD_CHUNK
+
+routes = RouteTable()
+
+# Resumable uploads: create a session, PUT the file in chunks at increasing offsets (resuming
+# from `GET /api/uploads/{id}`'s offset after a failure), then finalize into an attachment.
+
+
+@routes.post("/api/requests/{request_id:int}/uploads")
+def create_upload(handler, query: str, *, request_id: int) -> None:
+    user = handler._require_user()
+    payload = read_json(handler) or {}
+    filename = str(payload.get("filename", "")).strip()
+    content_type = payload.get("content_type", None)
+    size = payload.get("size", None)
+    sha256 = payload.get("sha256", None)
+    if not filename or size is None:
+        handler._send_error(HTTPStatus.BAD_REQUEST, "missing_fields")
+        return
+    if not isinstance(size, int) or isinstance(size, bool) or size < 0:
+        handler._send_error(HTTPStatus.BAD_REQUEST, "invalid_size")
+        return
+    try:
+        with handler.db_connection() as conn:
+            row = create_upload_session(
+                conn,
+                user=user,
+                request_id=request_id,
+                filename=filename,
+                content_type=None if content_type in (None, "") else str(content_type).strip(),
+                size=size,
+                sha256=None if sha256 in (None, "") else str(sha256).strip().lower(),
+                max_bytes=handler.server.max_upload_bytes,
+            )
+    except ValueError as e:
+        if str(e) == "too_large":
+            handler._send_error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "too_large")
+        else:
+            handler._send_error(HTTPStatus.BAD_REQUEST, str(e))
+        return
+    except FileNotFoundError:
+        handler._send_error(HTTPStatus.NOT_FOUND, "not_found")
+        return
+    except PermissionError:
+        handler._send_error(HTTPStatus.FORBIDDEN, "not_authorized")
+        return
+    handler._send_json(HTTPStatus.CREATED, row)
+
+
+@routes.put("/api/uploads/{upload_id}")
+def put_upload_chunk(handler, query: str, *, upload_id: str) -> None:
+    user = handler._require_user()
+    try:
+        offset = int((parse_qs(query or "").get("offset") or [""])[0])
+    except ValueError:
+        handler._send_error(HTTPStatus.BAD_REQUEST, "invalid_offset")
+        return
+    if handler.headers.get("Transfer-Encoding"):
+        handler._send_error(HTTPStatus.LENGTH_REQUIRED, "length_required")
+        return
+    with handler.db_connection() as conn:
+        row = get_upload_session(conn, user, upload_id)
+    received, size = int(row["received"]), int(row["size"])
+    if offset != received:
+        handler._send_json(HTTPStatus.CONFLICT, {"error": "offset_mismatch", "offset": received})
+        return
+    length = handler._body_left
+    if length == 0:
+        handler._send_error(HTTPStatus.BAD_REQUEST, "empty_chunk")
+        return
+    if offset + length > size:
+        handler._send_error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "too_large")
+        return
+    # The body may take a while on a slow link; do not hold a pooled connection for it.
+    handler._release_db_connection()
+
+    attachments_dir = handler.server.attachments_dir
+    try:
+        tmp = stage_chunk(attachments_dir, handler.iter_body(UPLOAD_CHUNK), max_bytes=length)
+    except ValueError:
+        # Only a dropped connection ends a bounded body early: nobody to answer. The client
+        # loses this chunk only and resumes from `offset`.
+        handler.close_connection = True
+        return
+    try:
+        with handler.db_connection() as conn:
+            new_offset = commit_chunk(conn, attachments_dir, upload_id, tmp, offset=offset)
+            current = None if new_offset is not None else db.get_upload_session(conn, upload_id)
+    finally:
+        tmp.unlink(missing_ok=True)
+    if new_offset is None:
+        if current is None:
+            handler._send_error(HTTPStatus.NOT_FOUND, "not_found")
+            return
+        handler._send_json(HTTPStatus.CONFLICT, {"error": "offset_mismatch", "offset": int(current["received"])})
+        return
+    handler._send_json(HTTPStatus.OK, {"id": upload_id, "offset": new_offset, "size": size})
+
+
+@routes.post("/api/uploads/{upload_id}/finalize")
+def finalize_upload_session(handler, query: str, *, upload_id: str) -> None:
+    user = handler._require_user()
+    with handler.db_connection() as conn:
+        row = get_upload_session(conn, user, upload_id)
+    if int(row["received"]) != int(row["size"]):
+        handler._send_json(HTTPStatus.CONFLICT, {"error": "incomplete", "offset": int(row["received"])})
+        return
+    # Reading the chunks back and hashing them is the slow part; no pooled connection meanwhile.
+    handler._release_db_connection()
+
+    attachments_dir = handler.server.attachments_dir
+    try:
+        staged = assemble_upload(attachments_dir, row)
+    except ValueError as e:
+        # The bytes are not what the client meant to send; resuming cannot fix that.
+        with handler.db_connection() as conn:
+            db.delete_upload_session(conn, upload_id)
+        remove_chunks(attachments_dir, upload_id)
+        handler._send_error(HTTPStatus.BAD_REQUEST, str(e))
+        return
+    try:
+        with handler.db_connection() as conn:
+            created = finalize_upload(conn, attachments_dir, row, staged, user=user)
+    finally:
+        staged.discard()
+    if created is None:
+        handler._send_error(HTTPStatus.NOT_FOUND, "not_found")
+        return
+    remove_chunks(attachments_dir, upload_id)
+    handler._send_json(HTTPStatus.CREATED, created)
+
+
+@routes.post("/api/uploads/{upload_id}/cancel")
+def cancel_upload_session(handler, query: str, *, upload_id: str) -> None:
+    user = handler._require_user()
+    with handler.db_connection() as conn:
+        get_upload_session(conn, user, upload_id)
+        db.delete_upload_session(conn, upload_id)
+    remove_chunks(handler.server.attachments_dir, upload_id)
+    handler._send_json(HTTPStatus.OK, {"ok": True})
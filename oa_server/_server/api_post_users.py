@@ -3,16 +3,15 @@ from __future__ import annotations
 from http import HTTPStatus
 
 from .. import db
-from .ids import parse_user_id
 from .jsonutil import read_json
+from .router import RouteTable
 
+routes = RouteTable()
 
-def try_handle(handler, path: str, query: str) -> bool:
-    if not path.startswith("/api/users/"):
-        return False
 
+@routes.post("/api/users/{user_id:int}")
+def update_user(handler, query: str, *, user_id: int) -> None:
     handler._require_permission("users:manage")
-    user_id = parse_user_id(path, suffix="")
     payload = read_json(handler) or {}
     updates: dict[str, object] = {}
     if "dept" in payload:
@@ -31,26 +30,26 @@ def try_handle(handler, path: str, query: str) -> bool:
         position = payload.get("position")
         updates["position"] = None if position in (None, "") else str(position).strip()
 
-    with db.connect(handler.server.db_path) as conn:
+    with handler.db_connection() as conn:
         if "manager_id" in updates and updates["manager_id"] is not None:
             mgr = db.get_user_by_id(conn, int(updates["manager_id"]))
             if not mgr:
                 handler._send_error(HTTPStatus.BAD_REQUEST, "invalid_manager_id")
-                return True
+                return
         if "role" in updates:
             role_v = updates["role"]
             if role_v is None or not str(role_v).strip():
                 handler._send_error(HTTPStatus.BAD_REQUEST, "invalid_role")
-                return True
+                return
             if not db.role_exists(conn, str(role_v)):
                 handler._send_error(HTTPStatus.BAD_REQUEST, "invalid_role")
-                return True
+                return
         if "dept_id" in updates and updates["dept_id"] is not None:
             if not db.get_department(conn, int(updates["dept_id"])):
                 handler._send_error(HTTPStatus.BAD_REQUEST, "invalid_dept_id")
-                return True
+                return
         db.update_user(conn, user_id, **updates)
+    # After the commit, so a concurrent request cannot re-cache the old row.
+    handler.server.session_cache.invalidate_user(user_id)
 
     handler._send_empty(HTTPStatus.NO_CONTENT)
-    return True
-
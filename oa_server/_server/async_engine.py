@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from .worker_pool import busy_response
+
+# Largest request head (request line + headers) read before the connection is dropped.
+MAX_HEAD = 64 * 1024
+# Response bytes buffered per connection before a write is handed to the event loop.
+WRITE_BUFFER = 64 * 1024
+# On shutdown, how long requests already running on the executor get to finish.
+SHUTDOWN_GRACE = 10.0
+
+
+class _Connection:
+    """Stand-in for the socket a Handler normally owns: the event loop owns timeouts here."""
+
+    def settimeout(self, timeout: float | None) -> None:
+        return
+
+
+class _StreamWriter:
+    """Blocking, buffered `wfile` for a handler running on an executor thread."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, writer: asyncio.StreamWriter):
+        self._loop = loop
+        self._writer = writer
+        self._buf = bytearray()
+        self._queued = 0
+        self._lock = threading.Lock()
+
+    def write(self, data: bytes) -> int:
+        self._buf += data
+        if len(self._buf) >= WRITE_BUFFER:
+            self.flush()
+        return len(data)
+
+    def flush(self) -> None:
+        if not self._buf:
+            return
+        if self._writer.is_closing():
+            raise ConnectionResetError("connection closed")
+        data = bytes(self._buf)
+        self._buf.clear()
+        # Queued in order on the loop without waiting; only block (for backpressure) once the
+        # transport has a few buffers' worth unsent, e.g. a slow client reading an export.
+        # `_queued` counts bytes handed to the loop that have not reached the transport yet:
+        # a busy loop can fall behind, and the transport's own count would not see them.
+        with self._lock:
+            self._queued += len(data)
+        self._loop.call_soon_threadsafe(self._write, data)
+        if self._queued + self._writer.transport.get_write_buffer_size() > 4 * WRITE_BUFFER:
+            asyncio.run_coroutine_threadsafe(self._drain(), self._loop).result()
+
+    def _write(self, data: bytes) -> None:
+        with self._lock:
+            self._queued -= len(data)
+        self._writer.write(data)
+
+    async def _drain(self) -> None:
+        # Scheduled after every pending `_write`, so by now they are all in the transport.
+        await self._writer.drain()
+
+
+class _StreamReader:
+    """Blocking `rfile`: the request head already read by the event loop, then the body from the stream."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, reader: asyncio.StreamReader, wfile: _StreamWriter):
+        self._loop = loop
+        self._reader = reader
+        self._wfile = wfile
+        self._buf = bytearray()
+        self._eof = False
+
+    async def read_head(self) -> bool:
+        """On the loop: buffer up to the end of the next request head. False on EOF/oversized head.
+
+        Bytes a previous request over-read (pipelining, or a discarded body) are used first.
+        """
+        while b"\r\n\r\n" not in self._buf:
+            if len(self._buf) > MAX_HEAD:
+                return False
+            data = await self._reader.read(8192)
+            if not data:
+                # EOF mid-head: let the handler answer whatever arrived (usually nothing, i.e. close).
+                return bool(self._buf)
+            self._buf += data
+        return True
+
+    def _fill(self, want: int = WRITE_BUFFER) -> bool:
+        if self._eof:
+            return False
+        # Send what the handler has written so far (e.g. `100 Continue`) before waiting on the client.
+        self._wfile.flush()
+        data = asyncio.run_coroutine_threadsafe(self._reader.read(max(1, min(want, WRITE_BUFFER))), self._loop).result()
+        if not data:
+            self._eof = True
+            return False
+        self._buf += data
+        return True
+
+    def readline(self, limit: int = -1) -> bytes:
+        while True:
+            end = self._buf.find(b"\n")
+            if end >= 0 and (limit < 0 or end < limit):
+                return self._take(end + 1)
+            if 0 <= limit <= len(self._buf) or not self._fill():
+                return self._take(len(self._buf) if limit < 0 else min(limit, len(self._buf)))
+
+    def read(self, size: int = -1) -> bytes:
+        while (size < 0 or len(self._buf) < size) and self._fill(WRITE_BUFFER if size < 0 else size - len(self._buf)):
+            pass
+        return self._take(len(self._buf) if size < 0 else min(size, len(self._buf)))
+
+    def _take(self, n: int) -> bytes:
+        data = bytes(self._buf[:n])
+        del self._buf[:n]
+        return data
+
+
+class AsyncEngine:
+    """Connection I/O on one asyncio loop; each request runs the regular Handler on a bounded executor.
+
+    Idle keep-alive connections cost a coroutine, not a thread: the loop waits for a request head,
+    and only then is a thread taken for parsing, auth, DB work and the response. Past
+    `threads + max_queue` requests in flight, new ones get the same 503 as the thread pool's.
+    """
+
+    def __init__(self, server, *, threads: int, max_queue: int, retry_after: int = 1):
+        self.server = server
+        self.threads = threads
+        self.max_queue = max_queue
+        self._busy_response = busy_response(retry_after)
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="oa-async")
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stop: asyncio.Event | None = None
+        self._stopped = threading.Event()
+        self._stopped.set()
+        self._busy: set[asyncio.Task] = set()
+        self.connections = 0
+        self.in_flight = 0
+        self.served = 0
+        self.rejected = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "threads": self.threads,
+            "connections": self.connections,
+            "active": min(self.in_flight, self.threads),
+            "waiting": max(0, self.in_flight - self.threads),
+            "max_queue": self.max_queue,
+            "served": self.served,
+            "rejected": self.rejected,
+        }
+
+    def serve_forever(self) -> None:
+        self._stopped.clear()
+        try:
+            asyncio.run(self._serve())
+        finally:
+            self._stopped.set()
+
+    def shutdown(self) -> None:
+        loop, stop = self._loop, self._stop
+        if loop is not None and stop is not None:
+            loop.call_soon_threadsafe(stop.set)
+        self._stopped.wait()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _serve(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        tasks: set[asyncio.Task] = set()
+
+        async def on_connect(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            task = asyncio.current_task()
+            tasks.add(task)
+            try:
+                await self._serve_connection(reader, writer)
+            finally:
+                tasks.discard(task)
+
+        listener = await asyncio.start_server(on_connect, sock=self.server.socket, backlog=self.server.request_queue_size)
+        try:
+            await self._stop.wait()
+        finally:
+            listener.close()
+            # Let running requests finish their response (they see `draining` and close); idle
+            # keep-alive connections are just dropped.
+            for task in tasks - self._busy:
+                task.cancel()
+            if self._busy:
+                await asyncio.wait(set(self._busy), timeout=SHUTDOWN_GRACE)
+            for task in list(tasks):
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._loop = None
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        loop = asyncio.get_running_loop()
+        server = self.server
+        wfile = _StreamWriter(loop, writer)
+        handler = server.RequestHandlerClass.__new__(server.RequestHandlerClass)
+        handler.server = server
+        handler.request = handler.connection = _Connection()
+        handler.client_address = writer.get_extra_info("peername") or ("", 0)
+        handler.wfile = wfile
+        rfile = handler.rfile = _StreamReader(loop, reader, wfile)
+        handler.close_connection = True
+        self.connections += 1
+        try:
+            first = True
+            while True:
+                # Same idle policy as the thread engine: only a kept-alive connection is timed.
+                timeout = None if first else server.keepalive_timeout
+                try:
+                    if not await asyncio.wait_for(rfile.read_head(), timeout):
+                        return
+                except (asyncio.TimeoutError, ConnectionError):
+                    return
+                if self.in_flight >= self.threads + self.max_queue:
+                    self.rejected += 1
+                    writer.write(self._busy_response)
+                    await writer.drain()
+                    return
+                self.in_flight += 1
+                self._busy.add(asyncio.current_task())
+                try:
+                    await loop.run_in_executor(self._executor, self._handle_one, handler)
+                finally:
+                    self._busy.discard(asyncio.current_task())
+                    self.in_flight -= 1
+                    self.served += 1
+                if handler.close_connection:
+                    return
+                first = False
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    @staticmethod
+    def _handle_one(handler) -> None:
+        try:
+            handler.handle_one_request()
+            handler.wfile.flush()
+        except Exception as e:
+            handler.close_connection = True
+            if not isinstance(e, ConnectionError):
+                handler.log_error("request failed: %r", e)
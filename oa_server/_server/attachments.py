@@ -1,12 +1,19 @@
 from __future__ import annotations
 
 import base64
-import uuid
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable
 
 from .. import db
 from ..auth import AuthenticatedUser
+from .blob_store import blob_storage_path, commit_blob
+from .uploads import save_stream
+
+# The base64-in-JSON upload holds the whole file in memory; larger files go through the streaming path.
+MAX_JSON_UPLOAD = 5 * 1024 * 1024
+# Temp files of in-progress uploads, on the same filesystem as their final place so the rename is atomic.
+TMP_DIR = ".tmp"
 
 
 def sanitize_filename(filename: str) -> str:
@@ -23,7 +30,77 @@ def sanitize_filename(filename: str) -> str:
     return (out or "file")[:200]
 
 
+def check_upload_access(conn, user: AuthenticatedUser, request_id: int) -> None:
+    req = db.get_request(conn, request_id)
+    if not req:
+        raise FileNotFoundError("not_found")
+    if user.role != "admin" and int(req["user_id"]) != user.id:
+        raise PermissionError("not_authorized")
+
+
+@dataclass(frozen=True)
+class StagedUpload:
+    """An upload written to a temp file under `attachments_dir/.tmp` and hashed, not stored yet."""
+
+    path: Path
+    size: int
+    sha256: str
+
+    def discard(self) -> None:
+        # After `record_attachment` the temp file is already gone; this only cleans up failures.
+        self.path.unlink(missing_ok=True)
+
+
+def stage_upload(attachments_dir: Path, chunks: Iterable[bytes], *, max_bytes: int) -> StagedUpload:
+    """Stream `chunks` to a temp file next to the blob store, hashing on the way.
+
+    The temp file sits on the same filesystem as the blobs, so storing it is an
+    atomic rename. ValueError("too_large") as soon as `max_bytes` is exceeded.
+    """
+    path, size, digest = save_stream(chunks, attachments_dir / TMP_DIR, max_bytes=max_bytes)
+    return StagedUpload(path=path, size=size, sha256=digest)
+
+
+def record_attachment(
+    conn,
+    attachments_dir: Path,
+    staged: StagedUpload,
+    *,
+    user: AuthenticatedUser,
+    request_id: int,
+    filename: str,
+    content_type: str | None,
+) -> dict[str, Any]:
+    """Insert the attachment row and store its content as a blob; the caller's transaction commits both.
+
+    Identical content is stored once: rows with the same SHA-256 share the file
+    at `blob_storage_path(sha256)`, and a blob is kept while any row references it.
+    """
+    att_id = db.create_attachment(
+        conn,
+        request_id,
+        uploader_user_id=user.id,
+        filename=sanitize_filename(filename),
+        content_type=content_type,
+        size=staged.size,
+        storage_path=blob_storage_path(staged.sha256),
+        sha256=staged.sha256,
+    )
+    # After the INSERT, so this connection holds the write lock that blob GC also takes.
+    commit_blob(attachments_dir, staged.path, staged.sha256)
+    row = db.get_attachment(conn, att_id)
+    return {
+        "id": int(row["id"]),
+        "request_id": int(row["request_id"]),
+        "filename": str(row["filename"]),
+        "content_type": None if row["content_type"] is None else str(row["content_type"]),
+        "size": int(row["size"]),
+        "created_at": int(row["created_at"]),
+    }
+
+
 def create_attachment(
+    conn,
     attachments_dir: Path,
     *,
     user: AuthenticatedUser,
@@ -31,56 +108,25 @@ def create_attachment(
     filename: str,
     content_type: str | None,
     content_base64: str,
-    db_path: Path,
 ) -> dict[str, Any]:
-    with db.connect(db_path) as conn:
-        req = db.get_request(conn, request_id)
-        if not req:
-            raise FileNotFoundError("not_found")
-        if user.role != "admin" and int(req["user_id"]) != user.id:
-            raise PermissionError("not_authorized")
-
-        try:
-            data = base64.b64decode(content_base64.encode("ascii"), validate=True)
-        except Exception:
-            raise ValueError("invalid_payload")
-        if len(data) > 5 * 1024 * 1024:
-            raise ValueError("too_large")
-
-        safe_name = sanitize_filename(filename)
-        req_dir = attachments_dir / str(request_id)
-        req_dir.mkdir(parents=True, exist_ok=True)
-        key = None
-        final = None
-        for _ in range(5):
-            candidate_key = uuid.uuid4().hex
-            candidate_path = req_dir / candidate_key
-            if candidate_path.exists():
-                continue
-            candidate_path.write_bytes(data)
-            key = candidate_key
-            final = candidate_path
-            break
-        if not key or final is None:
-            raise RuntimeError("storage_error")
-
-        storage_path = f"{request_id}/{key}"
-        att_id = db.create_attachment(
+    check_upload_access(conn, user, request_id)
+    try:
+        data = base64.b64decode(content_base64.encode("ascii"), validate=True)
+    except Exception:
+        raise ValueError("invalid_payload")
+    if len(data) > MAX_JSON_UPLOAD:
+        raise ValueError("too_large")
+
+    staged = stage_upload(attachments_dir, [data], max_bytes=MAX_JSON_UPLOAD)
+    try:
+        return record_attachment(
             conn,
-            request_id,
-            uploader_user_id=user.id,
-            filename=safe_name,
+            attachments_dir,
+            staged,
+            user=user,
+            request_id=request_id,
+            filename=filename,
             content_type=content_type,
-            size=len(data),
-            storage_path=storage_path,
         )
-        row = db.get_attachment(conn, att_id)
-        return {
-            "id": int(row["id"]),
-            "request_id": int(row["request_id"]),
-            "filename": str(row["filename"]),
-            "content_type": None if row["content_type"] is None else str(row["content_type"]),
-            "size": int(row["size"]),
-            "created_at": int(row["created_at"]),
-        }
-
+    finally:
+        staged.discard()
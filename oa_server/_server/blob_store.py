@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+
+from .. import db
+
+# Blob files live at `<attachments_dir>/blobs/<first two hex digits>/<sha256>`; the shard level
+# spreads them over 256 directories.
+BLOB_DIR = "blobs"
+# Unreferenced blobs younger than this are left alone: a safety margin for files placed by
+# hand or left by a crash between writing a blob and committing its row.
+BLOB_GRACE = 3600
+
+
+def blob_storage_path(digest: str) -> str:
+    """`attachments.storage_path` (relative to attachments_dir) of the blob with this SHA-256."""
+    return f"{BLOB_DIR}/{digest[:2]}/{digest}"
+
+
+def commit_blob(attachments_dir: Path, tmp: Path, digest: str) -> bool:
+    """Make `tmp` the blob for `digest` unless an identical one is already stored. True if it was new.
+
+    Call it inside the transaction that inserts the referencing row: the INSERT holds
+    SQLite's write lock, which `collect_blobs` also takes, so a blob cannot be collected
+    between this check and the commit. `tmp` is consumed either way.
+    """
+    final = attachments_dir / blob_storage_path(digest)
+    if final.is_file():
+        tmp.unlink(missing_ok=True)
+        return False
+    final.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(tmp, final)
+    return True
+
+
+def collect_blobs(conn, attachments_dir: Path, *, grace: float = BLOB_GRACE, batch: int = 500) -> tuple[int, int]:
+    """Delete blob files no attachment row references and not modified for `grace` seconds: (files, bytes).
+
+    Candidates are checked `batch` at a time, each batch inside one IMMEDIATE
+    transaction so it is serialized with uploads committing a blob.
+    """
+    root = attachments_dir / BLOB_DIR
+    if not root.is_dir():
+        return 0, 0
+    cutoff = time.time() - grace
+    candidates: list[tuple[str, Path]] = []
+    for shard in os.scandir(root):
+        if not shard.is_dir(follow_symlinks=False):
+            continue
+        for entry in os.scandir(shard.path):
+            if entry.is_file(follow_symlinks=False) and entry.stat().st_mtime < cutoff:
+                candidates.append((entry.name, Path(entry.path)))
+    files = freed = 0
+    for i in range(0, len(candidates), batch):
+        chunk = candidates[i : i + batch]
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            referenced = db.referenced_blobs(conn, [digest for digest, _ in chunk])
+            for digest, path in chunk:
+                if digest in referenced:
+                    continue
+                try:
+                    size = path.stat().st_size
+                    path.unlink()
+                except FileNotFoundError:
+                    continue
+                files += 1
+                freed += size
+        finally:
+            conn.commit()
+    return files, freed
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import os
+import stat
+from email.utils import formatdate, parsedate_to_datetime
+from http import HTTPStatus
+from pathlib import Path
+
+from .static_assets import not_modified
+
+
+def file_etag(st: os.stat_result) -> str:
+    # Size + mtime, like nginx: no need to hash a large file to name its version.
+    return f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+
+
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """The (start, end) inclusive byte range a `Range` header asks for, or None to send the whole file.
+
+    Only a single `bytes=` range is honoured; anything else (multiple ranges,
+    other units, malformed) falls back to the full body, which RFC 9110 allows.
+    ValueError("unsatisfiable") when the range lies beyond the end of the file.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = (part.strip() for part in spec.partition("-"))
+    if not sep or not (first or last) or not all(p.isascii() and p.isdigit() for p in (first, last) if p):
+        return None
+    if not first:
+        # Suffix range: the last N bytes.
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise ValueError("unsatisfiable")
+        return max(0, size - suffix), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if last and end < start:
+        return None
+    if start >= size:
+        raise ValueError("unsatisfiable")
+    return start, min(end, size - 1)
+
+
+def if_range_matches(if_range: str | None, etag: str, mtime: int) -> bool:
+    """Whether a Range may be honoured under `If-Range` (strong ETag or exact Last-Modified date)."""
+    if if_range is None:
+        return True
+    value = if_range.strip()
+    if value.startswith(('"', "W/")):
+        return value == etag
+    try:
+        return int(parsedate_to_datetime(value).timestamp()) == mtime
+    except (TypeError, ValueError, OverflowError):
+        return False
+
+
+def send_file(
+    handler, path: Path, *, content_type: str, headers: dict[str, str] | None = None, etag: str | None = None
+) -> None:
+    """Answer a GET with the file at `path`: conditional (ETag / Last-Modified) and range aware.
+
+    `etag` overrides the size + mtime tag, e.g. with a content hash.
+
+    The body goes out through `Handler.send_file_body`, i.e. `sendfile(2)` on a
+    plain socket, so memory use does not depend on the file size.
+    FileNotFoundError when `path` is not a regular file.
+    """
+    try:
+        f = open(path, "rb")
+    except (IsADirectoryError, NotADirectoryError):
+        raise FileNotFoundError(str(path)) from None
+    with f:
+        st = os.fstat(f.fileno())
+        if not stat.S_ISREG(st.st_mode):
+            raise FileNotFoundError(str(path))
+        size = st.st_size
+        etag = etag or file_etag(st)
+        mtime = int(st.st_mtime)
+        common = {
+            "ETag": etag,
+            "Last-Modified": formatdate(st.st_mtime, usegmt=True),
+            "Accept-Ranges": "bytes",
+            # Attachments sit behind a permission check: browsers may keep them, but must ask each time.
+            "Cache-Control": "private, no-cache",
+        }
+        if not_modified(etag, mtime, handler.headers.get("If-None-Match"), handler.headers.get("If-Modified-Since")):
+            handler._send_empty(HTTPStatus.NOT_MODIFIED, common)
+            return
+
+        status, start, end = HTTPStatus.OK, 0, size - 1
+        if if_range_matches(handler.headers.get("If-Range"), etag, mtime):
+            try:
+                byte_range = parse_range(handler.headers.get("Range"), size)
+            except ValueError:
+                handler.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                handler.send_header("Content-Range", f"bytes */{size}")
+                handler.send_header("Content-Length", "0")
+                handler.end_headers()
+                return
+            if byte_range is not None:
+                status, (start, end) = HTTPStatus.PARTIAL_CONTENT, byte_range
+
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(end - start + 1))
+        if status == HTTPStatus.PARTIAL_CONTENT:
+            handler.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        for k, v in {**common, **(headers or {})}.items():
+            handler.send_header(k, v)
+        handler.end_headers()
+        handler.send_file_body(f, start, end - start + 1)
@@ -1,18 +1,31 @@
 from __future__ import annotations
 
 import json
-import mimetypes
+import os
+import socket
+import sqlite3
+import threading
 import time
+from contextlib import contextmanager
 from http import HTTPStatus
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
+from typing import BinaryIO, Iterator
 from urllib.parse import urlparse
 
 from .. import db
 from ..auth import AuthenticatedUser, parse_cookie_header
-from . import api_get, api_post
 from .jsonutil import json_bytes
-from .session import SESSION_COOKIE
+from .maintenance import Maintenance
+from .password_verifier import PasswordVerifier
+from .routes import ROUTER
+from .session import SESSION_COOKIE, SessionCache
+from .static_assets import AssetCache, accepts_gzip, not_modified
+from .async_engine import AsyncEngine
+from .worker_pool import WorkerPool
+
+ENGINES = ("threads", "asyncio")
+SERVER_MODES = ("threads", "pool")
 
 
 class OAHTTPServer(ThreadingHTTPServer):
@@ -23,16 +36,261 @@ class OAHTTPServer(ThreadingHTTPServer):
         db_path: Path,
         frontend_dir: Path,
         attachments_dir: Path | None = None,
+        db_pool_size: int = 8,
+        db_durability: str = db.DEFAULT_DURABILITY,
+        session_cache_size: int = 10_000,
+        session_cache_ttl: float = 60.0,
+        keepalive_timeout: float = 15.0,
+        max_keepalive_requests: int = 100,
+        server_mode: str = "threads",
+        threads: int = 16,
+        max_queue: int = 64,
+        backlog: int = 128,
+        retry_after: int = 1,
+        engine: str = "threads",
+        listen_socket: socket.socket | None = None,
+        session_generation: db.Generation | None = None,
+        login_processes: int = 0,
+        login_concurrency: int = 8,
+        maintenance_interval: float = 300.0,
+        max_sessions_per_user: int = 20,
+        max_upload_bytes: int = 200 * 1024 * 1024,
     ):
-        super().__init__(server_address, RequestHandlerClass)
+        if engine not in ENGINES:
+            raise ValueError(f"unknown engine: {engine}")
+        if server_mode not in SERVER_MODES:
+            raise ValueError(f"unknown server mode: {server_mode}")
+        # listen() backlog; socketserver's default of 5 drops SYNs under the smallest burst.
+        self.request_queue_size = backlog
+        if listen_socket is None:
+            super().__init__(server_address, RequestHandlerClass)
+        else:
+            # Pre-fork worker: serve the supervisor's already-listening socket.
+            super().__init__(server_address, RequestHandlerClass, bind_and_activate=False)
+            self.socket.close()
+            self.socket = listen_socket
+            self.server_address = listen_socket.getsockname()
+            self.server_name, self.server_port = str(self.server_address[0]), int(self.server_address[1])
+        self.keepalive_timeout = keepalive_timeout
+        self.max_keepalive_requests = max_keepalive_requests
+        self.engine = engine
+        self.server_mode = server_mode
+        self.worker_pool: WorkerPool | None = None
+        self.async_engine: AsyncEngine | None = None
+        if engine == "asyncio":
+            # asyncio owns accept and connection I/O; `server_mode` does not apply.
+            self.async_engine = AsyncEngine(self, threads=threads, max_queue=max_queue, retry_after=retry_after)
+        elif server_mode == "pool":
+            # `process_request_thread` is ThreadingMixIn's per-connection body (handle, then close).
+            self.worker_pool = WorkerPool(self.process_request_thread, threads=threads, max_queue=max_queue, retry_after=retry_after)
         self.db_path = db_path
+        self.db_pool = db.ConnectionPool(db_path, max_size=db_pool_size, durability=db_durability)
+        self.session_cache = SessionCache(max_size=session_cache_size, ttl=session_cache_ttl, generation=session_generation)
+        self.password_verifier = PasswordVerifier(processes=login_processes, max_concurrent=login_concurrency)
         self.frontend_dir = frontend_dir
+        self.static_assets = AssetCache(frontend_dir)
         self.attachments_dir = attachments_dir or (db_path.parent / "attachments")
         self.attachments_dir.mkdir(parents=True, exist_ok=True)
+        self.max_upload_bytes = max_upload_bytes
+        # Set while shutting down: responses carry `Connection: close` and `drain` waits on `_in_flight`.
+        self.draining = False
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
+        self.maintenance = Maintenance(self, interval=maintenance_interval, max_sessions_per_user=max_sessions_per_user)
+        self.maintenance.start()
+
+    def serve_forever(self, poll_interval: float = 0.5) -> None:
+        if self.async_engine is None:
+            super().serve_forever(poll_interval)
+            return
+        self.async_engine.serve_forever()
+
+    def shutdown(self) -> None:
+        self.draining = True
+        if self.async_engine is None:
+            super().shutdown()
+            return
+        self.async_engine.shutdown()
+
+    def process_request(self, request, client_address) -> None:
+        if self.worker_pool is None:
+            super().process_request(request, client_address)
+            return
+        self.worker_pool.submit(request, client_address)
+
+    def request_started(self) -> None:
+        with self._in_flight_lock:
+            self._in_flight += 1
+
+    def request_finished(self) -> None:
+        with self._in_flight_lock:
+            self._in_flight -= 1
+
+    def drain(self, timeout: float) -> bool:
+        """After `shutdown`: wait up to `timeout` seconds for requests being handled. True once none are left."""
+        deadline = time.monotonic() + timeout
+        while self._in_flight > 0:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def connections_waiting(self) -> bool:
+        """True when accepted connections are queued for a pool worker (never in thread mode)."""
+        return self.worker_pool is not None and self.worker_pool.waiting() > 0
+
+    def http_stats(self) -> dict:
+        # `pid` tells pre-fork workers apart; each reports only its own counters.
+        if self.async_engine is not None:
+            return {"mode": "asyncio", "pid": os.getpid(), **self.async_engine.stats()}
+        if self.worker_pool is None:
+            return {"mode": self.server_mode, "pid": os.getpid()}
+        return {"mode": self.server_mode, "pid": os.getpid(), **self.worker_pool.stats()}
+
+    def server_close(self) -> None:
+        super().server_close()
+        if self.worker_pool is not None:
+            self.worker_pool.close()
+        if self.async_engine is not None:
+            self.async_engine.close()
+        self.password_verifier.close()
+        self.maintenance.stop()
+        self.db_pool.close()
+
+
+# Unread request bytes we are willing to read and discard to keep a connection reusable; past this we close it.
+MAX_DISCARD_BODY = 64 * 1024
+# Read size when a file body cannot go out through sendfile.
+FILE_CHUNK = 64 * 1024
 
 
 class Handler(BaseHTTPRequestHandler):
     server: OAHTTPServer  # type: ignore[assignment]
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; with Nagle on, a reused connection stalls each
+    # response on the client's delayed ACK (~40 ms).
+    disable_nagle_algorithm = True
+    _db_conn: sqlite3.Connection | None = None
+    _requests_on_connection = 0
+    _body_left = 0
+    _in_request = False
+
+    def handle_one_request(self) -> None:
+        # Between requests on a kept-alive connection only wait `keepalive_timeout` for the next
+        # request line; the base class turns the socket timeout into close_connection.
+        if self._requests_on_connection:
+            self.connection.settimeout(self.server.keepalive_timeout)
+        try:
+            super().handle_one_request()
+        finally:
+            if self._in_request:
+                self._in_request = False
+                self.server.request_finished()
+        self._requests_on_connection += 1
+        if not self.close_connection and self._body_left:
+            self._discard_request_body()
+
+    def parse_request(self) -> bool:
+        if not super().parse_request():
+            return False
+        self._in_request = True
+        self.server.request_started()
+        self.connection.settimeout(self.timeout)
+        self._body_left = 0
+        if self.headers.get("Transfer-Encoding"):
+            # Chunked request bodies are not supported; without a length we cannot find the next request.
+            self.close_connection = True
+            return True
+        try:
+            self._body_left = max(0, int(self.headers.get("Content-Length", "0")))
+        except ValueError:
+            self.close_connection = True
+        return True
+
+    def end_headers(self) -> None:
+        if not self.close_connection:
+            limit = self.server.max_keepalive_requests
+            # In pool mode a kept-alive connection pins a worker while idle; give it up when others wait.
+            if (
+                self._requests_on_connection + 1 >= limit
+                or self._body_left > MAX_DISCARD_BODY
+                or self.server.connections_waiting()
+                or self.server.draining
+            ):
+                self.send_header("Connection", "close")
+            elif self.request_version == "HTTP/1.0":
+                self.send_header("Connection", "keep-alive")
+        super().end_headers()
+
+    def read_body(self) -> bytes:
+        """The request body (per Content-Length); each byte is read at most once."""
+        length, self._body_left = self._body_left, 0
+        return self.rfile.read(length) if length > 0 else b""
+
+    def iter_body(self, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """The request body in chunks of at most `chunk_size`, for bodies too large to hold in memory.
+
+        ValueError("incomplete_body") when the client disconnects before Content-Length bytes arrive.
+        """
+        while self._body_left > 0:
+            chunk = self.rfile.read(min(chunk_size, self._body_left))
+            if not chunk:
+                self._body_left = 0
+                self.close_connection = True
+                raise ValueError("incomplete_body")
+            self._body_left -= len(chunk)
+            yield chunk
+
+    def send_file_body(self, f: BinaryIO, offset: int, count: int) -> None:
+        """Write `count` bytes of `f` from `offset` as the response body (after `end_headers`).
+
+        On a real socket this is `socket.sendfile`, i.e. `sendfile(2)`: the kernel copies from the
+        page cache and nothing passes through Python. The asyncio engine has no socket to hand over,
+        so it gets bounded reads into `wfile` instead.
+        """
+        if count <= 0:
+            return
+        if isinstance(self.connection, socket.socket):
+            self.wfile.flush()
+            self.connection.sendfile(f, offset, count)
+            return
+        f.seek(offset)
+        while count > 0:
+            chunk = f.read(min(FILE_CHUNK, count))
+            if not chunk:
+                # The file shrank under us; the client will see a short body and drop the connection.
+                self.close_connection = True
+                return
+            self.wfile.write(chunk)
+            count -= len(chunk)
+
+    def _discard_request_body(self) -> None:
+        # A handler that answered without reading the body (404, auth failure, ...) would otherwise
+        # leave it to be parsed as the next request line.
+        if self._body_left > MAX_DISCARD_BODY:
+            self.close_connection = True
+            return
+        self.read_body()
+
+    @contextmanager
+    def db_connection(self) -> Iterator[sqlite3.Connection]:
+        # One pooled connection per HTTP request, shared by auth checks and the handler body.
+        if self._db_conn is None:
+            self._db_conn = self.server.db_pool.acquire()
+        conn = self._db_conn
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def _release_db_connection(self) -> None:
+        conn = self._db_conn
+        if conn is None:
+            return
+        self._db_conn = None
+        self.server.db_pool.release(conn)
 
     def _send_json(self, status: int, payload, headers: dict[str, str] | None = None) -> None:
         body = json_bytes(payload)
@@ -47,6 +305,9 @@ class Handler(BaseHTTPRequestHandler):
 
     def _send_empty(self, status: int, headers: dict[str, str] | None = None) -> None:
         self.send_response(status)
+        if status not in (HTTPStatus.NO_CONTENT, HTTPStatus.NOT_MODIFIED):
+            # Keep-alive clients need an explicit empty body; 204/304 must not carry the header.
+            self.send_header("Content-Length", "0")
         if headers:
             for k, v in headers.items():
                 self.send_header(k, v)
@@ -62,20 +323,26 @@ class Handler(BaseHTTPRequestHandler):
             return None
 
         now = int(time.time())
-        with db.connect(self.server.db_path) as conn:
+        cache = self.server.session_cache
+        user = cache.get(token, now)
+        if user is not None:
+            return user
+        with self.db_connection() as conn:
             row = db.get_session_with_user(conn, token)
             if not row:
                 return None
             if int(row["expires_at"]) <= now:
                 db.delete_session(conn, token)
                 return None
-            return AuthenticatedUser(
+            user = AuthenticatedUser(
                 id=int(row["user_id"]),
                 username=str(row["username"]),
                 role=str(row["role"]),
                 dept=None if row["dept"] is None else str(row["dept"]),
                 manager_id=None if row["manager_id"] is None else int(row["manager_id"]),
             )
+        cache.put(token, user, int(row["expires_at"]))
+        return user
 
     def _require_user(self) -> AuthenticatedUser:
         user = self._get_current_user()
@@ -93,7 +360,7 @@ class Handler(BaseHTTPRequestHandler):
         user = self._require_user()
         if user.role == "admin":
             return user
-        with db.connect(self.server.db_path) as conn:
+        with self.db_connection() as conn:
             if not db.role_has_permission(conn, user.role, permission_key):
                 raise PermissionError("not_authorized")
         return user
@@ -101,20 +368,40 @@ class Handler(BaseHTTPRequestHandler):
     def do_GET(self) -> None:
         parsed = urlparse(self.path)
         if parsed.path.startswith("/api/"):
-            self._handle_api_get(parsed.path, parsed.query)
+            try:
+                self._handle_api_get(parsed.path, parsed.query)
+            finally:
+                self._release_db_connection()
             return
         self._handle_static_get(parsed.path)
 
     def do_POST(self) -> None:
+        self._handle_api_write("POST")
+
+    def do_PUT(self) -> None:
+        self._handle_api_write("PUT")
+
+    def _handle_api_write(self, method: str) -> None:
         parsed = urlparse(self.path)
         if not parsed.path.startswith("/api/"):
             self._send_error(HTTPStatus.NOT_FOUND, "not_found")
             return
-        self._handle_api_post(parsed.path, parsed.query)
+        try:
+            self._handle_api_post(parsed.path, parsed.query, method)
+        finally:
+            self._release_db_connection()
+
+    def _dispatch(self, method: str, path: str, query: str) -> bool:
+        match = ROUTER.resolve(method, path)
+        if match is None:
+            return False
+        fn, params = match
+        fn(self, query, **params)
+        return True
 
     def _handle_api_get(self, path: str, query: str) -> None:
         try:
-            if api_get.handle(self, path, query):
+            if self._dispatch("GET", path, query):
                 return
             self._send_error(HTTPStatus.NOT_FOUND, "not_found")
         except PermissionError as e:
@@ -125,12 +412,14 @@ class Handler(BaseHTTPRequestHandler):
             self._send_error(HTTPStatus.FORBIDDEN, "not_authorized")
         except ValueError:
             self._send_error(HTTPStatus.BAD_REQUEST, "invalid_id")
+        except TimeoutError:
+            self._send_error(HTTPStatus.SERVICE_UNAVAILABLE, "busy")
         except Exception:
             self._send_error(HTTPStatus.INTERNAL_SERVER_ERROR, "internal_error")
 
-    def _handle_api_post(self, path: str, query: str) -> None:
+    def _handle_api_post(self, path: str, query: str, method: str = "POST") -> None:
         try:
-            if api_post.handle(self, path, query):
+            if self._dispatch(method, path, query):
                 return
             self._send_error(HTTPStatus.NOT_FOUND, "not_found")
         except json.JSONDecodeError:
@@ -153,31 +442,41 @@ class Handler(BaseHTTPRequestHandler):
                 self._send_error(HTTPStatus.UNAUTHORIZED, "not_authenticated")
                 return
             self._send_error(HTTPStatus.FORBIDDEN, "not_authorized")
+        except TimeoutError:
+            self._send_error(HTTPStatus.SERVICE_UNAVAILABLE, "busy")
         except Exception:
             self._send_error(HTTPStatus.INTERNAL_SERVER_ERROR, "internal_error")
 
     def _handle_static_get(self, path: str) -> None:
         if path in ("", "/"):
             path = "/index.html"
-
-        rel = path.lstrip("/")
-        candidate = (self.server.frontend_dir / rel).resolve()
-        base = self.server.frontend_dir.resolve()
-        if base not in candidate.parents and candidate != base:
+        try:
+            asset = self.server.static_assets.get(path)
+        except PermissionError:
             self._send_error(HTTPStatus.FORBIDDEN, "forbidden")
             return
-        if not candidate.exists() or not candidate.is_file():
+        if asset is None:
             self._send_error(HTTPStatus.NOT_FOUND, "not_found")
             return
 
-        ctype, _ = mimetypes.guess_type(str(candidate))
-        if not ctype:
-            ctype = "application/octet-stream"
+        use_gzip = asset.gzip_body is not None and accepts_gzip(self.headers.get("Accept-Encoding"))
+        etag = asset.gzip_etag if use_gzip else asset.etag
+        # No fingerprinted file names, so browsers must revalidate; a match costs a bodiless 304.
+        headers = {"ETag": etag, "Last-Modified": asset.last_modified, "Cache-Control": "no-cache"}
+        if asset.gzip_body is not None:
+            headers["Vary"] = "Accept-Encoding"
+        if not_modified(etag, asset.mtime, self.headers.get("If-None-Match"), self.headers.get("If-Modified-Since")):
+            self._send_empty(HTTPStatus.NOT_MODIFIED, headers)
+            return
 
-        data = candidate.read_bytes()
+        data = asset.gzip_body if use_gzip else asset.body
         self.send_response(HTTPStatus.OK)
-        self.send_header("Content-Type", f"{ctype}; charset=utf-8" if ctype.startswith("text/") else ctype)
+        self.send_header("Content-Type", asset.content_type)
         self.send_header("Content-Length", str(len(data)))
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        for k, v in headers.items():
+            self.send_header(k, v)
         self.end_headers()
         self.wfile.write(data)
 
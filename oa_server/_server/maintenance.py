@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import TYPE_CHECKING, Any
+
+from .. import db
+from .blob_store import BLOB_GRACE, collect_blobs
+from .upload_sessions import sweep_uploads
+
+if TYPE_CHECKING:
+    from .http_server import OAHTTPServer
+
+# Rows deleted per transaction, so a large backlog never holds the write lock for long.
+SWEEP_BATCH = 500
+
+
+class Maintenance:
+    """Background housekeeping thread for one `OAHTTPServer`.
+
+    Every `interval` seconds it deletes expired sessions in batches of SWEEP_BATCH
+    (each its own short transaction) and trims each user's sessions to the newest
+    `max_sessions_per_user`, dropping trimmed tokens from the session cache.
+    It then expires abandoned resumable uploads (and their chunks), removes stale
+    upload temp files, and deletes attachment blobs that no row references any
+    more and that are older than `blob_grace` seconds. Without it, an expired session is only deleted when its token is presented
+    again, so the sessions table only grows. `interval <= 0` disables the thread;
+    `run_once` still works (tests, admin tooling).
+    """
+
+    def __init__(
+        self,
+        server: OAHTTPServer,
+        *,
+        interval: float = 300.0,
+        max_sessions_per_user: int = 20,
+        blob_grace: float = BLOB_GRACE,
+    ):
+        self.server = server
+        self.interval = interval
+        self.max_sessions_per_user = max(0, int(max_sessions_per_user))
+        self.blob_grace = blob_grace
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.sessions_expired = 0
+        self.sessions_trimmed = 0
+        self.uploads_expired = 0
+        self.stale_files_removed = 0
+        self.blobs_collected = 0
+        self.blob_bytes_freed = 0
+        self.last_run_at: int | None = None
+        self.last_duration_ms: float | None = None
+        self.last_error: str | None = None
+
+    def start(self) -> None:
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name="oa-maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:  # keep sweeping; the next run may succeed (e.g. pool busy)
+                with self._lock:
+                    self.last_error = repr(e)
+
+    def run_once(self) -> dict[str, int]:
+        started = time.perf_counter()
+        now = int(time.time())
+        expired = 0
+        while not self._stop.is_set():
+            with self.server.db_pool.connection() as conn:
+                deleted = db.delete_expired_sessions(conn, now, limit=SWEEP_BATCH)
+            expired += deleted
+            if deleted < SWEEP_BATCH:
+                break
+        trimmed = 0
+        if self.max_sessions_per_user:
+            while not self._stop.is_set():
+                with self.server.db_pool.connection() as conn:
+                    tokens = db.trim_user_sessions(conn, self.max_sessions_per_user, limit=SWEEP_BATCH)
+                # After the commit, like the other invalidations.
+                self.server.session_cache.invalidate_many(tokens)
+                trimmed += len(tokens)
+                if len(tokens) < SWEEP_BATCH:
+                    break
+        uploads = stale = blobs = freed = 0
+        if not self._stop.is_set():
+            uploads, stale = sweep_uploads(self.server.db_pool, self.server.attachments_dir, now=now, batch=SWEEP_BATCH)
+        if not self._stop.is_set():
+            with self.server.db_pool.connection() as conn:
+                blobs, freed = collect_blobs(conn, self.server.attachments_dir, grace=self.blob_grace, batch=SWEEP_BATCH)
+        with self._lock:
+            self.runs += 1
+            self.sessions_expired += expired
+            self.sessions_trimmed += trimmed
+            self.uploads_expired += uploads
+            self.stale_files_removed += stale
+            self.blobs_collected += blobs
+            self.blob_bytes_freed += freed
+            self.last_run_at = now
+            self.last_duration_ms = round((time.perf_counter() - started) * 1000, 3)
+            self.last_error = None
+        return {"sessions_expired": expired, "sessions_trimmed": trimmed, "uploads_expired": uploads, "blobs_collected": blobs}
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "interval": self.interval,
+                "max_sessions_per_user": self.max_sessions_per_user,
+                "runs": self.runs,
+                "sessions_expired": self.sessions_expired,
+                "sessions_trimmed": self.sessions_trimmed,
+                "uploads_expired": self.uploads_expired,
+                "stale_files_removed": self.stale_files_removed,
+                "blobs_collected": self.blobs_collected,
+                "blob_bytes_freed": self.blob_bytes_freed,
+                "last_run_at": self.last_run_at,
+                "last_duration_ms": self.last_duration_ms,
+                "last_error": self.last_error,
+            }
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from ..auth import hash_password, password_hasher, verify_password
+
+
+class PasswordVerifier:
+    """Runs login password checks and re-hashes (~0.1 s of CPU each at the default cost).
+
+    With `processes > 0` the hash runs on a dedicated process pool so a login
+    storm cannot starve the request threads; with 0 it runs on the request thread.
+    At most `max_concurrent` checks run or wait for the pool at once; a login
+    that gets no slot within `wait` seconds raises TimeoutError (503 busy)
+    rather than queueing behind a burst it cannot beat.
+    """
+
+    def __init__(self, *, processes: int = 0, max_concurrent: int = 8, wait: float = 5.0):
+        self.processes = max(0, int(processes))
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.wait = wait
+        self._slots = threading.BoundedSemaphore(self.max_concurrent)
+        self._lock = threading.Lock()
+        self._executor: ProcessPoolExecutor | None = None
+        self.active = 0
+        self.hashed = 0
+        self.rejected = 0
+
+    def verify(self, password: str, stored: str) -> bool:
+        return self._run(verify_password, password, stored)
+
+    def hash(self, password: str) -> str:
+        """A new hash with the configured hasher (passed explicitly: pool processes do not share it)."""
+        return self._run(hash_password, password, password_hasher())
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.wait):
+            with self._lock:
+                self.rejected += 1
+            raise TimeoutError("login_busy")
+        with self._lock:
+            self.active += 1
+        try:
+            if not self.processes:
+                return fn(*args)
+            return self._pool().submit(fn, *args).result()
+        except BrokenProcessPool:
+            # A pool process died (OOM killer, ...): start a fresh pool for the next login.
+            with self._lock:
+                self._executor = None
+            raise
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.hashed += 1
+            self._slots.release()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn, not fork: the server process has threads (and maybe open SQLite handles).
+                self._executor = ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "processes": self.processes,
+                "max_concurrent": self.max_concurrent,
+                "active": self.active,
+                "hashed": self.hashed,
+                "rejected": self.rejected,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    from .http_server import OAHTTPServer
+
+# A worker that exits sooner than this after starting counts as crash-looping; its restarts back off.
+MIN_UPTIME = 5.0
+MAX_RESTART_DELAY = 30.0
+# How often a worker checks that its supervisor is still alive.
+PARENT_CHECK_INTERVAL = 1.0
+
+
+def listen_socket(host: str, port: int, *, backlog: int) -> socket.socket:
+    """The socket every worker accepts on; non-blocking, so a worker that loses the accept race moves on."""
+    sock = socket.create_server((host, port), backlog=backlog)
+    sock.setblocking(False)
+    return sock
+
+
+class Supervisor:
+    """Pre-forks `workers` server processes that all accept on one inherited listening socket.
+
+    Each worker builds its own server with `make_server()` after the fork, so the DB
+    pool, caches and threads are per process; nothing that holds an SQLite connection
+    or a thread may exist in the supervisor before `run`. A worker that exits is
+    restarted (with back-off when it keeps crashing on start). SIGTERM / SIGINT stop
+    the workers: each stops accepting, finishes the requests it is handling (up to
+    `shutdown_timeout` seconds) and exits; stragglers are then killed.
+    """
+
+    def __init__(
+        self,
+        sock: socket.socket,
+        make_server: Callable[[], OAHTTPServer],
+        *,
+        workers: int,
+        shutdown_timeout: float = 10.0,
+    ):
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        self.sock = sock
+        self.make_server = make_server
+        self.workers = workers
+        self.shutdown_timeout = shutdown_timeout
+        self._pids: dict[int, int] = {}
+        self._started: dict[int, float] = {}
+        self._delays: dict[int, float] = {}
+        self._pending: dict[int, float] = {}
+        self._stopping = False
+
+    def run(self) -> None:
+        previous = {sig: signal.signal(sig, self._on_signal) for sig in (signal.SIGTERM, signal.SIGINT)}
+        try:
+            for slot in range(self.workers):
+                self._spawn(slot)
+            while not self._stopping:
+                self._reap()
+                now = time.monotonic()
+                for slot, due in list(self._pending.items()):
+                    if due <= now:
+                        del self._pending[slot]
+                        self._spawn(slot)
+                time.sleep(0.2)
+            self._stop_workers()
+        finally:
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
+            self.sock.close()
+
+    def _on_signal(self, signum, frame) -> None:
+        self._stopping = True
+
+    def _spawn(self, slot: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                code = _run_worker(self.make_server, os.getppid(), self.shutdown_timeout)
+            except BaseException:
+                traceback.print_exc()
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(code)
+        self._pids[pid] = slot
+        self._started[slot] = time.monotonic()
+
+    def _reap(self) -> None:
+        while self._pids:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            slot = self._pids.pop(pid, None)
+            if slot is None or self._stopping:
+                continue
+            uptime = time.monotonic() - self._started[slot]
+            delay = 0.0
+            if uptime < MIN_UPTIME:
+                delay = min(MAX_RESTART_DELAY, max(0.5, 2 * self._delays.get(slot, 0.0)))
+            self._delays[slot] = delay
+            print(f"worker {pid} exited ({_describe(status)}); restarting in {delay:.1f}s", file=sys.stderr, flush=True)
+            self._pending[slot] = time.monotonic() + delay
+
+    def _stop_workers(self) -> None:
+        for pid in self._pids:
+            _kill(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.shutdown_timeout + 1.0
+        while self._pids and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.05)
+        for pid in self._pids:
+            _kill(pid, signal.SIGKILL)
+        while self._pids:
+            pid, _ = os.waitpid(-1, 0)
+            self._pids.pop(pid, None)
+
+
+def _run_worker(make_server: Callable[[], OAHTTPServer], parent_pid: int, shutdown_timeout: float) -> int:
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, signal.SIG_DFL)
+    httpd = make_server()
+    stopping = threading.Event()
+
+    def stop(*_) -> None:
+        if stopping.is_set():
+            return
+        stopping.set()
+        # `shutdown` waits for `serve_forever` to return, so it cannot run on the thread serving.
+        threading.Thread(target=httpd.shutdown, daemon=True).start()
+
+    def watch_parent() -> None:
+        while not stopping.wait(PARENT_CHECK_INTERVAL):
+            if os.getppid() != parent_pid:
+                stop()
+
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, stop)
+    threading.Thread(target=watch_parent, name="oa-parent-watch", daemon=True).start()
+    try:
+        httpd.serve_forever()
+        httpd.drain(shutdown_timeout)
+    finally:
+        httpd.server_close()
+    return 0
+
+
+def _kill(pid: int, sig: int) -> None:
+    try:
+        os.kill(pid, sig)
+    except ProcessLookupError:
+        pass
+
+
+def _describe(status: int) -> str:
+    if os.WIFSIGNALED(status):
+        return f"signal {os.WTERMSIG(status)}"
+    return f"exit {os.waitstatus_to_exitcode(status)}"
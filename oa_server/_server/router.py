@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+RouteFn = Callable[..., None]
+
+# `{name}` matches one path segment as text, `{name:int}` as an int (a non-numeric segment is a 400 invalid_id,
+# as the old `parse_*_id` helpers made it).
+CONVERTERS: dict[str, Callable[[str], Any]] = {"str": str, "int": int}
+
+
+class RouteTable:
+    """Routes declared by one `api_*` module, merged into the server's Router by `routes.py`."""
+
+    def __init__(self) -> None:
+        self.routes: list[tuple[str, str, RouteFn]] = []
+
+    def route(self, method: str, pattern: str) -> Callable[[RouteFn], RouteFn]:
+        def register(fn: RouteFn) -> RouteFn:
+            self.routes.append((method, pattern, fn))
+            return fn
+
+        return register
+
+    def get(self, pattern: str) -> Callable[[RouteFn], RouteFn]:
+        return self.route("GET", pattern)
+
+    def post(self, pattern: str) -> Callable[[RouteFn], RouteFn]:
+        return self.route("POST", pattern)
+
+    def put(self, pattern: str) -> Callable[[RouteFn], RouteFn]:
+        return self.route("PUT", pattern)
+
+
+@dataclass
+class _Node:
+    children: dict[str, _Node] = field(default_factory=dict)
+    param: tuple[str, Callable[[str], Any], _Node] | None = None
+    handlers: dict[str, RouteFn] = field(default_factory=dict)
+
+
+class Router:
+    """Method + path dispatch: one dict lookup for static paths, a segment trie for parameterised ones.
+
+    Lookup cost depends on the path depth, not on how many endpoints are registered. A static segment
+    wins over a parameter at the same position, so `/api/admin/workflows/delete` and
+    `/api/admin/workflows/{workflow_key}` can coexist in any registration order.
+    """
+
+    def __init__(self) -> None:
+        self._static: dict[tuple[str, str], RouteFn] = {}
+        self._root = _Node()
+
+    def add(self, method: str, pattern: str, fn: RouteFn) -> None:
+        if not pattern.startswith("/"):
+            raise ValueError(f"route must start with '/': {pattern!r}")
+        if "{" not in pattern:
+            if (method, pattern) in self._static:
+                raise ValueError(f"duplicate route: {method} {pattern}")
+            self._static[(method, pattern)] = fn
+            return
+        node = self._root
+        for seg in pattern[1:].split("/"):
+            if seg.startswith("{") and seg.endswith("}"):
+                name, _, conv = seg[1:-1].partition(":")
+                converter = CONVERTERS[conv or "str"]
+                if node.param is None:
+                    node.param = (name, converter, _Node())
+                elif node.param[:2] != (name, converter):
+                    raise ValueError(f"conflicting parameter in route: {pattern}")
+                node = node.param[2]
+            else:
+                node = node.children.setdefault(seg, _Node())
+        if method in node.handlers:
+            raise ValueError(f"duplicate route: {method} {pattern}")
+        node.handlers[method] = fn
+
+    def include(self, table: RouteTable) -> None:
+        for method, pattern, fn in table.routes:
+            self.add(method, pattern, fn)
+
+    def resolve(self, method: str, path: str) -> tuple[RouteFn, dict[str, Any]] | None:
+        """Handler and converted path params for `path`, or None (404).
+
+        Raises ValueError("invalid_id") when a typed parameter does not convert.
+        """
+        fn = self._static.get((method, path))
+        if fn is not None:
+            return fn, {}
+        segs = path[1:].split("/")
+        node = self._root
+        i = 0
+        params: list[tuple[tuple[str, Callable[[str], Any], _Node], str]] = []
+        # (param branch, segment index, len(params)) to retry when the static branch dead-ends.
+        fallbacks: list[tuple[tuple[str, Callable[[str], Any], _Node], int, int]] = []
+        while True:
+            if i == len(segs):
+                fn = node.handlers.get(method)
+                if fn is not None:
+                    break
+            else:
+                seg = segs[i]
+                param = node.param if seg else None
+                child = node.children.get(seg)
+                if child is not None:
+                    if param is not None:
+                        fallbacks.append((param, i, len(params)))
+                    node = child
+                    i += 1
+                    continue
+                if param is not None:
+                    params.append((param, seg))
+                    node = param[2]
+                    i += 1
+                    continue
+            if not fallbacks:
+                return None
+            param, i, depth = fallbacks.pop()
+            del params[depth:]
+            params.append((param, segs[i]))
+            node = param[2]
+            i += 1
+        try:
+            return fn, {name: converter(value) for (name, converter, _), value in params}
+        except ValueError:
+            raise ValueError("invalid_id") from None
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from . import (
+    api_get_admin,
+    api_get_attachments,
+    api_get_inbox,
+    api_get_me,
+    api_get_notifications,
+    api_get_requests,
+    api_get_users,
+    api_get_workflows,
+    api_post_admin,
+    api_post_auth,
+    api_post_delegation,
+    api_post_notifications,
+    api_post_requests,
+    api_post_tasks,
+    api_post_uploads,
+    api_post_users,
+)
+from .router import Router
+
+
+def build_router() -> Router:
+    router = Router()
+    for mod in (
+        api_get_me,
+        api_get_workflows,
+        api_get_admin,
+        api_get_requests,
+        api_get_inbox,
+        api_get_notifications,
+        api_get_attachments,
+        api_get_users,
+        api_post_auth,
+        api_post_delegation,
+        api_post_requests,
+        api_post_uploads,
+        api_post_tasks,
+        api_post_notifications,
+        api_post_users,
+        api_post_admin,
+    ):
+        router.include(mod.routes)
+    return router
+
+
+ROUTER = build_router()
@@ -1,6 +1,12 @@
 from __future__ import annotations
 
 import os
+import threading
+import time
+from collections import OrderedDict
+
+from .. import db
+from ..auth import AuthenticatedUser
 
 
 SESSION_COOKIE = "oa_session"
@@ -15,3 +21,101 @@ def build_session_cookie(token: str, *, expires_immediately: bool = False) -> st
         parts.append("Max-Age=0")
     return "; ".join(parts)
 
+
+
+class SessionCache:
+    """Bounded LRU of session token -> `AuthenticatedUser`, shared by the handler threads.
+
+    An entry is dropped when the session itself expires, when it has been cached
+    for `ttl` seconds, or when it is invalidated (logout, user update). `ttl`
+    bounds how stale an entry can get after a change made outside this process,
+    e.g. a direct DB edit. `max_size=0` disables caching.
+
+    Pre-fork workers each have their own cache plus one shared `generation`: an
+    invalidation bumps it, and every worker drops all of its entries once it sees
+    the bump, so a logout in one process is a logout in all of them.
+    """
+
+    def __init__(self, *, max_size: int = 10_000, ttl: float = 60.0, generation: db.Generation | None = None):
+        self.max_size = max(0, int(max_size))
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[AuthenticatedUser, int, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = generation
+        self._seen_generation = 0 if generation is None else generation.value
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, token: str, now: int | None = None) -> AuthenticatedUser | None:
+        now = int(time.time()) if now is None else now
+        with self._lock:
+            if self._generation is not None and self._generation.value != self._seen_generation:
+                # Invalidated in another worker; which tokens is not shared, so start over.
+                self._seen_generation = self._generation.value
+                self._entries.clear()
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            user, expires_at, cached_at = entry
+            if expires_at <= now or time.monotonic() - cached_at >= self.ttl:
+                del self._entries[token]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return user
+
+    def put(self, token: str, user: AuthenticatedUser, expires_at: int) -> None:
+        if not self.max_size:
+            return
+        with self._lock:
+            self._entries[token] = (user, expires_at, time.monotonic())
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, token: str) -> None:
+        with self._lock:
+            if self._entries.pop(token, None) is not None:
+                self.invalidations += 1
+        self._bump()
+
+    def invalidate_many(self, tokens: list[str]) -> None:
+        if not tokens:
+            return
+        with self._lock:
+            for token in tokens:
+                if self._entries.pop(token, None) is not None:
+                    self.invalidations += 1
+        self._bump()
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            stale = [t for t, (user, _, _) in self._entries.items() if user.id == user_id]
+            for t in stale:
+                del self._entries[t]
+            self.invalidations += len(stale)
+        self._bump()
+
+    def _bump(self) -> None:
+        if self._generation is not None:
+            self._generation.bump()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "max_size": self.max_size,
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
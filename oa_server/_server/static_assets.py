@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from dataclasses import dataclass
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+
+# Smaller bodies gain nothing from gzip once headers are counted.
+GZIP_MIN_SIZE = 1024
+_COMPRESSIBLE = ("text/", "application/javascript", "application/json", "image/svg+xml")
+
+
+@dataclass(frozen=True)
+class Asset:
+    content_type: str
+    body: bytes
+    gzip_body: bytes | None
+    etag: str
+    last_modified: str
+    mtime: int
+    # (mtime_ns, size) of the file when loaded; a different stat means reload.
+    stamp: tuple[int, int]
+
+    @property
+    def gzip_etag(self) -> str:
+        # Strong ETags identify one representation, so the gzip variant gets its own.
+        return self.etag[:-1] + '-gz"'
+
+
+class AssetCache:
+    """Frontend files held in memory, keyed by URL path, loaded on first request.
+
+    A hit costs one `os.stat` to notice edits (mtime or size change → reload);
+    the path resolution and traversal check only run when a file is loaded.
+    Compressible files get a gzip variant built once at load time.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root.resolve()
+        self._assets: dict[str, tuple[Path, Asset]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+
+    def get(self, url_path: str) -> Asset | None:
+        """The asset for `url_path`, or None when no such file exists. PermissionError for paths escaping the root."""
+        asset = self._fresh(url_path)
+        if asset is not None:
+            return asset
+        path = (self.root / url_path.lstrip("/")).resolve()
+        if self.root not in path.parents and path != self.root:
+            raise PermissionError("forbidden")
+        # Entries are keyed by the canonical path only, so `/js/./a.js`-style variants cannot grow the cache.
+        key = "/" + path.relative_to(self.root).as_posix()
+        asset = self._fresh(key) if key != url_path else None
+        if asset is not None:
+            return asset
+        try:
+            asset = _load(path)
+        except (FileNotFoundError, NotADirectoryError):
+            with self._lock:
+                self._assets.pop(key, None)
+            return None
+        with self._lock:
+            self._assets[key] = (path, asset)
+            self.loads += 1
+        return asset
+
+    def _fresh(self, key: str) -> Asset | None:
+        cached = self._assets.get(key)
+        if cached is None:
+            return None
+        path, asset = cached
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if (st.st_mtime_ns, st.st_size) != asset.stamp:
+            return None
+        with self._lock:
+            self.hits += 1
+        return asset
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._assets),
+                "bytes": sum(len(a.body) + len(a.gzip_body or b"") for _, a in self._assets.values()),
+                "hits": self.hits,
+                "loads": self.loads,
+            }
+
+
+def _load(path: Path) -> Asset:
+    if not path.is_file():
+        raise FileNotFoundError(str(path))
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        body = f.read()
+    ctype, _ = mimetypes.guess_type(str(path))
+    ctype = ctype or "application/octet-stream"
+    gzip_body = None
+    if len(body) >= GZIP_MIN_SIZE and ctype.startswith(_COMPRESSIBLE):
+        # mtime=0 keeps the compressed bytes (and so the variant) a pure function of the file.
+        packed = gzip.compress(body, compresslevel=9, mtime=0)
+        if len(packed) < len(body):
+            gzip_body = packed
+    return Asset(
+        content_type=f"{ctype}; charset=utf-8" if ctype.startswith("text/") else ctype,
+        body=body,
+        gzip_body=gzip_body,
+        etag='"' + hashlib.sha256(body).hexdigest()[:32] + '"',
+        last_modified=formatdate(st.st_mtime, usegmt=True),
+        mtime=int(st.st_mtime),
+        stamp=(st.st_mtime_ns, st.st_size),
+    )
+
+
+def accepts_gzip(accept_encoding: str | None) -> bool:
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding.strip().lower() not in ("gzip", "*"):
+            continue
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                return float(q[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def not_modified(etag: str, mtime: int, if_none_match: str | None, if_modified_since: str | None) -> bool:
+    if if_none_match is not None:
+        # If-None-Match uses weak comparison, and wins over If-Modified-Since.
+        tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+        return "*" in tags or etag in tags
+    if if_modified_since:
+        try:
+            return mtime <= int(parsedate_to_datetime(if_modified_since).timestamp())
+        except (TypeError, ValueError, OverflowError):
+            return False
+    return False
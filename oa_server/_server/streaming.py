@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from http.server import BaseHTTPRequestHandler
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ChunkedWriter:
+    """Write-only file object for a response body of unknown length.
+
+    Output is buffered into ~`chunk_size` pieces. HTTP/1.1 clients get
+    `Transfer-Encoding: chunked` and can keep the connection alive; HTTP/1.0
+    clients get a body delimited by closing the connection.
+    """
+
+    def __init__(self, handler: BaseHTTPRequestHandler, *, chunked: bool, chunk_size: int = CHUNK_SIZE):
+        self._handler = handler
+        self._chunked = chunked
+        self._chunk_size = chunk_size
+        self._buf = bytearray()
+        self._closed = False
+        self.bytes_written = 0
+
+    def write(self, data: bytes) -> int:
+        if self._closed:
+            raise ValueError("write to closed ChunkedWriter")
+        self._buf += data
+        if len(self._buf) >= self._chunk_size:
+            self._flush_buffer()
+        return len(data)
+
+    def flush(self) -> None:
+        # Buffered pieces are emitted on size or close; an explicit flush is a no-op so
+        # callers like zipfile do not turn every small write into a chunk.
+        return
+
+    def _flush_buffer(self) -> None:
+        if not self._buf:
+            return
+        data = bytes(self._buf)
+        self._buf.clear()
+        wfile = self._handler.wfile
+        if self._chunked:
+            wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        else:
+            wfile.write(data)
+        self.bytes_written += len(data)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._flush_buffer()
+        if self._chunked:
+            self._handler.wfile.write(b"0\r\n\r\n")
+        self._closed = True
+
+
+def begin_stream(handler: BaseHTTPRequestHandler, status: int, headers: dict[str, str]) -> ChunkedWriter:
+    """Send the status line and headers of a streamed response and return its body writer."""
+    chunked = handler.request_version != "HTTP/1.0"
+    handler.send_response(status)
+    for k, v in headers.items():
+        handler.send_header(k, v)
+    if chunked:
+        handler.send_header("Transfer-Encoding", "chunked")
+    else:
+        handler.send_header("Connection", "close")
+    handler.end_headers()
+    return ChunkedWriter(handler, chunked=chunked)
@@ -3,6 +3,7 @@ from __future__ import annotations
 from .. import db
 from ..auth import AuthenticatedUser
 from . import workflow_conditions
+from .workflow_catalog import get_catalog
 from .workflow_engine import create_tasks_for_step
 
 
@@ -152,33 +153,29 @@ def decide_task(conn, user: AuthenticatedUser, task_id: int, *, decision: str, c
 
     request_type = str(req["request_type"])
     workflow_key = str(req["workflow_key"]) if "workflow_key" in req.keys() and req["workflow_key"] else None
+    catalog = get_catalog(conn)
     if not workflow_key:
-        workflow_key = db.resolve_default_workflow_key(conn, request_type, dept=user.dept) or request_type
-    steps = db.list_workflow_variant_steps(conn, workflow_key)
-    if not steps and workflow_key != request_type:
-        steps = db.list_workflow_variant_steps(conn, request_type)
-    if not steps:
-        steps = db.list_workflow_variant_steps(conn, "generic")
+        workflow_key = catalog.resolve_default(request_type, dept=user.dept) or request_type
+    steps = catalog.steps_for(workflow_key, request_type)
 
     current_order = task["step_order"]
     if current_order is None:
-        current_order = None
         for s in steps:
-            if str(s["step_key"]) == str(task["step_key"]):
-                current_order = int(s["step_order"])
+            if s.step_key == str(task["step_key"]):
+                current_order = s.step_order
                 break
 
     request_payload = workflow_conditions.parse_payload_json(req)
     creator_row = db.get_user_by_id(conn, int(req["user_id"]))
     creator_dept = None if creator_row["dept"] is None else str(creator_row["dept"])
 
-    current_step_row = None
+    current_step = None
     if current_order is not None:
         for s in steps:
-            if int(s["step_order"]) == int(current_order):
-                current_step_row = s
+            if s.step_order == int(current_order):
+                current_step = s
                 break
-    current_assignee_kind = None if not current_step_row else str(current_step_row["assignee_kind"])
+    current_assignee_kind = None if not current_step else current_step.assignee_kind
     is_users_any = current_assignee_kind == "users_any"
     is_users_all = current_assignee_kind == "users_all"
 
@@ -219,11 +216,11 @@ def decide_task(conn, user: AuthenticatedUser, task_id: int, *, decision: str, c
         if any(str(t["status"]) == "pending" for t in group):
             return db.get_request(conn, int(task["request_id"]))
 
-    next_step_row = workflow_conditions.find_next_step(
+    next_step = workflow_conditions.find_next_step(
         steps, current_order=current_order, request_payload=request_payload, creator_dept=creator_dept
     )
 
-    if next_step_row is not None:
+    if next_step is not None:
         creator = AuthenticatedUser(
             id=int(creator_row["id"]),
             username=str(creator_row["username"]),
@@ -231,13 +228,13 @@ def decide_task(conn, user: AuthenticatedUser, task_id: int, *, decision: str, c
             dept=None if creator_row["dept"] is None else str(creator_row["dept"]),
             manager_id=None if creator_row["manager_id"] is None else int(creator_row["manager_id"]),
         )
-        create_tasks_for_step(conn, int(task["request_id"]), creator=creator, step_row=next_step_row)
+        create_tasks_for_step(conn, int(task["request_id"]), creator=creator, step=next_step)
         db.add_request_event(
             conn,
             int(task["request_id"]),
             event_type="task_created",
             actor_user_id=None,
-            message=f"step={next_step_row['step_key']}",
+            message=f"step={next_step.step_key}",
         )
         db.update_request_status(conn, int(task["request_id"]), status="pending", decided_by=None)
         return db.get_request(conn, int(task["request_id"]))
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import os
+import re
+import secrets
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from .. import db
+from ..auth import AuthenticatedUser
+from .attachments import TMP_DIR, StagedUpload, check_upload_access, record_attachment, stage_upload
+from .uploads import UPLOAD_CHUNK, save_stream
+
+# Chunks of resumable uploads: `<attachments_dir>/.uploads/<upload id>/<offset, zero-padded>`.
+UPLOADS_DIR = ".uploads"
+# An upload session not touched (created or sent a chunk) for this long is deleted with its chunks.
+UPLOAD_SESSION_TTL = 24 * 3600
+# Temp files and chunk directories nothing refers to are removed once they are this old;
+# well past any single request, so a body still streaming in is never swept.
+STALE_AGE = 24 * 3600
+_SHA256 = re.compile(r"[0-9a-f]{64}")
+
+
+def session_to_dict(row) -> dict[str, Any]:
+    return {
+        "id": str(row["id"]),
+        "request_id": int(row["request_id"]),
+        "filename": str(row["filename"]),
+        "content_type": None if row["content_type"] is None else str(row["content_type"]),
+        "size": int(row["size"]),
+        "offset": int(row["received"]),
+        "expires_at": int(row["expires_at"]),
+    }
+
+
+def create_upload_session(
+    conn,
+    *,
+    user: AuthenticatedUser,
+    request_id: int,
+    filename: str,
+    content_type: str | None,
+    size: int,
+    sha256: str | None,
+    max_bytes: int,
+) -> dict[str, Any]:
+    """Start a resumable upload of `size` bytes. ValueError("too_large") / ValueError("invalid_sha256")."""
+    check_upload_access(conn, user, request_id)
+    if size > max_bytes:
+        raise ValueError("too_large")
+    if sha256 is not None and not _SHA256.fullmatch(sha256):
+        raise ValueError("invalid_sha256")
+    upload_id = secrets.token_hex(16)
+    db.create_upload_session(
+        conn,
+        upload_id,
+        request_id=request_id,
+        user_id=user.id,
+        filename=filename,
+        content_type=content_type,
+        size=size,
+        sha256=sha256,
+        expires_at=int(time.time()) + UPLOAD_SESSION_TTL,
+    )
+    return session_to_dict(db.get_upload_session(conn, upload_id))
+
+
+def get_upload_session(conn, user: AuthenticatedUser, upload_id: str):
+    """The live session row owned by `user`; FileNotFoundError otherwise (someone else's looks missing)."""
+    row = db.get_upload_session(conn, upload_id)
+    if not row or int(row["user_id"]) != user.id or int(row["expires_at"]) <= int(time.time()):
+        raise FileNotFoundError("not_found")
+    return row
+
+
+def chunk_dir(attachments_dir: Path, upload_id: str) -> Path:
+    return attachments_dir / UPLOADS_DIR / upload_id
+
+
+def stage_chunk(attachments_dir: Path, chunks: Iterable[bytes], *, max_bytes: int) -> Path:
+    """Stream one PUT body to a temp file; `commit_chunk` moves it into the session."""
+    path, _, _ = save_stream(chunks, attachments_dir / TMP_DIR, max_bytes=max_bytes)
+    return path
+
+
+def commit_chunk(conn, attachments_dir: Path, upload_id: str, tmp: Path, *, offset: int) -> int | None:
+    """Append the staged chunk at `offset`; the new offset, or None when `offset` is no longer current.
+
+    The session UPDATE takes SQLite's write lock before the rename, so two PUTs
+    racing for one offset cannot both land, and expiry cannot remove the chunk
+    directory between the check and the rename. `tmp` is consumed only on success.
+    """
+    received = offset + tmp.stat().st_size
+    if not db.advance_upload_session(
+        conn, upload_id, offset=offset, received=received, expires_at=int(time.time()) + UPLOAD_SESSION_TTL
+    ):
+        return None
+    target = chunk_dir(attachments_dir, upload_id)
+    target.mkdir(parents=True, exist_ok=True)
+    os.replace(tmp, target / f"{offset:015d}")
+    return received
+
+
+def _read_chunks(directory: Path) -> Iterator[bytes]:
+    for name in sorted(os.listdir(directory)):
+        with open(directory / name, "rb") as f:
+            while block := f.read(UPLOAD_CHUNK):
+                yield block
+
+
+def assemble_upload(attachments_dir: Path, row) -> StagedUpload:
+    """Concatenate a complete session's chunks into one staged (hashed) upload.
+
+    ValueError("hash_mismatch") when the client declared a SHA-256 and the bytes
+    do not match it; RuntimeError("incomplete") when chunks are missing on disk.
+    """
+    size = int(row["size"])
+    directory = chunk_dir(attachments_dir, str(row["id"]))
+    chunks = _read_chunks(directory) if size else iter(())
+    staged = stage_upload(attachments_dir, chunks, max_bytes=size)
+    if staged.size != size:
+        staged.discard()
+        raise RuntimeError("incomplete")
+    if row["sha256"] is not None and staged.sha256 != str(row["sha256"]):
+        staged.discard()
+        raise ValueError("hash_mismatch")
+    return staged
+
+
+def finalize_upload(
+    conn, attachments_dir: Path, row, staged: StagedUpload, *, user: AuthenticatedUser
+) -> dict[str, Any] | None:
+    """Turn the session into an attachment; None if it was finalized or expired meanwhile. The caller commits."""
+    check_upload_access(conn, user, int(row["request_id"]))
+    if not db.delete_upload_session(conn, str(row["id"])):
+        return None
+    return record_attachment(
+        conn,
+        attachments_dir,
+        staged,
+        user=user,
+        request_id=int(row["request_id"]),
+        filename=str(row["filename"]),
+        content_type=None if row["content_type"] is None else str(row["content_type"]),
+    )
+
+
+def remove_chunks(attachments_dir: Path, upload_id: str) -> None:
+    shutil.rmtree(chunk_dir(attachments_dir, upload_id), ignore_errors=True)
+
+
+def sweep_uploads(pool, attachments_dir: Path, *, now: int, batch: int) -> tuple[int, int]:
+    """Expire abandoned upload sessions and remove stale temp files: (sessions expired, stale files removed).
+
+    Stale means older than STALE_AGE: temp files of uploads whose process died,
+    and chunk directories left without a session row.
+    """
+    expired = 0
+    while True:
+        with pool.connection() as conn:
+            ids = db.delete_expired_upload_sessions(conn, now, limit=batch)
+        for upload_id in ids:
+            remove_chunks(attachments_dir, upload_id)
+        expired += len(ids)
+        if len(ids) < batch:
+            break
+
+    cutoff = now - STALE_AGE
+    removed = 0
+    tmp_dir = attachments_dir / TMP_DIR
+    if tmp_dir.is_dir():
+        for entry in os.scandir(tmp_dir):
+            if entry.is_file(follow_symlinks=False) and entry.stat().st_mtime < cutoff:
+                Path(entry.path).unlink(missing_ok=True)
+                removed += 1
+    uploads_dir = attachments_dir / UPLOADS_DIR
+    if uploads_dir.is_dir():
+        stale = [e.name for e in os.scandir(uploads_dir) if e.is_dir(follow_symlinks=False) and e.stat().st_mtime < cutoff]
+        for i in range(0, len(stale), batch):
+            with pool.connection() as conn:
+                live = db.existing_upload_sessions(conn, stale[i : i + batch])
+            for upload_id in stale[i : i + batch]:
+                if upload_id not in live:
+                    remove_chunks(attachments_dir, upload_id)
+                    removed += 1
+    return expired, removed
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+from email.message import Message
+from pathlib import Path
+from typing import Iterable, Iterator
+
+# Bytes read from the socket / written to disk per step; an upload never holds more than this in memory.
+UPLOAD_CHUNK = 64 * 1024
+# A multipart body carries boundaries and part headers on top of the file.
+MULTIPART_OVERHEAD = 64 * 1024
+_MAX_PART_HEADERS = 16 * 1024
+
+
+def parse_content_type(value: str | None) -> tuple[str, Message]:
+    """(`type/subtype` lower-cased, parsed header for `get_param`)."""
+    msg = Message()
+    msg["content-type"] = value or ""
+    return (msg.get_content_type() if value else ""), msg
+
+
+def save_stream(chunks: Iterable[bytes], tmp_dir: Path, *, max_bytes: int) -> tuple[Path, int, str]:
+    """Write `chunks` to a new temp file in `tmp_dir`: (path, size, SHA-256 hex).
+
+    ValueError("too_large") as soon as the data passes `max_bytes`. The digest is
+    computed on the way through, so the file is never read back. The caller moves
+    the file into place or unlinks it; on any error here the partial file is removed.
+    """
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    fd, name = tempfile.mkstemp(dir=tmp_dir, prefix="upload-")
+    path = Path(name)
+    size = 0
+    digest = hashlib.sha256()
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ValueError("too_large")
+                digest.update(chunk)
+                f.write(chunk)
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    return path, size, digest.hexdigest()
+
+
+class _Buffered:
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._buf = bytearray()
+
+    def _fill(self) -> None:
+        try:
+            self._buf += next(self._chunks)
+        except StopIteration:
+            raise ValueError("invalid_multipart") from None
+
+    def read_exact(self, n: int) -> bytes:
+        while len(self._buf) < n:
+            self._fill()
+        data = bytes(self._buf[:n])
+        del self._buf[:n]
+        return data
+
+    def read_until(self, sep: bytes, limit: int) -> bytes:
+        while (end := self._buf.find(sep)) < 0:
+            if len(self._buf) > limit:
+                raise ValueError("invalid_multipart")
+            self._fill()
+        data = bytes(self._buf[:end])
+        del self._buf[: end + len(sep)]
+        return data
+
+    def iter_until(self, sep: bytes) -> Iterator[bytes]:
+        # Hold back len(sep) - 1 bytes: the separator may straddle two reads.
+        keep = len(sep) - 1
+        while (end := self._buf.find(sep)) < 0:
+            if len(self._buf) > keep:
+                yield bytes(self._buf[: len(self._buf) - keep])
+                del self._buf[: len(self._buf) - keep]
+            self._fill()
+        if end:
+            yield bytes(self._buf[:end])
+        del self._buf[: end + len(sep)]
+
+
+def multipart_file(chunks: Iterable[bytes], boundary: str) -> tuple[str, str | None, Iterator[bytes]]:
+    """The first file part of a `multipart/form-data` body: (filename, content type, data chunks).
+
+    Non-file fields before it are skipped. Parsing is incremental: the data
+    iterator streams the part without buffering it. ValueError("invalid_multipart")
+    on malformed input, ValueError("missing_file") when no part has a filename.
+    """
+    if not boundary or len(boundary) > 200:
+        raise ValueError("invalid_multipart")
+    reader = _Buffered(chunks)
+    delimiter = b"--" + boundary.encode("latin-1")
+    reader.read_until(delimiter, _MAX_PART_HEADERS)  # preamble
+    while True:
+        if reader.read_exact(2) == b"--":
+            raise ValueError("missing_file")
+        head = reader.read_until(b"\r\n\r\n", _MAX_PART_HEADERS)
+        part = Message()
+        for line in head.decode("utf-8", "replace").split("\r\n"):
+            name, sep, value = line.partition(":")
+            if sep:
+                part[name.strip()] = value.strip()
+        filename = part.get_filename()
+        data = reader.iter_until(b"\r\n" + delimiter)
+        if filename is not None:
+            ctype = part.get("content-type")
+            return filename, None if not ctype else part.get_content_type(), data
+        for _ in data:
+            pass
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import queue
+import socket
+import threading
+from typing import Any, Callable
+
+from .jsonutil import json_bytes
+
+# How long the rejecter waits for a refused client's request head before answering anyway.
+REJECT_READ_TIMEOUT = 1.0
+# Refused connections waiting for their 503; beyond this they are closed unanswered.
+MAX_PENDING_REJECTS = 1024
+
+
+def busy_response(retry_after: int) -> bytes:
+    body = json_bytes({"error": "busy"})
+    head = (
+        "HTTP/1.1 503 Service Unavailable\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Retry-After: {retry_after}\r\n"
+        "Connection: close\r\n\r\n"
+    )
+    return head.encode("ascii") + body
+
+
+class WorkerPool:
+    """Fixed worker threads serving accepted connections from a bounded queue.
+
+    `submit` never blocks the accept loop: when `max_queue` connections are already waiting, the
+    connection goes to a single rejecter thread that answers 503 + `Retry-After` and closes it.
+    The rejecter reads the request head first, so the client sees the 503 rather than a reset.
+    """
+
+    def __init__(
+        self,
+        handle: Callable[[Any, Any], None],
+        *,
+        threads: int,
+        max_queue: int,
+        retry_after: int = 1,
+    ):
+        if threads < 1:
+            raise ValueError("threads must be >= 1")
+        self._handle = handle
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, max_queue))
+        self._rejects: queue.Queue = queue.Queue(maxsize=MAX_PENDING_REJECTS)
+        self._busy_response = busy_response(retry_after)
+        self._lock = threading.Lock()
+        self.threads = threads
+        self.max_queue = max(1, max_queue)
+        self.active = 0
+        self.served = 0
+        self.rejected = 0
+        self._workers = [threading.Thread(target=self._work, name=f"oa-worker-{i}", daemon=True) for i in range(threads)]
+        self._rejecter = threading.Thread(target=self._reject_loop, name="oa-rejecter", daemon=True)
+        for t in self._workers:
+            t.start()
+        self._rejecter.start()
+
+    def submit(self, request, client_address) -> bool:
+        try:
+            self._queue.put_nowait((request, client_address))
+            return True
+        except queue.Full:
+            pass
+        with self._lock:
+            self.rejected += 1
+        try:
+            self._rejects.put_nowait(request)
+        except queue.Full:
+            # Even the rejecter is behind: drop the connection without an answer.
+            _close(request)
+        return False
+
+    def waiting(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "threads": self.threads,
+                "active": self.active,
+                "waiting": self._queue.qsize(),
+                "max_queue": self.max_queue,
+                "served": self.served,
+                "rejected": self.rejected,
+            }
+
+    def close(self, timeout: float = 2.0) -> None:
+        for _ in self._workers:
+            self._queue.put((None, None))
+        self._rejects.put(None)
+        for t in self._workers:
+            t.join(timeout)
+
+    def _work(self) -> None:
+        while True:
+            request, client_address = self._queue.get()
+            if request is None:
+                return
+            with self._lock:
+                self.active += 1
+            try:
+                self._handle(request, client_address)
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    self.served += 1
+
+    def _reject_loop(self) -> None:
+        while True:
+            request = self._rejects.get()
+            if request is None:
+                return
+            try:
+                request.settimeout(REJECT_READ_TIMEOUT)
+                head = b""
+                while b"\r\n\r\n" not in head and len(head) < 65536:
+                    data = request.recv(8192)
+                    if not data:
+                        break
+                    head += data
+                request.sendall(self._busy_response)
+                request.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+            finally:
+                _close(request)
+
+
+def _close(request) -> None:
+    try:
+        request.close()
+    except OSError:
+        pass
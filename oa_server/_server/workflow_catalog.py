@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping
+
+from .. import db
+from .workflow_conditions import ConditionFn, compile_condition
+
+# Compiled, immutable view of the workflow catalog (workflow_variants +
+# workflow_variant_steps), so creating a request or deciding a task does no
+# catalog queries. One catalog per database file, rebuilt when the generation
+# in `oa_server/_db/workflow_variants.py` changes, or after CATALOG_TTL for
+# edits made outside this process.
+CATALOG_TTL = 60.0
+
+_ALL_USERS = {"all", "*", "everyone"}
+
+
+@dataclass(frozen=True)
+class CompiledStep:
+    step_order: int
+    step_key: str
+    assignee_kind: str
+    assignee_value: str | None
+    # `user`: the user id; `users_all` / `users_any`: the listed ids (or all_users).
+    assignee_user_id: int | None
+    assignee_user_ids: tuple[int, ...]
+    assignee_all_users: bool
+    condition_kind: str | None
+    condition_value: str | None
+    condition: ConditionFn
+
+
+@dataclass(frozen=True)
+class CompiledWorkflow:
+    workflow_key: str
+    request_type: str
+    name: str
+    category: str
+    scope_kind: str
+    scope_value: str | None
+    enabled: bool
+    is_default: bool
+    steps: tuple[CompiledStep, ...]
+
+
+def parse_int_list(value: str | None) -> list[int]:
+    if not value:
+        return []
+    out: list[int] = []
+    for part in str(value).replace(";", ",").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            out.append(int(part))
+        except Exception:
+            continue
+    return list(dict.fromkeys(out))
+
+
+def compile_step(row) -> CompiledStep:
+    kind = str(row["assignee_kind"])
+    value = None if row["assignee_value"] is None else str(row["assignee_value"])
+    user_id = None
+    if kind == "user" and value:
+        try:
+            user_id = int(value)
+        except ValueError:
+            user_id = None
+    all_users = kind in {"users_all", "users_any"} and (value or "").strip().lower() in _ALL_USERS
+    condition_kind = None if row["condition_kind"] is None else str(row["condition_kind"])
+    condition_value = None if row["condition_value"] is None else str(row["condition_value"])
+    return CompiledStep(
+        step_order=int(row["step_order"]),
+        step_key=str(row["step_key"]),
+        assignee_kind=kind,
+        assignee_value=value,
+        assignee_user_id=user_id,
+        assignee_user_ids=() if all_users else tuple(parse_int_list(value)),
+        assignee_all_users=all_users,
+        condition_kind=condition_kind,
+        condition_value=condition_value,
+        condition=compile_condition(condition_kind, condition_value),
+    )
+
+
+class WorkflowCatalog:
+    def __init__(self, variants, steps) -> None:
+        steps_by_key: dict[str, list[CompiledStep]] = {}
+        for s in steps:
+            steps_by_key.setdefault(str(s["workflow_key"]), []).append(compile_step(s))
+        workflows: dict[str, CompiledWorkflow] = {}
+        global_defaults: dict[str, str] = {}
+        dept_defaults: dict[tuple[str, str], str] = {}
+        for v in variants:
+            wf = CompiledWorkflow(
+                workflow_key=str(v["workflow_key"]),
+                request_type=str(v["request_type"]),
+                name=str(v["name"]),
+                category=str(v["category"]),
+                scope_kind=str(v["scope_kind"]),
+                scope_value=None if v["scope_value"] is None else str(v["scope_value"]),
+                enabled=int(v["enabled"]) == 1,
+                is_default=int(v["is_default"]) == 1,
+                steps=tuple(steps_by_key.get(str(v["workflow_key"]), ())),
+            )
+            workflows[wf.workflow_key] = wf
+            if not (wf.enabled and wf.is_default):
+                continue
+            # First match in rowid order wins, like the `LIMIT 1` lookups this replaces.
+            if wf.scope_kind == "global":
+                global_defaults.setdefault(wf.request_type, wf.workflow_key)
+            elif wf.scope_kind == "dept" and wf.scope_value is not None:
+                dept_defaults.setdefault((wf.request_type, wf.scope_value), wf.workflow_key)
+        self.workflows: Mapping[str, CompiledWorkflow] = MappingProxyType(workflows)
+        self._global_defaults = global_defaults
+        self._dept_defaults = dept_defaults
+
+    def get(self, workflow_key: str) -> CompiledWorkflow | None:
+        return self.workflows.get(workflow_key)
+
+    def resolve_default(self, request_type: str, *, dept: str | None) -> str | None:
+        if dept:
+            key = self._dept_defaults.get((request_type, dept))
+            if key:
+                return key
+        return self._global_defaults.get(request_type)
+
+    def steps_for(self, workflow_key: str, request_type: str) -> tuple[CompiledStep, ...]:
+        """Steps of `workflow_key`, falling back to the request type's and then the generic workflow."""
+        for key in (workflow_key, request_type, "generic"):
+            wf = self.workflows.get(key)
+            if wf and wf.steps:
+                return wf.steps
+        return ()
+
+
+_catalogs: dict[str, tuple[int, float, WorkflowCatalog]] = {}
+
+
+def get_catalog(conn) -> WorkflowCatalog:
+    key = db.db_key(conn)
+    gen = db.workflow_catalog_generation()
+    cached = _catalogs.get(key)
+    if cached is not None and cached[0] == gen and time.monotonic() - cached[1] < CATALOG_TTL:
+        return cached[2]
+    catalog = WorkflowCatalog(*db.load_workflow_catalog(conn))
+    if db.workflow_catalog_generation() == gen:
+        _catalogs[key] = (gen, time.monotonic(), catalog)
+    return catalog
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import functools
 import json
-from typing import Any
+import re
+from typing import Any, Callable
 
 
 def parse_payload_json(req_row) -> dict[str, Any] | None:
@@ -14,71 +16,219 @@ def parse_payload_json(req_row) -> dict[str, Any] | None:
         return None
 
 
-def step_condition_passes(step_row, request_payload: dict[str, Any] | None, *, creator_dept: str | None) -> bool:
-    kind = None if step_row["condition_kind"] is None else str(step_row["condition_kind"]).strip()
-    value = None if step_row["condition_value"] is None else str(step_row["condition_value"]).strip()
-    if not kind:
-        return True
-    if kind == "min_amount":
-        if not request_payload:
-            return False
-        try:
-            amount = float(request_payload.get("amount"))
-            threshold = float(value or "0")
-        except Exception:
-            return False
-        return amount >= threshold
-    if kind == "max_amount":
-        if not request_payload:
-            return False
-        try:
-            amount = float(request_payload.get("amount"))
-            threshold = float(value or "0")
-        except Exception:
-            return False
-        return amount <= threshold
-    if kind == "min_days":
+ConditionFn = Callable[[dict[str, Any] | None, str | None], bool]
+
+
+def _always(request_payload: dict[str, Any] | None, creator_dept: str | None) -> bool:
+    return True
+
+
+def _never(request_payload: dict[str, Any] | None, creator_dept: str | None) -> bool:
+    return False
+
+
+def _lower_list(value: str | None) -> frozenset[str]:
+    return frozenset(part.strip().lower() for part in (value or "").replace(";", ",").split(",") if part.strip())
+
+
+def _threshold_condition(field: str, parse, value: str | None, passes) -> ConditionFn:
+    try:
+        threshold = parse(value or "0")
+    except Exception:
+        return _never
+
+    def check(request_payload: dict[str, Any] | None, creator_dept: str | None) -> bool:
         if not request_payload:
             return False
         try:
-            days = int(request_payload.get("days"))
-            threshold = int(value or "0")
+            actual = parse(request_payload.get(field))
         except Exception:
             return False
-        return days >= threshold
+        return passes(actual, threshold)
+
+    return check
+
+
+LEAF_KINDS = frozenset({"min_amount", "max_amount", "min_days", "dept_in", "category_in"})
+
+
+def _compile_leaf(kind: str, value: str | None) -> ConditionFn:
+    if kind in {"min_amount", "max_amount", "min_days"}:
+        field, parse = ("days", int) if kind == "min_days" else ("amount", float)
+        if kind == "max_amount":
+            return _threshold_condition(field, parse, value, lambda actual, threshold: actual <= threshold)
+        return _threshold_condition(field, parse, value, lambda actual, threshold: actual >= threshold)
     if kind == "dept_in":
-        if not creator_dept:
-            return False
-        allowed = []
-        for part in (value or "").replace(";", ",").split(","):
-            part = part.strip()
-            if part:
-                allowed.append(part.lower())
+        allowed = _lower_list(value)
         if not allowed:
-            return False
-        return creator_dept.strip().lower() in allowed
+            return _never
+        return lambda request_payload, creator_dept: bool(creator_dept) and creator_dept.strip().lower() in allowed
     if kind == "category_in":
-        if not request_payload:
-            return False
-        category = str(request_payload.get("category", "")).strip()
-        allowed = []
-        for part in (value or "").replace(";", ",").split(","):
-            part = part.strip()
-            if part:
-                allowed.append(part.lower())
+        allowed = _lower_list(value)
         if not allowed:
-            return False
-        return category.lower() in allowed
-    return True
+            return _never
+
+        def check(request_payload: dict[str, Any] | None, creator_dept: str | None) -> bool:
+            if not request_payload:
+                return False
+            return str(request_payload.get("category", "")).strip().lower() in allowed
+
+        return check
+    return _always
+
+
+def _all_of(preds: tuple[ConditionFn, ...]) -> ConditionFn:
+    def check(request_payload: dict[str, Any] | None, creator_dept: str | None) -> bool:
+        for pred in preds:
+            if not pred(request_payload, creator_dept):
+                return False
+        return True
+
+    return check
+
+
+def _any_of(preds: tuple[ConditionFn, ...]) -> ConditionFn:
+    def check(request_payload: dict[str, Any] | None, creator_dept: str | None) -> bool:
+        for pred in preds:
+            if pred(request_payload, creator_dept):
+                return True
+        return False
+
+    return check
+
+
+def _negate(pred: ConditionFn) -> ConditionFn:
+    return lambda request_payload, creator_dept: not pred(request_payload, creator_dept)
+
+
+# A call's arguments are taken verbatim up to the closing paren, so lists keep the same
+# "a, b; c" syntax as the single-kind `condition_value`.
+_EXPR_TOKEN = re.compile(r"\s*(?:(?!(?i:and|or|not)\b)(?P<call>[A-Za-z_]+)\s*\((?P<args>[^()]*)\)|(?P<word>[A-Za-z_]+)|(?P<op>&&|\|\||[()!]))")
+_OPERATORS = {"and": "and", "&&": "and", "or": "or", "||": "or", "not": "not", "!": "not"}
+
+
+def _tokenize(text: str) -> list[tuple[str, str, str | None]]:
+    tokens: list[tuple[str, str, str | None]] = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        m = _EXPR_TOKEN.match(text, pos)
+        if not m:
+            raise ValueError("invalid_condition")
+        pos = m.end()
+        if m.group("call"):
+            tokens.append(("call", m.group("call").lower(), m.group("args")))
+        elif m.group("word"):
+            op = _OPERATORS.get(m.group("word").lower())
+            if op is None:
+                raise ValueError("invalid_condition")
+            tokens.append(("op", op, None))
+        else:
+            tokens.append(("op", _OPERATORS.get(m.group("op"), m.group("op")), None))
+    return tokens
+
+
+class _ExprParser:
+    """Recursive descent over `or` < `and` < `not` < (call | parenthesised expr)."""
+
+    def __init__(self, tokens: list[tuple[str, str, str | None]]) -> None:
+        self.tokens = tokens
+        self.pos = 0
+
+    def _peek(self, kind: str, value: str) -> bool:
+        if self.pos < len(self.tokens) and self.tokens[self.pos][:2] == (kind, value):
+            self.pos += 1
+            return True
+        return False
+
+    def parse(self) -> ConditionFn:
+        pred = self._or()
+        if self.pos != len(self.tokens):
+            raise ValueError("invalid_condition")
+        return pred
+
+    def _or(self) -> ConditionFn:
+        preds = [self._and()]
+        while self._peek("op", "or"):
+            preds.append(self._and())
+        return preds[0] if len(preds) == 1 else _any_of(tuple(preds))
+
+    def _and(self) -> ConditionFn:
+        preds = [self._not()]
+        while self._peek("op", "and"):
+            preds.append(self._not())
+        return preds[0] if len(preds) == 1 else _all_of(tuple(preds))
+
+    def _not(self) -> ConditionFn:
+        if self._peek("op", "not"):
+            return _negate(self._not())
+        return self._atom()
+
+    def _atom(self) -> ConditionFn:
+        if self._peek("op", "("):
+            pred = self._or()
+            if not self._peek("op", ")"):
+                raise ValueError("invalid_condition")
+            return pred
+        if self.pos >= len(self.tokens) or self.tokens[self.pos][0] != "call":
+            raise ValueError("invalid_condition")
+        _, name, args = self.tokens[self.pos]
+        self.pos += 1
+        if name not in LEAF_KINDS:
+            raise ValueError("invalid_condition")
+        return _compile_leaf(name, (args or "").strip())
+
+
+def parse_condition_expr(text: str | None) -> ConditionFn:
+    """Compile e.g. `min_amount(5000) and (dept_in(IT, HR) or not category_in(travel))`.
+
+    Raises ValueError("invalid_condition") on unknown functions or bad syntax.
+    """
+    tokens = _tokenize(text or "")
+    if not tokens:
+        raise ValueError("invalid_condition")
+    return _ExprParser(tokens).parse()
+
+
+def validate_condition(kind: str | None, value: str | None) -> None:
+    """Reject conditions that would silently never match; only `expr` can be malformed today."""
+    if (kind or "").strip() == "expr":
+        parse_condition_expr(value)
+
+
+@functools.lru_cache(maxsize=512)
+def compile_condition(kind: str | None, value: str | None) -> ConditionFn:
+    """Turn a step's (condition_kind, condition_value) into a `(payload, creator_dept) -> bool` predicate.
+
+    Parsing (thresholds, lowercased lists, expressions) happens once here instead of on every
+    evaluation, and the result is memoised so row-based callers share it too.
+    Unknown kinds pass, as they always have; a malformed `expr` never passes.
+    """
+    kind = (kind or "").strip()
+    value = None if value is None else value.strip()
+    if not kind:
+        return _always
+    if kind == "expr":
+        try:
+            return parse_condition_expr(value)
+        except ValueError:
+            return _never
+    return _compile_leaf(kind, value)
+
+
+def step_condition_passes(step_row, request_payload: dict[str, Any] | None, *, creator_dept: str | None) -> bool:
+    kind = None if step_row["condition_kind"] is None else str(step_row["condition_kind"])
+    value = None if step_row["condition_value"] is None else str(step_row["condition_value"])
+    return compile_condition(kind, value)(request_payload, creator_dept)
 
 
 def find_next_step(steps, *, current_order: int | None, request_payload: dict[str, Any] | None, creator_dept: str | None):
+    """First compiled step after `current_order` whose condition passes (None when the flow is done)."""
     if not steps:
         return None
     for s in steps:
-        if current_order is not None and int(s["step_order"]) <= int(current_order):
+        if current_order is not None and s.step_order <= int(current_order):
             continue
-        if step_condition_passes(s, request_payload, creator_dept=creator_dept):
+        if s.condition(request_payload, creator_dept):
             return s
     return None
-
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import shutil
+import time
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterable
+
+from .streaming import CHUNK_SIZE
+
+_ZIP_EPOCH = 315619200  # 1980-01-02, clear of any timezone offset
+
+
+@dataclass(frozen=True)
+class ZipEntry:
+    """One file of a streamed archive: stored under `name`, read from `path` (`size` bytes)."""
+
+    name: str
+    path: Path
+    size: int
+    mtime: int
+
+
+def unique_name(name: str, seen: set[str], tag: object) -> str:
+    """`name`, or `stem (tag).ext` if an earlier entry already took it."""
+    if name not in seen:
+        seen.add(name)
+        return name
+    stem, dot, ext = name.rpartition(".")
+    if not stem:
+        stem, dot, ext = name, "", ""
+    out = f"{stem} ({tag}){dot}{ext}"
+    seen.add(out)
+    return out
+
+
+def write_zip(out: BinaryIO, entries: Iterable[ZipEntry], *, on_missing: Callable[[ZipEntry], None] | None = None) -> int:
+    """Write `entries` as a ZIP archive to the write-only stream `out`; the number of files written.
+
+    `out` is never seeked: zipfile then follows each entry with a data descriptor
+    instead of patching its local header, so the archive goes out as it is built.
+    Files are copied `CHUNK_SIZE` at a time and stored uncompressed (attachments are
+    mostly PDFs and images already), so memory stays flat whatever the file sizes;
+    only the central directory (one small record per file) grows with the count.
+    An entry whose file has gone is skipped and reported to `on_missing`.
+    """
+    written = 0
+    with zipfile.ZipFile(out, mode="w", compression=zipfile.ZIP_STORED) as zf:
+        for entry in entries:
+            try:
+                src = open(entry.path, "rb")
+            except FileNotFoundError:
+                if on_missing is not None:
+                    on_missing(entry)
+                continue
+            with src:
+                # ZIP timestamps start in 1980.
+                info = zipfile.ZipInfo(entry.name, date_time=time.localtime(max(entry.mtime, _ZIP_EPOCH))[:6])
+                # Known up front so zipfile picks ZIP64 headers itself for files over 4 GiB.
+                info.file_size = entry.size
+                with zf.open(info, mode="w") as dst:
+                    shutil.copyfileobj(src, dst, CHUNK_SIZE)
+            written += 1
+    return written
@@ -5,23 +5,22 @@ import hashlib
 import hmac
 import os
 import secrets
+import time
 from dataclasses import dataclass
+from typing import ClassVar
 
 
 PBKDF2_ALG = "sha256"
 PBKDF2_ITERATIONS = 210_000
 SALT_BYTES = 16
 DKLEN = 32
+SCRYPT_N = 2**14
+SCRYPT_R = 8
+SCRYPT_P = 1
 
 
-def hash_password(password: str) -> str:
-    salt = os.urandom(SALT_BYTES)
-    dk = hashlib.pbkdf2_hmac(PBKDF2_ALG, password.encode("utf-8"), salt, PBKDF2_ITERATIONS, dklen=DKLEN)
-    return "pbkdf2_sha256${}${}${}".format(
-        PBKDF2_ITERATIONS,
-        base64.urlsafe_b64encode(salt).decode("ascii").rstrip("="),
-        base64.urlsafe_b64encode(dk).decode("ascii").rstrip("="),
-    )
+def _b64encode_nopad(value: bytes) -> str:
+    return base64.urlsafe_b64encode(value).decode("ascii").rstrip("=")
 
 
 def _b64decode_nopad(value: str) -> bytes:
@@ -29,21 +28,127 @@ def _b64decode_nopad(value: str) -> bytes:
     return base64.urlsafe_b64decode((value + pad).encode("ascii"))
 
 
-def verify_password(password: str, stored: str) -> bool:
+# Stored hashes are `<scheme>$<params>$<salt>$<hash>`; a hasher is the scheme plus its cost
+# parameters, so `stored hasher != configured hasher` is exactly "parameters are stale".
+
+
+@dataclass(frozen=True)
+class PBKDF2Hasher:
+    iterations: int = PBKDF2_ITERATIONS
+    scheme: ClassVar[str] = "pbkdf2_sha256"
+
+    def derive(self, password: str, salt: bytes, dklen: int = DKLEN) -> bytes:
+        return hashlib.pbkdf2_hmac(PBKDF2_ALG, password.encode("utf-8"), salt, self.iterations, dklen=dklen)
+
+    def params(self) -> str:
+        return str(self.iterations)
+
+    @classmethod
+    def from_params(cls, params: str) -> PBKDF2Hasher:
+        return cls(iterations=int(params))
+
+
+@dataclass(frozen=True)
+class ScryptHasher:
+    n: int = SCRYPT_N
+    r: int = SCRYPT_R
+    p: int = SCRYPT_P
+    scheme: ClassVar[str] = "scrypt"
+
+    def derive(self, password: str, salt: bytes, dklen: int = DKLEN) -> bytes:
+        # scrypt needs ~128 * r * (n + p) bytes; OpenSSL refuses anything over 32 MiB unless told.
+        maxmem = 256 * self.r * (self.n + self.p) + 1024 * 1024
+        return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=self.n, r=self.r, p=self.p, maxmem=maxmem, dklen=dklen)
+
+    def params(self) -> str:
+        return f"{self.n}:{self.r}:{self.p}"
+
+    @classmethod
+    def from_params(cls, params: str) -> ScryptHasher:
+        n, r, p = (int(v) for v in params.split(":"))
+        return cls(n=n, r=r, p=p)
+
+
+PasswordHasher = PBKDF2Hasher | ScryptHasher
+HASHERS: dict[str, type[PBKDF2Hasher] | type[ScryptHasher]] = {
+    PBKDF2Hasher.scheme: PBKDF2Hasher,
+    ScryptHasher.scheme: ScryptHasher,
+}
+
+_hasher: PasswordHasher = PBKDF2Hasher()
+
+
+def configure_password_hasher(hasher: PasswordHasher) -> None:
+    """Set the hasher new hashes use; logins re-hash passwords stored with anything else."""
+    global _hasher
+    _hasher = hasher
+
+
+def password_hasher() -> PasswordHasher:
+    return _hasher
+
+
+def hash_password(password: str, hasher: PasswordHasher | None = None) -> str:
+    hasher = hasher or _hasher
+    salt = os.urandom(SALT_BYTES)
+    dk = hasher.derive(password, salt)
+    return f"{hasher.scheme}${hasher.params()}${_b64encode_nopad(salt)}${_b64encode_nopad(dk)}"
+
+
+def _parse_hash(stored: str) -> tuple[PasswordHasher, bytes, bytes] | None:
     try:
-        scheme, iters_s, salt_s, hash_s = stored.split("$", 3)
-        if scheme != "pbkdf2_sha256":
-            return False
-        iters = int(iters_s)
-        salt = _b64decode_nopad(salt_s)
-        expected = _b64decode_nopad(hash_s)
+        scheme, params, salt_s, hash_s = stored.split("$", 3)
+        hasher = HASHERS[scheme].from_params(params)
+        return hasher, _b64decode_nopad(salt_s), _b64decode_nopad(hash_s)
     except Exception:
-        return False
+        return None
+
 
-    dk = hashlib.pbkdf2_hmac(PBKDF2_ALG, password.encode("utf-8"), salt, iters, dklen=len(expected))
+def verify_password(password: str, stored: str) -> bool:
+    parsed = _parse_hash(stored)
+    if parsed is None:
+        return False
+    hasher, salt, expected = parsed
+    try:
+        dk = hasher.derive(password, salt, dklen=len(expected))
+    except (ValueError, MemoryError):
+        return False
     return hmac.compare_digest(dk, expected)
 
 
+def needs_rehash(stored: str, hasher: PasswordHasher | None = None) -> bool:
+    """True when `stored` was made with another scheme or other cost parameters than `hasher`."""
+    parsed = _parse_hash(stored)
+    return parsed is not None and parsed[0] != (hasher or _hasher)
+
+
+def calibrate_hasher(scheme: str, target_ms: float) -> PasswordHasher:
+    """The costliest parameters for `scheme` whose hash takes about `target_ms` on this host."""
+    if scheme == ScryptHasher.scheme:
+        # n must be a power of two: the largest one that fits the budget (at least 2**12).
+        n = 2**12
+        while n < 2**20 and _time_ms(ScryptHasher(n=n * 2)) <= target_ms:
+            n *= 2
+        return ScryptHasher(n=n)
+    if scheme != PBKDF2Hasher.scheme:
+        raise ValueError(f"unknown password hash scheme: {scheme}")
+    probe = 50_000
+    iterations = max(probe, int(probe * target_ms / _time_ms(PBKDF2Hasher(probe))))
+    # Once more at the estimate: small probes overstate the fixed per-call cost.
+    iterations = int(iterations * target_ms / _time_ms(PBKDF2Hasher(iterations)))
+    return PBKDF2Hasher(iterations=max(10_000, iterations // 1000 * 1000))
+
+
+def _time_ms(hasher: PasswordHasher, rounds: int = 3) -> float:
+    salt = os.urandom(SALT_BYTES)
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        hasher.derive("calibration", salt)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
 def new_session_token() -> str:
     return secrets.token_urlsafe(32)
 
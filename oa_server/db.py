@@ -5,31 +5,53 @@ from __future__ import annotations
 This module is intentionally thin; implementation lives in `oa_server._db`.
 """
 
-from ._db.attachments import create_attachment, get_attachment, list_request_attachments
-from ._db.connection import _connect_raw, connect
+from ._db.attachments import (
+    advance_upload_session,
+    count_blob_refs,
+    create_attachment,
+    create_upload_session,
+    delete_expired_upload_sessions,
+    delete_upload_session,
+    existing_upload_sessions,
+    get_attachment,
+    get_upload_session,
+    list_archive_attachments,
+    list_request_attachments,
+    referenced_blobs,
+)
+from ._db.connection import DEFAULT_DURABILITY, DURABILITY_PROFILES, ConnectionPool, _connect_raw, connect, db_key
 from ._db.delegations import get_delegation, is_active_delegate, set_delegation
+from ._db.generation import Generation, share_cache_generations
 from ._db.events import add_request_event, add_request_watcher, list_request_events, list_request_watchers
 from ._db.notifications import list_notifications, mark_notification_read
 from ._db.org import create_department, get_department, list_departments
 from ._db.rbac import (
     ensure_default_roles,
+    invalidate_permission_cache,
     list_role_permissions,
     list_roles,
+    permission_granted,
+    permission_matrix,
     replace_role_permissions,
     role_exists,
     role_has_permission,
+    role_permissions,
     upsert_role,
 )
 from ._db.requests import (
+    DEFAULT_EXPORT_COLUMNS,
+    EXPORT_COLUMNS,
     create_request,
     decide_request,
     get_request,
+    iter_request_export,
     list_requests,
     mark_request_changes_requested,
     reset_request_for_resubmit,
     update_request_status,
 )
 from ._db.schema import init_db
+from ._db.search import create_request_index, fts_available, fts_query
 from ._db.tasks import (
     cancel_all_pending_tasks,
     cancel_pending_tasks_for_step,
@@ -44,50 +66,70 @@ from ._db.tasks import (
 )
 from ._db.users import (
     create_session,
+    delete_expired_sessions,
     delete_session,
     get_session_with_user,
     get_user_by_id,
     get_user_by_username,
     list_users,
+    replace_password_hash,
+    trim_user_sessions,
     update_user,
 )
 from ._db.workflow_variants import (
     delete_workflow_variant,
     ensure_workflow_variants,
     get_workflow_variant,
+    invalidate_workflow_catalog,
     list_available_workflow_variants,
     list_workflow_steps,
     list_workflow_variant_steps,
     list_workflow_variants_admin,
     list_workflows,
+    load_workflow_catalog,
     migrate_workflow_variants,
     replace_workflow_steps,
     replace_workflow_variant_steps,
     resolve_default_workflow_key,
     upsert_workflow_variant,
+    workflow_catalog_generation,
 )
 from ._db.workflows_legacy import ensure_default_workflows, migrate_workflows
 
 __all__ = [
     "_connect_raw",
     "connect",
+    "db_key",
+    "ConnectionPool",
+    "DEFAULT_DURABILITY",
+    "DURABILITY_PROFILES",
     "init_db",
     # users / sessions
     "get_user_by_username",
     "get_user_by_id",
     "list_users",
+    "replace_password_hash",
     "update_user",
     "create_session",
+    "delete_expired_sessions",
+    "trim_user_sessions",
     "delete_session",
     "get_session_with_user",
     # requests
     "create_request",
     "list_requests",
+    "iter_request_export",
+    "EXPORT_COLUMNS",
+    "DEFAULT_EXPORT_COLUMNS",
     "get_request",
     "update_request_status",
     "mark_request_changes_requested",
     "reset_request_for_resubmit",
     "decide_request",
+    # full-text search
+    "create_request_index",
+    "fts_available",
+    "fts_query",
     # tasks
     "create_task",
     "list_inbox_tasks",
@@ -115,6 +157,12 @@ __all__ = [
     "list_workflow_variants_admin",
     "resolve_default_workflow_key",
     "list_workflow_variant_steps",
+    "load_workflow_catalog",
+    "workflow_catalog_generation",
+    "invalidate_workflow_catalog",
+    # cache generations
+    "Generation",
+    "share_cache_generations",
     # events / watchers
     "add_request_event",
     "add_request_watcher",
@@ -126,7 +174,16 @@ __all__ = [
     # attachments
     "create_attachment",
     "get_attachment",
+    "list_archive_attachments",
     "list_request_attachments",
+    "referenced_blobs",
+    "count_blob_refs",
+    "create_upload_session",
+    "get_upload_session",
+    "advance_upload_session",
+    "delete_upload_session",
+    "delete_expired_upload_sessions",
+    "existing_upload_sessions",
     # roles / rbac
     "ensure_default_roles",
     "upsert_role",
@@ -135,6 +192,10 @@ __all__ = [
     "list_role_permissions",
     "role_exists",
     "role_has_permission",
+    "role_permissions",
+    "permission_matrix",
+    "permission_granted",
+    "invalidate_permission_cache",
     # delegation
     "set_delegation",
     "get_delegation",
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import argparse
+import os
 from pathlib import Path
 
-from . import db
-from ._server.http_server import Handler, OAHTTPServer
+from . import auth, db
+from ._server.http_server import ENGINES, SERVER_MODES, Handler, OAHTTPServer
+from ._server.prefork import Supervisor, listen_socket
 
 
 def main(argv: list[str] | None = None) -> None:
@@ -13,12 +15,105 @@ def main(argv: list[str] | None = None) -> None:
     parser.add_argument("--port", type=int, default=8000)
     parser.add_argument("--db", default=str(Path("data") / "oa.sqlite3"))
     parser.add_argument("--frontend", default=str(Path("frontend")))
+    parser.add_argument("--db-pool-size", type=int, default=8, help="pooled SQLite connections (0 = connect per request)")
+    parser.add_argument(
+        "--db-durability",
+        choices=sorted(db.DURABILITY_PROFILES),
+        default=db.DEFAULT_DURABILITY,
+        help="fast: no journal/fsync; wal: WAL + synchronous=NORMAL; strict: WAL + synchronous=FULL",
+    )
+    parser.add_argument("--keepalive-timeout", type=float, default=15.0, help="seconds an idle keep-alive connection is held open")
+    parser.add_argument(
+        "--max-keepalive-requests", type=int, default=100, help="requests served per connection before it is closed (<=1 disables keep-alive)"
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="threads",
+        help="threads: socketserver (see --server-mode); asyncio: event loop for connection I/O, --threads executor for requests",
+    )
+    parser.add_argument(
+        "--server-mode",
+        choices=SERVER_MODES,
+        default="threads",
+        help="threads: a thread per connection; pool: --threads workers fed from a bounded queue",
+    )
+    parser.add_argument("--threads", type=int, default=16, help="worker threads (pool mode / asyncio executor)")
+    parser.add_argument("--max-queue", type=int, default=64, help="requests waiting for a worker before new ones get 503 (pool mode / asyncio)")
+    parser.add_argument("--backlog", type=int, default=128, help="listen() backlog")
+    parser.add_argument("--login-workers", type=int, default=0, help="processes that run login password hashing (0 = on the request thread)")
+    parser.add_argument("--login-concurrency", type=int, default=8, help="logins hashing or waiting to hash at once; beyond this they get 503 after 5s")
+    parser.add_argument("--password-hasher", choices=sorted(auth.HASHERS), default=auth.PBKDF2Hasher.scheme, help="scheme for new password hashes; logins re-hash stale ones")
+    parser.add_argument("--pbkdf2-iterations", type=int, default=auth.PBKDF2_ITERATIONS)
+    parser.add_argument("--scrypt-n", type=int, default=auth.SCRYPT_N, help="scrypt cost (power of two; memory is 1 KiB * n)")
+    parser.add_argument(
+        "--calibrate-password-hash",
+        type=float,
+        metavar="MS",
+        help="print the --pbkdf2-iterations / --scrypt-n that take about MS milliseconds on this host, then exit",
+    )
+    parser.add_argument("--maintenance-interval", type=float, default=300.0, help="seconds between session sweeps (0 disables)")
+    parser.add_argument("--max-sessions-per-user", type=int, default=20, help="sessions kept per user by the sweeper, newest first (0 = unlimited)")
+    parser.add_argument("--max-upload-mb", type=float, default=200.0, help="largest attachment accepted by streaming (raw/multipart) uploads")
+    parser.add_argument("--workers", type=int, default=1, help="server processes sharing the listening socket (>1 pre-forks; POSIX only)")
+    parser.add_argument("--shutdown-timeout", type=float, default=10.0, help="seconds a worker gets to finish running requests on SIGTERM")
     args = parser.parse_args(argv)
+    if args.workers > 1 and not hasattr(os, "fork"):
+        parser.error("--workers needs os.fork, which this platform does not have")
+
+    if args.calibrate_password_hash:
+        pbkdf2 = auth.calibrate_hasher(auth.PBKDF2Hasher.scheme, args.calibrate_password_hash)
+        scrypt = auth.calibrate_hasher(auth.ScryptHasher.scheme, args.calibrate_password_hash)
+        print(f"--password-hasher pbkdf2_sha256 --pbkdf2-iterations {pbkdf2.iterations}")
+        print(f"--password-hasher scrypt --scrypt-n {scrypt.n}")
+        return
+    if args.scrypt_n < 2 or args.scrypt_n & (args.scrypt_n - 1):
+        parser.error("--scrypt-n must be a power of two")
+    if args.password_hasher == auth.ScryptHasher.scheme:
+        auth.configure_password_hasher(auth.ScryptHasher(n=args.scrypt_n))
+    else:
+        auth.configure_password_hasher(auth.PBKDF2Hasher(iterations=args.pbkdf2_iterations))
 
     db_path = Path(args.db)
     frontend_dir = Path(args.frontend)
-    db.init_db(db_path)
+    db.init_db(db_path, durability=args.db_durability)
+
+    server_kwargs = dict(
+        db_path=db_path,
+        frontend_dir=frontend_dir,
+        db_pool_size=args.db_pool_size,
+        db_durability=args.db_durability,
+        keepalive_timeout=args.keepalive_timeout,
+        max_keepalive_requests=args.max_keepalive_requests,
+        server_mode=args.server_mode,
+        threads=args.threads,
+        max_queue=args.max_queue,
+        backlog=args.backlog,
+        engine=args.engine,
+        login_processes=args.login_workers,
+        login_concurrency=args.login_concurrency,
+        maintenance_interval=args.maintenance_interval,
+        max_sessions_per_user=args.max_sessions_per_user,
+        max_upload_bytes=int(args.max_upload_mb * 1024 * 1024),
+    )
+    if args.workers <= 1:
+        httpd = OAHTTPServer((args.host, args.port), Handler, **server_kwargs)
+        print(f"OA server running on http://{args.host}:{httpd.server_address[1]}/", flush=True)
+        httpd.serve_forever()
+        return
+
+    # Everything a worker shares with its siblings is set up here, before the fork; the
+    # DB pool and server threads are created in each worker.
+    sock = listen_socket(args.host, args.port, backlog=args.backlog)
+    db.share_cache_generations()
+    session_generation = db.Generation()
+    session_generation.share()
+
+    def make_server() -> OAHTTPServer:
+        return OAHTTPServer(
+            sock.getsockname(), Handler, listen_socket=sock, session_generation=session_generation, **server_kwargs
+        )
 
-    httpd = OAHTTPServer((args.host, args.port), Handler, db_path=db_path, frontend_dir=frontend_dir)
-    print(f"OA server running on http://{args.host}:{args.port}/")
-    httpd.serve_forever()
\ No newline at end of file
+    port = sock.getsockname()[1]
+    print(f"OA server running on http://{args.host}:{port}/ ({args.workers} workers)", flush=True)
+    Supervisor(sock, make_server, workers=args.workers, shutdown_timeout=args.shutdown_timeout).run()
@@ -21,13 +21,26 @@ class QuietHandler(BaseHandler):
         return
 
 
+# OA_TEST_ENGINE=asyncio runs the API suite against the asyncio front end.
+TEST_ENGINE = os.environ.get("OA_TEST_ENGINE", "threads")
+
+
 class BaseAPITestCase(unittest.TestCase):
+    server_kwargs: dict = {}
+
     @classmethod
     def setUpClass(cls):
         Path("data").mkdir(parents=True, exist_ok=True)
         cls.db_path = Path("data") / f"_test_{int(time.time())}_{os.getpid()}_{uuid.uuid4().hex}.sqlite3"
         db.init_db(cls.db_path)
-        cls.httpd = OAHTTPServer(("127.0.0.1", 0), QuietHandler, db_path=cls.db_path, frontend_dir=Path("frontend"))
+        cls.httpd = OAHTTPServer(
+            ("127.0.0.1", 0),
+            QuietHandler,
+            db_path=cls.db_path,
+            frontend_dir=Path("frontend"),
+            # Blob GC treats files no row of *this* DB references as garbage: one store per DB.
+            **{"engine": TEST_ENGINE, "attachments_dir": cls.db_path.with_suffix(".files"), **cls.server_kwargs},
+        )
         cls.port = cls.httpd.server_address[1]
         cls.thread = threading.Thread(target=cls.httpd.serve_forever, daemon=True)
         cls.thread.start()
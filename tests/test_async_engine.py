@@ -0,0 +1,48 @@
+import socket
+import threading
+import time
+from http.client import HTTPConnection
+
+from _support_api import BaseAPITestCase
+
+
+class TestAsyncEngine(BaseAPITestCase):
+    server_kwargs = {"engine": "asyncio", "threads": 2}
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.httpd.server_close()
+
+    def test_idle_connections_do_not_hold_threads(self):
+        threads_before = threading.active_count()
+        idle = []
+        try:
+            for _ in range(50):
+                conn = HTTPConnection("127.0.0.1", self.port, timeout=5)
+                conn.request("GET", "/api/me")
+                conn.getresponse().read()
+                idle.append(conn)
+            self.assertLess(threading.active_count() - threads_before, 5)
+            cookie = self.login("admin", "admin")
+            status, _, metrics = self.http("GET", "/api/admin/metrics", cookie=cookie)
+            self.assertEqual(status, 200)
+            self.assertEqual(metrics["http"]["mode"], "asyncio")
+            self.assertGreaterEqual(metrics["http"]["connections"], 50)
+        finally:
+            for conn in idle:
+                conn.close()
+
+    def test_pipelined_requests(self):
+        with socket.create_connection(("127.0.0.1", self.port), timeout=5) as s:
+            s.sendall(
+                b"POST /api/nope HTTP/1.1\r\nHost: x\r\nContent-Length: 3\r\n\r\nabc"
+                b"GET /api/me HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n"
+            )
+            reply = b""
+            deadline = time.time() + 5
+            while time.time() < deadline and (data := s.recv(65536)):
+                reply += data
+        self.assertEqual(reply.count(b"HTTP/1.1 "), 2)
+        self.assertTrue(reply.startswith(b"HTTP/1.1 404"))
+        self.assertIn(b"HTTP/1.1 401", reply)
@@ -1,6 +1,21 @@
 import base64
+import hashlib
+import io
+import json
+import os
+import time
+import unittest
+import zipfile
+from http.client import HTTPConnection
+from unittest import mock
 
-from _support_api import BaseAPITestCase
+from _support_api import BaseAPITestCase, db, hash_password
+
+from oa_server._server import api_get_attachments
+from oa_server._server.blob_store import blob_storage_path
+from oa_server._server.file_response import parse_range
+from oa_server._server.maintenance import Maintenance
+from oa_server._server.uploads import multipart_file
 
 
 class TestAttachments(BaseAPITestCase):
@@ -42,3 +57,305 @@ class TestAttachments(BaseAPITestCase):
         self.assertEqual(headers.get("Content-Type"), "text/plain")
         self.assertIn("attachment", (headers.get("Content-Disposition", "") or "").lower())
 
+
+class TestStreamingAttachmentUpload(BaseAPITestCase):
+    server_kwargs = {"max_upload_bytes": 256 * 1024}
+
+    def post_raw(self, path, body, headers, cookie):
+        conn = HTTPConnection("127.0.0.1", self.port, timeout=5)
+        conn.request("POST", path, body=body, headers={"Cookie": cookie, **headers})
+        res = conn.getresponse()
+        data = json.loads(res.read() or b"null")
+        conn.close()
+        return res.status, data
+
+    def create_request(self, cookie):
+        status, _, created = self.http(
+            "POST", "/api/requests", cookie=cookie, json_body={"type": "generic", "title": "att", "body": "b"}
+        )
+        self.assertEqual(status, 201)
+        return created["id"]
+
+    def download(self, att_id, cookie):
+        status, headers, raw = self.http("GET", f"/api/attachments/{att_id}/download", cookie=cookie, expect_json=False)
+        self.assertEqual(status, 200)
+        return headers, raw
+
+    def test_raw_and_multipart_upload(self):
+        cookie = self.login("user", "user")
+        req_id = self.create_request(cookie)
+        content = os.urandom(200 * 1024)
+
+        status, row = self.post_raw(
+            f"/api/requests/{req_id}/attachments?filename=%E6%8A%A5%E5%91%8A.bin",
+            content,
+            {"Content-Type": "application/octet-stream"},
+            cookie,
+        )
+        self.assertEqual(status, 201)
+        self.assertEqual(row["size"], len(content))
+        self.assertEqual(row["filename"], "报告.bin")
+        headers, raw = self.download(row["id"], cookie)
+        self.assertEqual(raw, content)
+        self.assertEqual(headers.get("Content-Type"), "application/octet-stream")
+        self.assertIn("filename*=UTF-8''%E6%8A%A5%E5%91%8A.bin", headers.get("Content-Disposition"))
+
+        # The boundary appears (minus its CRLF) inside the data; only a full delimiter line ends the part.
+        boundary = "----oaBoundary7MA4YWxk"
+        content = b"x" * 70_000 + b"--" + boundary.encode() + b"\r\n-" + b"y" * 10
+        body = (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="note"\r\n\r\nhi\r\n'
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="a.txt"\r\n'
+            "Content-Type: text/plain\r\n\r\n"
+        ).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+        status, row = self.post_raw(
+            f"/api/requests/{req_id}/attachments", body, {"Content-Type": f"multipart/form-data; boundary={boundary}"}, cookie
+        )
+        self.assertEqual(status, 201)
+        self.assertEqual((row["filename"], row["content_type"], row["size"]), ("a.txt", "text/plain", len(content)))
+        self.assertEqual(self.download(row["id"], cookie)[1], content)
+        self.assertEqual(list((self.httpd.attachments_dir / ".tmp").iterdir()), [])
+
+    def test_limits_and_access(self):
+        cookie = self.login("user", "user")
+        req_id = self.create_request(cookie)
+        path = f"/api/requests/{req_id}/attachments?filename=big.bin"
+        headers = {"Content-Type": "application/octet-stream"}
+
+        status, data = self.post_raw(path, b"z" * (256 * 1024 + 1), headers, cookie)
+        self.assertEqual((status, data), (413, {"error": "too_large"}))
+        status, data = self.post_raw(f"/api/requests/{req_id}/attachments", b"abc", headers, cookie)
+        self.assertEqual((status, data), (400, {"error": "missing_fields"}))
+        status, _ = self.post_raw("/api/requests/999999/attachments?filename=a", b"abc", headers, cookie)
+        self.assertEqual(status, 404)
+        status, _ = self.post_raw(path, b"abc", headers, self.login("admin", "admin"))
+        self.assertEqual(status, 201)
+
+        # A multipart body that hides an oversized file is cut off while streaming.
+        boundary = "b0undary"
+        body = (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="big.bin"\r\n\r\n'.encode()
+            + b"z" * (256 * 1024 + 10)
+            + f"\r\n--{boundary}--\r\n".encode()
+        )
+        status, data = self.post_raw(
+            f"/api/requests/{req_id}/attachments", body, {"Content-Type": f"multipart/form-data; boundary={boundary}"}, cookie
+        )
+        self.assertEqual((status, data), (413, {"error": "too_large"}))
+        self.assertEqual(list((self.httpd.attachments_dir / ".tmp").iterdir()), [])
+
+
+class TestMultipartParser(unittest.TestCase):
+    def test_one_byte_chunks(self):
+        body = (
+            b"preamble\r\n--XX\r\nContent-Disposition: form-data; name=\"a\"\r\n\r\n1\r\n"
+            b"--XX\r\nContent-Disposition: form-data; name=\"f\"; filename=\"C:\\\\dir\\\\r.txt\"\r\n\r\n"
+            b"\r\n--X body\r\n--XX--\r\n"
+        )
+        filename, ctype, data = multipart_file((body[i : i + 1] for i in range(len(body))), "XX")
+        self.assertEqual(ctype, None)
+        self.assertEqual(b"".join(data), b"\r\n--X body")
+        self.assertTrue(filename.endswith("r.txt"))
+
+    def test_malformed(self):
+        with self.assertRaisesRegex(ValueError, "missing_file"):
+            multipart_file([b'--XX\r\nContent-Disposition: form-data; name="a"\r\n\r\n1\r\n--XX--\r\n'], "XX")
+        with self.assertRaisesRegex(ValueError, "invalid_multipart"):
+            multipart_file([b"--XX\r\nContent-Disposition: form-data"], "XX")
+
+
+class TestAttachmentDownloadRanges(BaseAPITestCase):
+    def get(self, path, cookie, headers=None):
+        conn = HTTPConnection("127.0.0.1", self.port, timeout=5)
+        conn.request("GET", path, headers={"Cookie": cookie, **(headers or {})})
+        res = conn.getresponse()
+        body = res.read()
+        conn.close()
+        return res.status, res, body
+
+    def test_ranges_and_conditionals(self):
+        cookie = self.login("user", "user")
+        status, _, created = self.http(
+            "POST", "/api/requests", cookie=cookie, json_body={"type": "generic", "title": "dl", "body": "b"}
+        )
+        content = os.urandom(300 * 1024)
+        conn = HTTPConnection("127.0.0.1", self.port, timeout=5)
+        conn.request(
+            "POST",
+            f"/api/requests/{created['id']}/attachments?filename=doc.pdf",
+            body=content,
+            headers={"Cookie": cookie, "Content-Type": "application/pdf"},
+        )
+        res = conn.getresponse()
+        att_id = json.loads(res.read())["id"]
+        conn.close()
+        path = f"/api/attachments/{att_id}/download"
+
+        status, res, body = self.get(path, cookie)
+        self.assertEqual((status, body), (200, content))
+        self.assertEqual(res.getheader("Accept-Ranges"), "bytes")
+        etag = res.getheader("ETag")
+        last_modified = res.getheader("Last-Modified")
+
+        status, res, body = self.get(path, cookie, {"Range": "bytes=100-199"})
+        self.assertEqual((status, body), (206, content[100:200]))
+        self.assertEqual(res.getheader("Content-Range"), f"bytes 100-199/{len(content)}")
+        status, _, body = self.get(path, cookie, {"Range": "bytes=-10"})
+        self.assertEqual((status, body), (206, content[-10:]))
+        status, _, body = self.get(path, cookie, {"Range": "bytes=300000-"})
+        self.assertEqual((status, body), (206, content[300000:]))
+        status, res, body = self.get(path, cookie, {"Range": f"bytes={len(content)}-"})
+        self.assertEqual((status, body), (416, b""))
+        self.assertEqual(res.getheader("Content-Range"), f"bytes */{len(content)}")
+        status, _, body = self.get(path, cookie, {"Range": "bytes=0-1,5-6"})
+        self.assertEqual((status, body), (200, content))
+
+        status, _, body = self.get(path, cookie, {"Range": "bytes=0-9", "If-Range": etag})
+        self.assertEqual((status, body), (206, content[:10]))
+        status, _, body = self.get(path, cookie, {"Range": "bytes=0-9", "If-Range": last_modified})
+        self.assertEqual((status, body), (206, content[:10]))
+        status, _, body = self.get(path, cookie, {"Range": "bytes=0-9", "If-Range": '"old"'})
+        self.assertEqual((status, body), (200, content))
+
+        status, _, body = self.get(path, cookie, {"If-None-Match": etag})
+        self.assertEqual((status, body), (304, b""))
+        status, _, _ = self.get(path, self.login("admin", "admin"), {"Range": "bytes=0-0"})
+        self.assertEqual(status, 206)
+
+
+class TestParseRange(unittest.TestCase):
+    def test_parse_range(self):
+        self.assertEqual(parse_range("bytes=0-0", 10), (0, 0))
+        self.assertEqual(parse_range("bytes=5-100", 10), (5, 9))
+        self.assertEqual(parse_range("bytes=-100", 10), (0, 9))
+        for header in (None, "", "items=0-1", "bytes=5-1", "bytes=-", "bytes=a-b", "bytes=0-1,3-4"):
+            self.assertIsNone(parse_range(header, 10), header)
+        for header in ("bytes=10-", "bytes=-0"):
+            with self.assertRaisesRegex(ValueError, "unsatisfiable"):
+                parse_range(header, 10)
+
+
+class TestBlobStore(BaseAPITestCase):
+    def upload(self, cookie, req_id, content):
+        conn = HTTPConnection("127.0.0.1", self.port, timeout=5)
+        conn.request(
+            "POST",
+            f"/api/requests/{req_id}/attachments?filename=template.pdf",
+            body=content,
+            headers={"Cookie": cookie, "Content-Type": "application/pdf"},
+        )
+        res = conn.getresponse()
+        row = json.loads(res.read())
+        conn.close()
+        self.assertEqual(res.status, 201)
+        return row["id"]
+
+    def test_dedup_and_collect(self):
+        cookie = self.login("user", "user")
+        req_ids = []
+        for title in ("a", "b"):
+            _, _, created = self.http("POST", "/api/requests", cookie=cookie, json_body={"type": "generic", "title": title, "body": "b"})
+            req_ids.append(created["id"])
+        shared = os.urandom(10_000)
+        digest = hashlib.sha256(shared).hexdigest()
+        first = self.upload(cookie, req_ids[0], shared)
+        status, _, _ = self.http(
+            "POST",
+            f"/api/requests/{req_ids[1]}/attachments",
+            cookie=cookie,
+            json_body={"filename": "copy.pdf", "content_base64": base64.b64encode(shared).decode("ascii")},
+        )
+        self.assertEqual(status, 201)
+        other = self.upload(cookie, req_ids[1], b"something else")
+
+        blob = self.httpd.attachments_dir / blob_storage_path(digest)
+        with db.connect(self.db_path) as conn:
+            self.assertEqual(db.count_blob_refs(conn, digest), 2)
+            paths = {str(r["storage_path"]) for r in conn.execute("SELECT storage_path FROM attachments WHERE sha256=?", (digest,))}
+        self.assertEqual(paths, {blob_storage_path(digest)})
+        self.assertEqual(blob.read_bytes(), shared)
+
+        conn = HTTPConnection("127.0.0.1", self.port, timeout=5)
+        conn.request("GET", f"/api/attachments/{first}/download", headers={"Cookie": cookie})
+        res = conn.getresponse()
+        self.assertEqual((res.read(), res.getheader("ETag")), (shared, f'"{digest}"'))
+        conn.close()
+
+        maintenance = Maintenance(self.httpd, interval=0, max_sessions_per_user=0, blob_grace=0)
+        with db.connect(self.db_path) as conn:
+            conn.execute("DELETE FROM attachments WHERE id=?", (first,))
+        self.assertEqual(maintenance.run_once()["blobs_collected"], 0)
+        self.assertTrue(blob.exists())
+
+        with db.connect(self.db_path) as conn:
+            conn.execute("DELETE FROM attachments WHERE sha256=?", (digest,))
+        # Still inside the default grace period: kept.
+        self.assertEqual(Maintenance(self.httpd, interval=0, max_sessions_per_user=0).run_once()["blobs_collected"], 0)
+        self.assertEqual(maintenance.run_once()["blobs_collected"], 1)
+        self.assertFalse(blob.exists())
+        self.assertEqual(maintenance.stats()["blob_bytes_freed"], len(shared))
+        self.assertEqual(self.http("GET", f"/api/attachments/{other}/download", cookie=cookie, expect_json=False)[2], b"something else")
+
+
+class TestAttachmentArchive(BaseAPITestCase):
+    def upload(self, cookie, req_id, filename, content):
+        conn = HTTPConnection("127.0.0.1", self.port, timeout=5)
+        conn.request(
+            "POST",
+            f"/api/requests/{req_id}/attachments?filename={filename}",
+            body=content,
+            headers={"Cookie": cookie, "Content-Type": "application/octet-stream"},
+        )
+        res = conn.getresponse()
+        row = json.loads(res.read())
+        conn.close()
+        self.assertEqual(res.status, 201)
+        return row["id"]
+
+    def archive(self, path, cookie):
+        status, headers, raw = self.http("GET", path, cookie=cookie, expect_json=False)
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["Content-Type"], "application/zip")
+        self.assertEqual(headers.get("Transfer-Encoding"), "chunked")
+        with zipfile.ZipFile(io.BytesIO(raw)) as zf:
+            self.assertIsNone(zf.testzip())
+            return {name: zf.read(name) for name in zf.namelist()}
+
+    def test_request_and_bulk_archives(self):
+        with db.connect(self.db_path) as conn:
+            conn.execute(
+                "INSERT INTO users(username,password_hash,role,created_at) VALUES(?,?,?,?)",
+                ("archive_other", hash_password("archive_other"), "user", int(time.time())),
+            )
+        cookie = self.login("user", "user")
+        req_ids = []
+        for title in ("a", "b"):
+            _, _, created = self.http("POST", "/api/requests", cookie=cookie, json_body={"type": "generic", "title": title, "body": "b"})
+            req_ids.append(created["id"])
+        big = os.urandom(300_000)
+        self.upload(cookie, req_ids[0], "report.pdf", big)
+        second = self.upload(cookie, req_ids[0], "report.pdf", b"second version")
+        self.upload(cookie, req_ids[0], "notes.txt", b"")
+        self.upload(cookie, req_ids[1], "report.pdf", b"other request")
+
+        files = self.archive(f"/api/requests/{req_ids[0]}/attachments.zip", cookie)
+        # A repeated name gets the attachment id appended.
+        self.assertEqual(files, {"report.pdf": big, f"report ({second}).pdf": b"second version", "notes.txt": b""})
+
+        # Small pages so the bulk archive spans several keyset queries.
+        with mock.patch.object(api_get_attachments, "ARCHIVE_PAGE_SIZE", 2):
+            files = self.archive("/api/attachments.zip", cookie)
+        self.assertEqual(files[f"{req_ids[0]}/report.pdf"], big)
+        self.assertEqual(files[f"{req_ids[1]}/report.pdf"], b"other request")
+        self.assertEqual(len(files), 4)
+        self.assertEqual(len(self.archive("/api/attachments.zip", self.login("admin", "admin"))), 4)
+        self.assertEqual(self.archive(f"/api/attachments.zip?created_from={int(time.time()) + 3600}", cookie), {})
+        status, _, data = self.http("GET", "/api/attachments.zip?created_to=soon", cookie=cookie)
+        self.assertEqual((status, data), (400, {"error": "invalid_query"}))
+
+        other = self.login("archive_other", "archive_other")
+        status, _, _ = self.http("GET", f"/api/requests/{req_ids[0]}/attachments.zip", cookie=other)
+        self.assertEqual(status, 403)
+        status, _, _ = self.http("GET", "/api/requests/999999/attachments.zip", cookie=other)
+        self.assertEqual(status, 404)
+        self.assertEqual(self.archive("/api/attachments.zip", other), {})
@@ -0,0 +1,57 @@
+import threading
+
+from _support_api import BaseAPITestCase, db
+
+
+class TestDbConcurrency(BaseAPITestCase):
+    def test_default_durability_is_wal(self):
+        with db.connect(self.db_path) as conn:
+            mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+            sync = conn.execute("PRAGMA synchronous").fetchone()[0]
+        self.assertEqual(str(mode).lower(), "wal")
+        self.assertEqual(int(sync), 1)  # NORMAL
+
+    def test_inbox_reads_proceed_during_approvals(self):
+        user_cookie = self.login("user", "user")
+        admin_cookie = self.login("admin", "admin")
+
+        task_ids = []
+        for i in range(15):
+            status, _, created = self.http(
+                "POST",
+                "/api/requests",
+                cookie=user_cookie,
+                json_body={"type": "generic", "title": f"concurrent {i}", "body": "b"},
+            )
+            self.assertEqual(status, 201)
+            task_ids.append(created["pending_task"]["id"])
+
+        stop = threading.Event()
+        read_statuses: list[int] = []
+        lock = threading.Lock()
+
+        def reader():
+            while not stop.is_set():
+                status, _, _ = self.http("GET", "/api/inbox", cookie=admin_cookie)
+                with lock:
+                    read_statuses.append(status)
+
+        readers = [threading.Thread(target=reader) for _ in range(8)]
+        for t in readers:
+            t.start()
+        try:
+            for task_id in task_ids:
+                status, _, out = self.http("POST", f"/api/tasks/{task_id}/approve", cookie=admin_cookie, json_body={})
+                self.assertEqual(status, 200)
+                self.assertEqual(out["status"], "approved")
+        finally:
+            stop.set()
+            for t in readers:
+                t.join(timeout=10)
+
+        self.assertTrue(read_statuses)
+        self.assertEqual(set(read_statuses), {200})
+
+    def test_invalid_durability_profile(self):
+        with self.assertRaises(ValueError):
+            db.ConnectionPool(self.db_path, durability="nope")
@@ -0,0 +1,54 @@
+import os
+import time
+import uuid
+from pathlib import Path
+
+from _support_api import BaseAPITestCase, db
+
+
+class TestConnectionPool(BaseAPITestCase):
+    def _pool_path(self):
+        return Path("data") / f"_pool_{int(time.time())}_{os.getpid()}_{uuid.uuid4().hex}.sqlite3"
+
+    def test_pool_reuses_connections(self):
+        pool = db.ConnectionPool(self._pool_path(), max_size=2)
+        try:
+            with pool.connection() as conn:
+                conn.execute("CREATE TABLE t (x INTEGER)")
+                first = id(conn)
+            with pool.connection() as conn:
+                conn.execute("INSERT INTO t VALUES (1)")
+                self.assertEqual(id(conn), first)
+            self.assertEqual(pool.stats()["open"], 1)
+        finally:
+            pool.close()
+
+    def test_pool_max_size_and_timeout(self):
+        pool = db.ConnectionPool(self._pool_path(), max_size=1, timeout=0.05)
+        try:
+            conn = pool.acquire()
+            with self.assertRaises(TimeoutError):
+                pool.acquire()
+            pool.release(conn)
+            pool.release(pool.acquire())
+        finally:
+            pool.close()
+
+    def test_pool_discards_broken_connection(self):
+        pool = db.ConnectionPool(self._pool_path(), max_size=1, health_check_after=0)
+        try:
+            conn = pool.acquire()
+            pool.release(conn)
+            conn.close()
+            with pool.connection() as fresh:
+                self.assertIsNot(fresh, conn)
+                self.assertEqual(fresh.execute("SELECT 1").fetchone()[0], 1)
+        finally:
+            pool.close()
+
+    def test_api_requests_share_pooled_connections(self):
+        cookie = self.login("user", "user")
+        for _ in range(5):
+            status, _, _ = self.http("GET", "/api/me", cookie=cookie)
+            self.assertEqual(status, 200)
+        self.assertLessEqual(self.httpd.db_pool.stats()["open"], self.httpd.db_pool.max_size)
@@ -0,0 +1,79 @@
+import json
+import socket
+import time
+from http.client import HTTPConnection
+
+from _support_api import BaseAPITestCase
+
+
+class TestKeepAlive(BaseAPITestCase):
+    def _request(self, conn, method, path, *, body=None, cookie=None):
+        headers = {"Cookie": cookie} if cookie else {}
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+        conn.request(method, path, body=body, headers=headers)
+        res = conn.getresponse()
+        return res.status, res.getheader("Connection"), res.read()
+
+    def test_responses_reuse_one_connection(self):
+        conn = HTTPConnection("127.0.0.1", self.port, timeout=5)
+        try:
+            creds = json.dumps({"username": "admin", "password": "admin"})
+            conn.request("POST", "/api/login", body=creds, headers={"Content-Type": "application/json"})
+            res = conn.getresponse()
+            res.read()
+            cookie = res.getheader("Set-Cookie").split(";", 1)[0]
+            sock = conn.sock
+            # JSON, empty 204, static file, 404 and 401 with an unread body: all on the same socket.
+            calls = [
+                ("GET", "/api/me", None, cookie, 200),
+                ("POST", "/api/notifications/999999/read", None, cookie, 404),
+                ("POST", "/api/users/1", json.dumps({}), cookie, 204),
+                ("GET", "/index.html", None, None, 200),
+                ("POST", "/api/nope", json.dumps({"x": "y" * 1000}), cookie, 404),
+                ("POST", "/api/requests", json.dumps({"type": "generic"}), None, 401),
+                ("GET", "/api/inbox", None, cookie, 200),
+            ]
+            for method, path, body, c, expected in calls:
+                with self.subTest(path=path):
+                    status, connection, _ = self._request(conn, method, path, body=body, cookie=c)
+                    self.assertEqual(status, expected)
+                    self.assertNotEqual(connection, "close")
+                    self.assertIs(conn.sock, sock)
+        finally:
+            conn.close()
+
+    def test_max_requests_per_connection(self):
+        self.httpd.max_keepalive_requests = 3
+        conn = HTTPConnection("127.0.0.1", self.port, timeout=5)
+        try:
+            seen = [self._request(conn, "GET", "/api/me")[1] for _ in range(3)]
+            self.assertEqual(seen, [None, None, "close"])
+        finally:
+            conn.close()
+            self.httpd.max_keepalive_requests = 100
+
+    def test_large_unread_body_closes_connection(self):
+        conn = HTTPConnection("127.0.0.1", self.port, timeout=5)
+        try:
+            status, connection, _ = self._request(conn, "POST", "/api/nope", body=b"x" * (256 * 1024))
+            self.assertEqual(status, 404)
+            self.assertEqual(connection, "close")
+        finally:
+            conn.close()
+
+    def test_idle_connection_times_out(self):
+        self.httpd.keepalive_timeout = 0.2
+        try:
+            with socket.create_connection(("127.0.0.1", self.port), timeout=5) as s:
+                s.sendall(b"GET /api/me HTTP/1.1\r\nHost: x\r\n\r\n")
+                time.sleep(0.6)
+                received = b""
+                while True:
+                    data = s.recv(65536)
+                    if not data:
+                        break
+                    received += data
+            self.assertTrue(received.startswith(b"HTTP/1.1 401"))
+        finally:
+            self.httpd.keepalive_timeout = 15.0
@@ -0,0 +1,121 @@
+import threading
+import unittest
+
+from _support_api import BaseAPITestCase, db
+
+from oa_server.auth import (
+    PBKDF2Hasher,
+    ScryptHasher,
+    calibrate_hasher,
+    configure_password_hasher,
+    hash_password,
+    needs_rehash,
+    password_hasher,
+    verify_password,
+)
+from oa_server._server.password_verifier import PasswordVerifier
+
+
+class TestPasswordHashers(unittest.TestCase):
+    def test_schemes_round_trip_and_flag_stale_parameters(self):
+        for hasher in (PBKDF2Hasher(iterations=1000), ScryptHasher(n=2**10)):
+            stored = hash_password("pw", hasher)
+            self.assertTrue(stored.startswith(hasher.scheme + "$"))
+            self.assertTrue(verify_password("pw", stored))
+            self.assertFalse(verify_password("nope", stored))
+            self.assertFalse(needs_rehash(stored, hasher))
+        self.assertTrue(needs_rehash(hash_password("pw", PBKDF2Hasher(iterations=1000)), PBKDF2Hasher(iterations=2000)))
+        self.assertTrue(needs_rehash(hash_password("pw", PBKDF2Hasher(iterations=1000)), ScryptHasher()))
+        self.assertFalse(verify_password("pw", "md5$x$y$z"))
+        self.assertFalse(needs_rehash("garbage"))
+
+    def test_calibrate_pbkdf2(self):
+        hasher = calibrate_hasher("pbkdf2_sha256", 20)
+        self.assertIsInstance(hasher, PBKDF2Hasher)
+        self.assertGreaterEqual(hasher.iterations, 10_000)
+        with self.assertRaises(ValueError):
+            calibrate_hasher("md5", 20)
+
+
+class TestPasswordVerifier(unittest.TestCase):
+    def test_full_slots_raise_timeout(self):
+        verifier = PasswordVerifier(max_concurrent=1, wait=0.05)
+        stored = hash_password("pw")
+        self.assertTrue(verifier.verify("pw", stored))
+        self.assertFalse(verifier.verify("nope", stored))
+
+        verifier._slots.acquire()  # a login stuck hashing
+        try:
+            with self.assertRaises(TimeoutError):
+                verifier.verify("pw", stored)
+        finally:
+            verifier._slots.release()
+        self.assertEqual(verifier.stats()["rejected"], 1)
+        self.assertEqual(verifier.stats()["active"], 0)
+
+
+class TestLoginOnProcessPool(BaseAPITestCase):
+    server_kwargs = {"login_processes": 1, "login_concurrency": 2, "db_pool_size": 1}
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.httpd.server_close()
+
+    def test_login_hashes_on_the_pool(self):
+        status, _, _ = self.http("POST", "/api/login", json_body={"username": "user", "password": "wrong"})
+        self.assertEqual(status, 401)
+        results = []
+
+        def login():
+            status, headers, _ = self.http("POST", "/api/login", json_body={"username": "user", "password": "user"})
+            results.append(status)
+
+        threads = [threading.Thread(target=login) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(results, [200, 200])
+
+        cookie = self.login("admin", "admin")
+        status, _, metrics = self.http("GET", "/api/admin/metrics", cookie=cookie)
+        self.assertEqual(status, 200)
+        self.assertEqual(metrics["login"]["processes"], 1)
+        self.assertEqual(metrics["login"]["active"], 0)
+        self.assertGreaterEqual(metrics["login"]["hashed"], 4)
+
+    def test_db_connection_is_released_while_hashing(self):
+        verifier = self.httpd.password_verifier
+        pool = self.httpd.db_pool
+        seen = []
+
+        class Probe:
+            def verify(self, password, stored):
+                stats = pool.stats()
+                seen.append(stats["open"] - stats["idle"])
+                return verifier.verify(password, stored)
+
+        self.httpd.password_verifier = Probe()
+        try:
+            self.login("user", "user")
+        finally:
+            self.httpd.password_verifier = verifier
+        self.assertEqual(seen, [0])
+
+    def test_login_rehashes_stale_password(self):
+        with db.connect(self.db_path) as conn:
+            conn.execute(
+                "INSERT INTO users(username,password_hash,role,created_at) VALUES(?,?,?,strftime('%s','now'))",
+                ("rehash_user", hash_password("rehash_user", PBKDF2Hasher(iterations=1000)), "user"),
+            )
+        previous = password_hasher()
+        configure_password_hasher(ScryptHasher(n=2**10))
+        try:
+            self.login("rehash_user", "rehash_user")
+        finally:
+            configure_password_hasher(previous)
+        with db.connect(self.db_path) as conn:
+            stored = str(db.get_user_by_username(conn, "rehash_user")["password_hash"])
+        self.assertTrue(stored.startswith("scrypt$1024:8:1$"))
+        self.login("rehash_user", "rehash_user")
@@ -0,0 +1,53 @@
+import time
+
+from _support_api import BaseAPITestCase, db
+
+from oa_server._server.maintenance import SWEEP_BATCH, Maintenance
+
+
+class TestMaintenance(BaseAPITestCase):
+    server_kwargs = {"maintenance_interval": 0, "max_sessions_per_user": 2}
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.httpd.server_close()
+
+    def test_sweep_deletes_expired_and_trims_per_user(self):
+        now = int(time.time())
+        expired = SWEEP_BATCH * 2 + 7
+        with db.connect(self.db_path) as conn:
+            user_id = int(db.get_user_by_username(conn, "user")["id"])
+            conn.executemany(
+                "INSERT INTO sessions(token,user_id,expires_at) VALUES(?,?,?)",
+                [(f"old-{i}", user_id, now - 10) for i in range(expired)]
+                + [(f"live-{i}", user_id, now + 3600 + i) for i in range(4)],
+            )
+        cookies = [f"oa_session=live-{i}" for i in range(4)]
+        for cookie in cookies:
+            self.assertEqual(self.http("GET", "/api/me", cookie=cookie)[0], 200)  # now cached
+
+        result = self.httpd.maintenance.run_once()
+        self.assertEqual(result, {"sessions_expired": expired, "sessions_trimmed": 2, "uploads_expired": 0, "blobs_collected": 0})
+        self.assertEqual([self.http("GET", "/api/me", cookie=c)[0] for c in cookies], [401, 401, 200, 200])
+
+        admin = self.login("admin", "admin")
+        status, _, metrics = self.http("GET", "/api/admin/metrics", cookie=admin)
+        self.assertEqual(status, 200)
+        stats = metrics["maintenance"]
+        self.assertEqual(stats["runs"], 1)
+        self.assertEqual(stats["sessions_expired"], expired)
+        self.assertEqual(stats["sessions_trimmed"], 2)
+        self.assertIsNotNone(stats["last_duration_ms"])
+
+    def test_thread_runs_on_interval(self):
+        maintenance = Maintenance(self.httpd, interval=0.05, max_sessions_per_user=0)
+        maintenance.start()
+        try:
+            deadline = time.time() + 5
+            while maintenance.stats()["runs"] < 2:
+                self.assertLess(time.time(), deadline)
+                time.sleep(0.02)
+        finally:
+            maintenance.stop()
+        self.assertIsNone(maintenance.stats()["last_error"])
@@ -0,0 +1,89 @@
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import unittest
+import uuid
+from http.client import HTTPConnection
+from pathlib import Path
+
+from _support_api import TEST_ENGINE
+
+
+@unittest.skipUnless(hasattr(os, "fork"), "pre-fork mode needs os.fork")
+class TestPreforkServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Path("data").mkdir(parents=True, exist_ok=True)
+        cls.db_path = Path("data") / f"_test_prefork_{os.getpid()}_{uuid.uuid4().hex}.sqlite3"
+        cls.proc = subprocess.Popen(
+            [sys.executable, "-m", "oa_server", "--workers", "2", "--port", "0", "--db", str(cls.db_path), "--engine", TEST_ENGINE],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+        # "OA server running on http://127.0.0.1:<port>/ (2 workers)"
+        line = cls.proc.stdout.readline()
+        cls.port = int(line.split("127.0.0.1:")[1].split("/")[0])
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.proc.poll() is None:
+            cls.proc.kill()
+            cls.proc.wait(5)
+        cls.proc.stdout.close()
+
+    def http(self, method, path, *, json_body=None, cookie=None):
+        conn = HTTPConnection("127.0.0.1", self.port, timeout=5)
+        headers = {"Cookie": cookie} if cookie else {}
+        body = None
+        if json_body is not None:
+            body = json.dumps(json_body).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        conn.request(method, path, body=body, headers=headers)
+        res = conn.getresponse()
+        raw = res.read()
+        conn.close()
+        return res.status, res.getheader("Set-Cookie"), json.loads(raw) if raw else None
+
+    def login(self, username, password):
+        status, set_cookie, _ = self.http("POST", "/api/login", json_body={"username": username, "password": password})
+        self.assertEqual(status, 200)
+        return set_cookie.split(";", 1)[0]
+
+    def worker_pids(self, cookie, attempts=40):
+        pids = set()
+        for _ in range(attempts):
+            status, _, metrics = self.http("GET", "/api/admin/metrics", cookie=cookie)
+            self.assertEqual(status, 200)
+            pids.add(metrics["http"]["pid"])
+        return pids
+
+    def test_workers_share_socket_caches_and_restart(self):
+        admin = self.login("admin", "admin")
+        pids = self.worker_pids(admin)
+        self.assertEqual(len(pids), 2)
+        self.assertNotIn(self.proc.pid, pids)
+
+        # A logout handled by one worker must end the session in the other worker's cache too.
+        user = self.login("user", "user")
+        for _ in range(10):
+            self.assertEqual(self.http("GET", "/api/me", cookie=user)[0], 200)
+        self.http("POST", "/api/logout", cookie=user)
+        self.assertEqual({self.http("GET", "/api/me", cookie=user)[0] for _ in range(10)}, {401})
+
+        # The supervisor replaces a crashed worker.
+        victim = min(pids)
+        os.kill(victim, signal.SIGKILL)
+        deadline = time.time() + 10
+        while True:
+            now_pids = self.worker_pids(admin, attempts=20)
+            if victim not in now_pids and len(now_pids) == 2:
+                break
+            self.assertLess(time.time(), deadline)
+            time.sleep(0.2)
+
+        self.proc.send_signal(signal.SIGTERM)
+        self.assertEqual(self.proc.wait(10), 0)
@@ -0,0 +1,73 @@
+import time
+import uuid
+from pathlib import Path
+
+from _support_api import BaseAPITestCase, db, hash_password
+
+
+class TestRbacPermissionCache(BaseAPITestCase):
+    def _add_user(self, username, role):
+        with db.connect(self.db_path) as conn:
+            conn.execute(
+                "INSERT INTO users(username,password_hash,role,created_at) VALUES(?,?,?,?)",
+                (username, hash_password(username), role, int(time.time())),
+            )
+        return self.login(username, username)
+
+    def test_wildcards(self):
+        granted = frozenset({"requests:*", "inbox:read"})
+        self.assertTrue(db.permission_granted(granted, "requests:read_all"))
+        self.assertTrue(db.permission_granted(granted, "inbox:read"))
+        self.assertFalse(db.permission_granted(granted, "inbox:write"))
+        self.assertFalse(db.permission_granted(granted, "requests"))
+        self.assertTrue(db.permission_granted(frozenset({"*"}), "rbac:manage"))
+
+    def test_checks_are_served_from_the_matrix(self):
+        with db.connect(self.db_path) as conn:
+            db.invalidate_permission_cache()
+            statements: list[str] = []
+            conn.set_trace_callback(statements.append)
+            for _ in range(5):
+                self.assertTrue(db.role_has_permission(conn, "user", "inbox:read"))
+                self.assertFalse(db.role_has_permission(conn, "user", "requests:read_all"))
+            conn.set_trace_callback(None)
+        self.assertEqual(len([s for s in statements if "role_permissions" in s]), 1)
+
+    def test_role_changes_apply_immediately(self):
+        admin_cookie = self.login("admin", "admin")
+        cookie = self._add_user("wild_auditor", "wild_auditor")
+
+        status, _, _ = self.http(
+            "POST", "/api/admin/roles", cookie=admin_cookie, json_body={"role": "wild_auditor", "permissions": ["inbox:read"]}
+        )
+        self.assertEqual(status, 201)
+        self.assertEqual(self.http("GET", "/api/requests?scope=all", cookie=cookie)[0], 403)
+
+        status, _, _ = self.http(
+            "POST", "/api/admin/roles", cookie=admin_cookie, json_body={"role": "wild_auditor", "permissions": ["requests:*"]}
+        )
+        self.assertEqual(status, 201)
+        self.assertEqual(self.http("GET", "/api/requests?scope=all", cookie=cookie)[0], 200)
+        status, _, me = self.http("GET", "/api/me", cookie=cookie)
+        self.assertEqual(me["permissions"], ["requests:*"])
+
+        status, _, _ = self.http(
+            "POST", "/api/admin/roles", cookie=admin_cookie, json_body={"role": "wild_auditor", "permissions": []}
+        )
+        self.assertEqual(status, 201)
+        self.assertEqual(self.http("GET", "/api/requests?scope=all", cookie=cookie)[0], 403)
+
+    def test_matrix_is_per_database(self):
+        other = Path("data") / f"_test_rbac_{uuid.uuid4().hex}.sqlite3"
+        db.init_db(other)
+        try:
+            with db.connect(other) as conn:
+                db.upsert_role(conn, "only_there")
+                db.replace_role_permissions(conn, "only_there", ["*"])
+            with db.connect(other) as conn:
+                self.assertTrue(db.role_has_permission(conn, "only_there", "rbac:manage"))
+            with db.connect(self.db_path) as conn:
+                self.assertFalse(db.role_has_permission(conn, "only_there", "rbac:manage"))
+        finally:
+            for suffix in ("", "-wal", "-shm"):
+                other.with_name(other.name + suffix).unlink(missing_ok=True)
@@ -0,0 +1,84 @@
+import csv
+import io
+import json
+import socket
+import time
+import uuid
+
+from _support_api import BaseAPITestCase, db
+
+
+class TestRequestsExport(BaseAPITestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tag = uuid.uuid4().hex[:8]
+        now = int(time.time())
+        with db.connect(cls.db_path) as conn:
+            for i in range(1200):
+                db.create_request(
+                    conn,
+                    2,
+                    "expense",
+                    f"export-{cls.tag} #{i}",
+                    'line "one",\nline two',
+                    payload_json=json.dumps({"amount": i, "category": "差旅"}, ensure_ascii=False),
+                    workflow_key=None,
+                )
+            conn.execute("UPDATE requests SET created_at=? WHERE title LIKE ?", (now, f"export-{cls.tag}%"))
+
+    def test_csv_is_chunked_and_complete(self):
+        cookie = self.login("admin", "admin")
+        status, headers, raw = self.http(
+            "GET", f"/api/requests?scope=all&format=csv&q={self.tag}", cookie=cookie, expect_json=False
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(headers.get("Transfer-Encoding"), "chunked")
+        self.assertNotIn("Content-Length", headers)
+        rows = list(csv.reader(io.StringIO(raw.decode("utf-8"))))
+        self.assertEqual(rows[0], ["id", "type", "title", "body", "status", "owner_username", "created_at"])
+        self.assertEqual(len(rows), 1201)
+        self.assertEqual(rows[1][2], f"export-{self.tag} #1199")
+        self.assertEqual(rows[1][3], 'line "one",\nline two')
+        self.assertEqual(rows[1][5], "user")
+
+    def test_ndjson_with_selected_columns(self):
+        cookie = self.login("user", "user")
+        status, headers, raw = self.http(
+            "GET",
+            f"/api/requests?scope=mine&format=ndjson&columns=id,title,payload&q={self.tag}",
+            cookie=cookie,
+            expect_json=False,
+        )
+        self.assertEqual(status, 200)
+        self.assertTrue(headers.get("Content-Type", "").startswith("application/x-ndjson"))
+        lines = raw.decode("utf-8").splitlines()
+        self.assertEqual(len(lines), 1200)
+        first = json.loads(lines[0])
+        self.assertEqual(set(first), {"id", "title", "payload"})
+        self.assertEqual(first["payload"], {"amount": 1199, "category": "差旅"})
+
+    def test_invalid_columns_rejected(self):
+        cookie = self.login("admin", "admin")
+        status, _, err = self.http("GET", "/api/requests?format=csv&columns=id,password_hash", cookie=cookie)
+        self.assertEqual(status, 400)
+        self.assertEqual(err["error"], "invalid_columns")
+
+    def test_http10_client_gets_close_delimited_body(self):
+        cookie = self.login("admin", "admin")
+        with socket.create_connection(("127.0.0.1", self.port), timeout=5) as s:
+            s.sendall(
+                f"GET /api/requests?scope=all&format=ndjson&columns=id&q={self.tag} HTTP/1.0\r\nCookie: {cookie}\r\n\r\n".encode()
+            )
+            chunks = []
+            while True:
+                data = s.recv(65536)
+                if not data:
+                    break
+                chunks.append(data)
+        head, _, body = b"".join(chunks).partition(b"\r\n\r\n")
+        # The server speaks HTTP/1.1 but must not send a 1.0 client chunked encoding.
+        self.assertTrue(head.startswith(b"HTTP/1.1 200"))
+        self.assertNotIn(b"Transfer-Encoding", head)
+        self.assertIn(b"Connection: close", head)
+        self.assertEqual(len(body.decode("utf-8").splitlines()), 1200)
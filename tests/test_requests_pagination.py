@@ -0,0 +1,92 @@
+import uuid
+
+from _support_api import BaseAPITestCase
+
+
+class TestRequestsPagination(BaseAPITestCase):
+    def test_keyset_pages_cover_all_rows_once(self):
+        user_cookie = self.login("user", "user")
+        tag = uuid.uuid4().hex[:8]
+        created_ids = []
+        for i in range(7):
+            status, _, created = self.http(
+                "POST",
+                "/api/requests",
+                cookie=user_cookie,
+                json_body={"type": "generic", "title": f"page-{tag}-{i}", "body": "b"},
+            )
+            self.assertEqual(status, 201)
+            created_ids.append(created["id"])
+
+        seen = []
+        cursor = None
+        pages = 0
+        while True:
+            path = f"/api/requests?scope=mine&q={tag}&limit=3"
+            if cursor:
+                path += f"&cursor={cursor}"
+            status, _, data = self.http("GET", path, cookie=user_cookie)
+            self.assertEqual(status, 200)
+            self.assertLessEqual(len(data["items"]), 3)
+            seen.extend(it["id"] for it in data["items"])
+            pages += 1
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+        self.assertEqual(pages, 3)
+        self.assertEqual(seen, sorted(created_ids, reverse=True))
+
+    def test_server_side_filters(self):
+        user_cookie = self.login("user", "user")
+        admin_cookie = self.login("admin", "admin")
+        tag = uuid.uuid4().hex[:8]
+        status, _, leave = self.http(
+            "POST",
+            "/api/requests",
+            cookie=user_cookie,
+            json_body={"type": "generic", "title": f"filter-{tag}-a", "body": "b"},
+        )
+        self.assertEqual(status, 201)
+        status, _, other = self.http(
+            "POST",
+            "/api/requests",
+            cookie=admin_cookie,
+            json_body={"type": "generic", "title": f"filter-{tag}-b", "body": "b"},
+        )
+        self.assertEqual(status, 201)
+        status, _, _ = self.http("POST", f"/api/requests/{other['id']}/void", cookie=admin_cookie)
+        self.assertEqual(status, 200)
+
+        status, _, data = self.http("GET", f"/api/requests?scope=all&q={tag}&owner=user", cookie=admin_cookie)
+        self.assertEqual(status, 200)
+        self.assertEqual([it["id"] for it in data["items"]], [leave["id"]])
+
+        status, _, data = self.http("GET", f"/api/requests?scope=all&q={tag}&status=voided", cookie=admin_cookie)
+        self.assertEqual([it["id"] for it in data["items"]], [other["id"]])
+
+        status, _, data = self.http("GET", f"/api/requests?scope=all&q={tag}&type=generic", cookie=admin_cookie)
+        self.assertEqual(len(data["items"]), 2)
+
+        created_at = leave["created_at"]
+        status, _, data = self.http(
+            "GET",
+            f"/api/requests?scope=all&q={tag}&created_from={created_at + 3600}",
+            cookie=admin_cookie,
+        )
+        self.assertEqual(data["items"], [])
+
+        status, _, data = self.http("GET", f"/api/requests?scope=all&q={tag}&created_to={created_at + 3600}", cookie=admin_cookie)
+        self.assertEqual(len(data["items"]), 2)
+
+        status, _, err = self.http("GET", "/api/requests?limit=abc", cookie=admin_cookie)
+        self.assertEqual(status, 400)
+        self.assertEqual(err["error"], "invalid_query")
+
+    def test_like_wildcards_are_literal(self):
+        user_cookie = self.login("user", "user")
+        tag = uuid.uuid4().hex[:8]
+        self.http("POST", "/api/requests", cookie=user_cookie, json_body={"type": "generic", "title": f"{tag}_x", "body": "b"})
+        self.http("POST", "/api/requests", cookie=user_cookie, json_body={"type": "generic", "title": f"{tag}yx", "body": "b"})
+        status, _, data = self.http("GET", f"/api/requests?scope=mine&q={tag}_x", cookie=user_cookie)
+        self.assertEqual(status, 200)
+        self.assertEqual([it["title"] for it in data["items"]], [f"{tag}_x"])
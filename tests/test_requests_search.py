@@ -0,0 +1,101 @@
+import uuid
+from urllib.parse import quote
+
+from _support_api import BaseAPITestCase, db
+
+
+class TestRequestsFullTextSearch(BaseAPITestCase):
+    def _search(self, cookie, q, extra=""):
+        status, _, data = self.http("GET", f"/api/requests?scope=mine&q={quote(q)}{extra}", cookie=cookie)
+        self.assertEqual(status, 200)
+        return data
+
+    def test_fts_index_exists(self):
+        with db.connect(self.db_path) as conn:
+            self.assertTrue(db.fts_available(conn))
+
+    def test_chinese_substring_search(self):
+        user_cookie = self.login("user", "user")
+        tag = uuid.uuid4().hex[:8]
+        status, _, hit = self.http(
+            "POST",
+            "/api/requests",
+            cookie=user_cookie,
+            json_body={"type": "generic", "title": f"{tag} 年度差旅费用", "body": "b"},
+        )
+        self.assertEqual(status, 201)
+        self.http("POST", "/api/requests", cookie=user_cookie, json_body={"type": "generic", "title": f"{tag} 办公用品", "body": "b"})
+
+        for q in (f"差旅 {tag}", f"旅费 {tag}", f"差旅费用 {tag}", f"{tag} 旅"):
+            data = self._search(user_cookie, q)
+            self.assertEqual([it["id"] for it in data["items"]], [hit["id"]], q)
+        self.assertEqual(self._search(user_cookie, f"费旅 {tag}")["items"], [])
+
+    def test_payload_values_are_searchable(self):
+        user_cookie = self.login("user", "user")
+        tag = uuid.uuid4().hex[:8]
+        status, _, created = self.http(
+            "POST",
+            "/api/requests",
+            cookie=user_cookie,
+            json_body={"type": "expense", "title": "", "body": "", "payload": {"amount": 12, "category": f"cat{tag}"}},
+        )
+        self.assertEqual(status, 201)
+        data = self._search(user_cookie, f"cat{tag}")
+        self.assertEqual([it["id"] for it in data["items"]], [created["id"]])
+
+    def test_prefix_search_and_relevance_sort(self):
+        user_cookie = self.login("user", "user")
+        tag = uuid.uuid4().hex[:8]
+        status, _, in_title = self.http(
+            "POST",
+            "/api/requests",
+            cookie=user_cookie,
+            json_body={"type": "generic", "title": f"quarterly {tag}", "body": "b"},
+        )
+        self.assertEqual(status, 201)
+        status, _, in_body = self.http(
+            "POST",
+            "/api/requests",
+            cookie=user_cookie,
+            json_body={"type": "generic", "title": f"misc {tag}", "body": "quarterly report"},
+        )
+        self.assertEqual(status, 201)
+
+        data = self._search(user_cookie, f"{tag} quart")
+        self.assertEqual([it["id"] for it in data["items"]], [in_body["id"], in_title["id"]])
+
+        data = self._search(user_cookie, f"{tag} quarterly", "&sort=relevance&limit=1")
+        self.assertEqual([it["id"] for it in data["items"]], [in_title["id"]])
+        self.assertIsNone(data["next_cursor"])
+
+
+class TestRequestsSearchFallback(BaseAPITestCase):
+    def test_like_fallback_without_fts_table(self):
+        user_cookie = self.login("user", "user")
+        tag = uuid.uuid4().hex[:8]
+        status, _, created = self.http(
+            "POST",
+            "/api/requests",
+            cookie=user_cookie,
+            json_body={"type": "generic", "title": f"旧库{tag}", "body": "b"},
+        )
+        self.assertEqual(status, 201)
+        with db.connect(self.db_path) as conn:
+            # What a SQLite build without FTS5 looks like after migrations.
+            conn.execute("DROP TRIGGER requests_fts_delete")
+            conn.execute("DROP TABLE requests_fts")
+            self.assertFalse(db.fts_available(conn))
+
+        status, _, data = self.http("GET", f"/api/requests?scope=mine&q={quote('库' + tag)}", cookie=user_cookie)
+        self.assertEqual(status, 200)
+        self.assertEqual([it["id"] for it in data["items"]], [created["id"]])
+
+        # Writes keep working without the index.
+        status, _, _ = self.http(
+            "POST",
+            "/api/requests",
+            cookie=user_cookie,
+            json_body={"type": "generic", "title": f"second {tag}", "body": "b"},
+        )
+        self.assertEqual(status, 201)
@@ -0,0 +1,59 @@
+import unittest
+
+from _support_api import BaseAPITestCase
+
+from oa_server._server.router import Router
+
+
+def _handler(name):
+    def fn(handler, query, **params):
+        return name
+
+    fn.__name__ = name
+    return fn
+
+
+class TestRouter(unittest.TestCase):
+    def setUp(self):
+        self.router = Router()
+        self.get_wf = _handler("get_wf")
+        self.delete_wf = _handler("delete_wf")
+        self.approve = _handler("approve")
+        # Parameter route first: the static sibling must still win.
+        self.router.add("GET", "/api/admin/workflows/{workflow_key}", self.get_wf)
+        self.router.add("POST", "/api/admin/workflows/delete", self.delete_wf)
+        self.router.add("POST", "/api/tasks/{task_id:int}/approve", self.approve)
+
+    def test_static_params_and_misses(self):
+        self.assertEqual(self.router.resolve("POST", "/api/admin/workflows/delete"), (self.delete_wf, {}))
+        self.assertEqual(self.router.resolve("GET", "/api/admin/workflows/delete"), (self.get_wf, {"workflow_key": "delete"}))
+        self.assertEqual(self.router.resolve("POST", "/api/tasks/42/approve"), (self.approve, {"task_id": 42}))
+        for method, path in [
+            ("GET", "/api/tasks/42/approve"),
+            ("POST", "/api/tasks/42"),
+            ("POST", "/api/tasks//approve"),
+            ("GET", "/api/admin/workflows/a/b"),
+            ("GET", "/nope"),
+        ]:
+            with self.subTest(method=method, path=path):
+                self.assertIsNone(self.router.resolve(method, path))
+
+    def test_int_params_and_conflicts(self):
+        with self.assertRaisesRegex(ValueError, "invalid_id"):
+            self.router.resolve("POST", "/api/tasks/abc/approve")
+        with self.assertRaisesRegex(ValueError, "duplicate route"):
+            self.router.add("POST", "/api/tasks/{task_id:int}/approve", self.approve)
+        with self.assertRaisesRegex(ValueError, "conflicting parameter"):
+            self.router.add("POST", "/api/tasks/{id:int}/reject", self.approve)
+
+
+class TestRoutingAPI(BaseAPITestCase):
+    def test_status_codes(self):
+        cookie = self.login("admin", "admin")
+        self.assertEqual(self.http("GET", "/api/requests/abc", cookie=cookie)[0], 400)
+        self.assertEqual(self.http("POST", "/api/tasks/x/approve", cookie=cookie, json_body={})[0], 400)
+        self.assertEqual(self.http("GET", "/api/requests/1/nope", cookie=cookie)[0], 404)
+        self.assertEqual(self.http("GET", "/api/login", cookie=cookie)[0], 404)
+        status, _, body = self.http("GET", "/api/admin/workflows/expense", cookie=cookie)
+        self.assertEqual(status, 200)
+        self.assertEqual(body["workflow"]["key"], "expense")
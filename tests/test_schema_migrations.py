@@ -0,0 +1,48 @@
+import os
+import time
+import uuid
+from pathlib import Path
+
+from _support_api import BaseAPITestCase, db
+
+
+class TestSchemaMigrations(BaseAPITestCase):
+    def _fresh_db(self):
+        db_path = Path("data") / f"_mig_{int(time.time())}_{os.getpid()}_{uuid.uuid4().hex}.sqlite3"
+        db.init_db(db_path)
+        return db_path
+
+    def test_migrations_recorded_once(self):
+        db_path = self._fresh_db()
+        with db.connect(db_path) as conn:
+            rows = conn.execute("SELECT version, name FROM schema_migrations ORDER BY version").fetchall()
+        versions = [int(r["version"]) for r in rows]
+        self.assertEqual(versions, sorted(set(versions)))
+        self.assertIn("base_schema", {str(r["name"]) for r in rows})
+
+        db.init_db(db_path)
+        with db.connect(db_path) as conn:
+            again = conn.execute("SELECT COUNT(1) AS c FROM schema_migrations").fetchone()["c"]
+        self.assertEqual(int(again), len(versions))
+
+    def test_up_to_date_db_skips_migrations(self):
+        db_path = self._fresh_db()
+        with db.connect(db_path) as conn:
+            conn.execute("DELETE FROM role_permissions WHERE role_name='user'")
+
+        db.init_db(db_path)
+        with db.connect(db_path) as conn:
+            self.assertEqual(db.list_role_permissions(conn, "user"), [])
+
+    def test_legacy_db_without_migration_table_is_upgraded(self):
+        db_path = self._fresh_db()
+        with db.connect(db_path) as conn:
+            conn.execute("DROP TABLE schema_migrations")
+            conn.execute("DROP INDEX idx_tasks_request_status")
+
+        db.init_db(db_path)
+        with db.connect(db_path) as conn:
+            names = {str(r["name"]) for r in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+            users = conn.execute("SELECT COUNT(1) AS c FROM users").fetchone()["c"]
+        self.assertIn("idx_tasks_request_status", names)
+        self.assertEqual(int(users), 2)
@@ -0,0 +1,82 @@
+import time
+import unittest
+
+from _support_api import BaseAPITestCase, db, hash_password
+
+from oa_server._server.session import SessionCache
+from oa_server.auth import AuthenticatedUser
+
+
+class TestSessionCacheUnit(unittest.TestCase):
+    def test_lru_eviction_and_expiry(self):
+        cache = SessionCache(max_size=2, ttl=60)
+        now = int(time.time())
+        cache.put("a", AuthenticatedUser(id=1, username="a", role="user"), now + 100)
+        cache.put("b", AuthenticatedUser(id=2, username="b", role="user"), now + 100)
+        self.assertEqual(cache.get("a", now).username, "a")
+        cache.put("c", AuthenticatedUser(id=3, username="c", role="user"), now + 100)
+        self.assertIsNone(cache.get("b", now))
+        self.assertIsNotNone(cache.get("c", now))
+        self.assertIsNone(cache.get("a", now + 100))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"], stats["size"]), (2, 2, 1, 1))
+
+    def test_ttl_and_invalidate_user(self):
+        cache = SessionCache(max_size=10, ttl=0)
+        now = int(time.time())
+        cache.put("a", AuthenticatedUser(id=1, username="a", role="user"), now + 100)
+        self.assertIsNone(cache.get("a", now))
+
+        cache = SessionCache(max_size=10, ttl=60)
+        for token in ("x", "y"):
+            cache.put(token, AuthenticatedUser(id=7, username="u", role="user"), now + 100)
+        cache.put("z", AuthenticatedUser(id=8, username="v", role="user"), now + 100)
+        cache.invalidate_user(7)
+        self.assertIsNone(cache.get("x", now))
+        self.assertIsNone(cache.get("y", now))
+        self.assertIsNotNone(cache.get("z", now))
+
+
+class TestSessionCacheAPI(BaseAPITestCase):
+    def test_repeat_requests_hit_cache(self):
+        cookie = self.login("user", "user")
+        before = self.httpd.session_cache.stats()
+        for _ in range(3):
+            status, _, _ = self.http("GET", "/api/me", cookie=cookie)
+            self.assertEqual(status, 200)
+        after = self.httpd.session_cache.stats()
+        self.assertEqual(after["misses"] - before["misses"], 1)
+        self.assertEqual(after["hits"] - before["hits"], 2)
+
+    def test_logout_invalidates(self):
+        cookie = self.login("user", "user")
+        self.assertEqual(self.http("GET", "/api/me", cookie=cookie)[0], 200)
+        status, _, _ = self.http("POST", "/api/logout", cookie=cookie)
+        self.assertEqual(status, 204)
+        self.assertEqual(self.http("GET", "/api/me", cookie=cookie)[0], 401)
+
+    def test_user_update_invalidates(self):
+        with db.connect(self.db_path) as conn:
+            cur = conn.execute(
+                "INSERT INTO users(username,password_hash,role,created_at) VALUES(?,?,?,?)",
+                ("cache_user", hash_password("cache_user"), "user", int(time.time())),
+            )
+            user_id = int(cur.lastrowid)
+        admin_cookie = self.login("admin", "admin")
+        cookie = self.login("cache_user", "cache_user")
+        status, _, me = self.http("GET", "/api/me", cookie=cookie)
+        self.assertEqual(me["dept"], None)
+
+        status, _, _ = self.http("POST", f"/api/users/{user_id}", cookie=admin_cookie, json_body={"dept": "IT"})
+        self.assertEqual(status, 204)
+        status, _, me = self.http("GET", "/api/me", cookie=cookie)
+        self.assertEqual(me["dept"], "IT")
+
+    def test_metrics_endpoint(self):
+        admin_cookie = self.login("admin", "admin")
+        user_cookie = self.login("user", "user")
+        self.assertEqual(self.http("GET", "/api/admin/metrics", cookie=user_cookie)[0], 403)
+        status, _, data = self.http("GET", "/api/admin/metrics", cookie=admin_cookie)
+        self.assertEqual(status, 200)
+        self.assertIn("hits", data["session_cache"])
+        self.assertIn("open", data["db_pool"])
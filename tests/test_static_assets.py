@@ -0,0 +1,89 @@
+import gzip
+import os
+import tempfile
+import unittest
+from http.client import HTTPConnection
+from pathlib import Path
+
+from _support_api import BaseAPITestCase
+
+from oa_server._server.static_assets import AssetCache, accepts_gzip
+
+
+class TestStaticAssetHeaders(BaseAPITestCase):
+    def get(self, path, headers=None):
+        conn = HTTPConnection("127.0.0.1", self.port, timeout=5)
+        conn.request("GET", path, headers=headers or {})
+        res = conn.getresponse()
+        body = res.read()
+        conn.close()
+        return res.status, res, body
+
+    def test_etag_revalidation(self):
+        status, res, body = self.get("/js/api.js")
+        self.assertEqual(status, 200)
+        etag = res.getheader("ETag")
+        self.assertTrue(etag.startswith('"') and etag.endswith('"'))
+        self.assertEqual(res.getheader("Cache-Control"), "no-cache")
+        self.assertIsNotNone(res.getheader("Last-Modified"))
+        self.assertIsNone(res.getheader("Content-Encoding"))
+
+        status, res, body = self.get("/js/api.js", {"If-None-Match": etag})
+        self.assertEqual(status, 304)
+        self.assertEqual(body, b"")
+        self.assertEqual(res.getheader("ETag"), etag)
+
+        status, _, _ = self.get("/js/api.js", {"If-None-Match": '"stale"'})
+        self.assertEqual(status, 200)
+        status, _, _ = self.get("/js/api.js", {"If-Modified-Since": res.getheader("Last-Modified")})
+        self.assertEqual(status, 304)
+
+    def test_gzip_variant(self):
+        _, plain_res, plain = self.get("/index.html")
+        status, res, body = self.get("/index.html", {"Accept-Encoding": "br, gzip"})
+        self.assertEqual(status, 200)
+        self.assertEqual(res.getheader("Content-Encoding"), "gzip")
+        self.assertEqual(res.getheader("Vary"), "Accept-Encoding")
+        self.assertEqual(gzip.decompress(body), plain)
+        self.assertLess(len(body), len(plain))
+        self.assertNotEqual(res.getheader("ETag"), plain_res.getheader("ETag"))
+
+        status, res, _ = self.get("/index.html", {"Accept-Encoding": "gzip", "If-None-Match": res.getheader("ETag")})
+        self.assertEqual(status, 304)
+        _, res, _ = self.get("/index.html", {"Accept-Encoding": "gzip;q=0"})
+        self.assertIsNone(res.getheader("Content-Encoding"))
+
+
+class TestAssetCache(unittest.TestCase):
+    def test_reload_on_change_and_traversal(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp) / "frontend"
+            root.mkdir()
+            (Path(tmp) / "secret.txt").write_text("nope")
+            (root / "a.js").write_text("one")
+            cache = AssetCache(root)
+
+            first = cache.get("/a.js")
+            self.assertEqual(first.body, b"one")
+            self.assertIs(cache.get("/a.js"), first)
+            self.assertIs(cache.get("/./a.js"), first)
+            self.assertEqual(cache.stats()["entries"], 1)
+
+            (root / "a.js").write_text("two!")
+            os.utime(root / "a.js", ns=(first.stamp[0] + 10**9, first.stamp[0] + 10**9))
+            second = cache.get("/a.js")
+            self.assertEqual(second.body, b"two!")
+            self.assertNotEqual(second.etag, first.etag)
+
+            (root / "a.js").unlink()
+            self.assertIsNone(cache.get("/a.js"))
+            self.assertIsNone(cache.get("/missing.js"))
+            with self.assertRaises(PermissionError):
+                cache.get("/../secret.txt")
+
+    def test_accepts_gzip(self):
+        self.assertTrue(accepts_gzip("gzip, deflate"))
+        self.assertTrue(accepts_gzip("*"))
+        self.assertFalse(accepts_gzip("gzip;q=0"))
+        self.assertFalse(accepts_gzip("br"))
+        self.assertFalse(accepts_gzip(None))
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import socket
+import time
+from http.client import HTTPConnection
+
+from _support_api import BaseAPITestCase, db
+
+from oa_server._server.maintenance import Maintenance
+from oa_server._server.upload_sessions import STALE_AGE, UPLOADS_DIR
+
+
+class TestUploadSessions(BaseAPITestCase):
+    server_kwargs = {"max_upload_bytes": 1024 * 1024}
+
+    def setUp(self):
+        self.cookie = self.login("user", "user")
+        _, _, created = self.http(
+            "POST", "/api/requests", cookie=self.cookie, json_body={"type": "generic", "title": "scan", "body": "b"}
+        )
+        self.req_id = created["id"]
+
+    def start(self, content, **extra):
+        status, _, session = self.http(
+            "POST",
+            f"/api/requests/{self.req_id}/uploads",
+            cookie=self.cookie,
+            json_body={"filename": "scan.pdf", "content_type": "application/pdf", "size": len(content), **extra},
+        )
+        self.assertEqual(status, 201)
+        self.assertEqual(session["offset"], 0)
+        return session["id"]
+
+    def put(self, upload_id, offset, body, cookie=None):
+        conn = HTTPConnection("127.0.0.1", self.port, timeout=5)
+        conn.request(
+            "PUT",
+            f"/api/uploads/{upload_id}?offset={offset}",
+            body=body,
+            headers={"Cookie": cookie or self.cookie, "Content-Type": "application/octet-stream"},
+        )
+        res = conn.getresponse()
+        data = json.loads(res.read())
+        conn.close()
+        return res.status, data
+
+    def test_resume_after_dropped_chunk(self):
+        content = os.urandom(300_000)
+        upload_id = self.start(content, sha256=hashlib.sha256(content).hexdigest())
+
+        self.assertEqual(self.put(upload_id, 0, content[:100_000]), (200, {"id": upload_id, "offset": 100_000, "size": 300_000}))
+        self.assertEqual(self.put(upload_id, 0, content[:100_000]), (409, {"error": "offset_mismatch", "offset": 100_000}))
+
+        # The connection drops halfway through the second chunk.
+        tmp_dir = self.httpd.attachments_dir / ".tmp"
+        before = set(tmp_dir.iterdir())
+        sock = socket.create_connection(("127.0.0.1", self.port), timeout=5)
+        sock.sendall(
+            f"PUT /api/uploads/{upload_id}?offset=100000 HTTP/1.1\r\nHost: x\r\nCookie: {self.cookie}\r\n"
+            f"Content-Length: 100000\r\n\r\n".encode()
+            + content[100_000:150_000]
+        )
+        sock.close()
+        status, _, session = self.http("GET", f"/api/uploads/{upload_id}", cookie=self.cookie)
+        self.assertEqual((status, session["offset"]), (200, 100_000))
+
+        status, data = self.http("POST", f"/api/uploads/{upload_id}/finalize", cookie=self.cookie)[::2]
+        self.assertEqual((status, data), (409, {"error": "incomplete", "offset": 100_000}))
+        self.assertEqual(self.put(upload_id, 100_000, content[100_000:])[0], 200)
+        self.assertEqual(self.put(upload_id, 300_000, b"x")[0], 413)
+
+        status, _, row = self.http("POST", f"/api/uploads/{upload_id}/finalize", cookie=self.cookie)
+        self.assertEqual(status, 201)
+        self.assertEqual((row["filename"], row["size"], row["content_type"]), ("scan.pdf", 300_000, "application/pdf"))
+        status, _, raw = self.http("GET", f"/api/attachments/{row['id']}/download", cookie=self.cookie, expect_json=False)
+        self.assertEqual((status, raw), (200, content))
+        self.assertEqual(self.http("GET", f"/api/uploads/{upload_id}", cookie=self.cookie)[0], 404)
+        self.assertFalse((self.httpd.attachments_dir / UPLOADS_DIR / upload_id).exists())
+        self.assertEqual(set(tmp_dir.iterdir()), before)  # the dropped chunk's temp file too
+
+    def test_validation(self):
+        upload_id = self.start(b"abc", sha256="0" * 64)
+        admin = self.login("admin", "admin")
+        self.assertEqual(self.http("GET", f"/api/uploads/{upload_id}", cookie=admin)[0], 404)
+        self.assertEqual(self.put(upload_id, 0, b"abc", cookie=admin)[0], 404)
+        self.assertEqual(self.put(upload_id, 0, b"abcd"), (413, {"error": "too_large"}))
+        self.assertEqual(self.put(upload_id, 0, b"abc")[0], 200)
+        status, _, data = self.http("POST", f"/api/uploads/{upload_id}/finalize", cookie=self.cookie)
+        self.assertEqual((status, data), (400, {"error": "hash_mismatch"}))
+        self.assertEqual(self.http("GET", f"/api/uploads/{upload_id}", cookie=self.cookie)[0], 404)
+
+        status, _, data = self.http(
+            "POST", f"/api/requests/{self.req_id}/uploads", cookie=self.cookie, json_body={"filename": "a", "size": 2 * 1024 * 1024}
+        )
+        self.assertEqual((status, data), (413, {"error": "too_large"}))
+        status, _, data = self.http(
+            "POST", f"/api/requests/{self.req_id}/uploads", cookie=self.cookie, json_body={"filename": "a", "size": 1, "sha256": "xyz"}
+        )
+        self.assertEqual((status, data), (400, {"error": "invalid_sha256"}))
+        self.assertEqual(self.http("POST", "/api/requests/999999/uploads", cookie=self.cookie, json_body={"filename": "a", "size": 1})[0], 404)
+
+        upload_id = self.start(b"")
+        status, _, row = self.http("POST", f"/api/uploads/{upload_id}/finalize", cookie=self.cookie)
+        self.assertEqual((status, row["size"]), (201, 0))
+
+        upload_id = self.start(b"abc")
+        self.assertEqual(self.put(upload_id, 0, b"ab")[0], 200)
+        self.assertEqual(self.http("POST", f"/api/uploads/{upload_id}/cancel", cookie=self.cookie)[0], 200)
+        self.assertFalse((self.httpd.attachments_dir / UPLOADS_DIR / upload_id).exists())
+
+    def test_maintenance_expires_sessions_and_stale_files(self):
+        upload_id = self.start(b"abcdef")
+        self.assertEqual(self.put(upload_id, 0, b"abc")[0], 200)
+        with db.connect(self.db_path) as conn:
+            conn.execute("UPDATE upload_sessions SET expires_at=? WHERE id=?", (int(time.time()) - 1, upload_id))
+        old = time.time() - STALE_AGE - 60
+        tmp_dir = self.httpd.attachments_dir / ".tmp"
+        tmp_dir.mkdir(exist_ok=True)
+        (tmp_dir / "upload-crashed").write_bytes(b"x")
+        os.utime(tmp_dir / "upload-crashed", (old, old))
+        (tmp_dir / "upload-fresh").write_bytes(b"x")
+        orphan = self.httpd.attachments_dir / UPLOADS_DIR / "orphan"
+        orphan.mkdir(parents=True)
+        os.utime(orphan, (old, old))
+
+        maintenance = Maintenance(self.httpd, interval=0, max_sessions_per_user=0)
+        self.assertEqual(maintenance.run_once()["uploads_expired"], 1)
+        self.assertEqual(maintenance.stats()["stale_files_removed"], 2)
+        self.assertFalse((self.httpd.attachments_dir / UPLOADS_DIR / upload_id).exists())
+        self.assertFalse(orphan.exists())
+        self.assertEqual([p.name for p in tmp_dir.iterdir()], ["upload-fresh"])
+        (tmp_dir / "upload-fresh").unlink()
+        self.assertEqual(self.put(upload_id, 3, b"def")[0], 404)
@@ -0,0 +1,77 @@
+import socket
+import time
+from http.client import HTTPConnection
+
+from _support_api import BaseAPITestCase
+
+
+class TestWorkerPoolServer(BaseAPITestCase):
+    server_kwargs = {"engine": "threads", "server_mode": "pool", "threads": 1, "max_queue": 1}
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.httpd.server_close()
+
+    def _wait_for(self, predicate):
+        deadline = time.time() + 5
+        while not predicate():
+            self.assertLess(time.time(), deadline)
+            time.sleep(0.01)
+
+    def test_saturated_pool_answers_503(self):
+        pool = self.httpd.worker_pool
+        # The only worker is pinned by an idle keep-alive connection.
+        held = HTTPConnection("127.0.0.1", self.port, timeout=5)
+        held.request("GET", "/api/me")
+        res = held.getresponse()
+        res.read()
+        self.assertEqual(res.status, 401)
+        self.assertIsNone(res.getheader("Connection"))
+
+        queued = socket.create_connection(("127.0.0.1", self.port), timeout=5)
+        queued.sendall(b"GET /api/me HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n")
+        self._wait_for(lambda: pool.waiting() == 1)
+
+        with socket.create_connection(("127.0.0.1", self.port), timeout=5) as refused:
+            refused.sendall(b"GET /api/me HTTP/1.1\r\nHost: x\r\n\r\n")
+            reply = b""
+            while data := refused.recv(65536):
+                reply += data
+        head, _, body = reply.partition(b"\r\n\r\n")
+        self.assertTrue(head.startswith(b"HTTP/1.1 503"))
+        self.assertIn(b"Retry-After: 1", head)
+        self.assertEqual(body, b'{"error":"busy"}')
+
+        # Releasing the worker lets the queued connection through.
+        held.close()
+        reply = b""
+        while data := queued.recv(65536):
+            reply += data
+        queued.close()
+        self.assertTrue(reply.startswith(b"HTTP/1.1 401"))
+        self.assertEqual(pool.stats()["rejected"], 1)
+
+    def test_waiting_connections_end_keepalive(self):
+        cookie = self.login("admin", "admin")
+        status, _, metrics = self.http("GET", "/api/admin/metrics", cookie=cookie)
+        self.assertEqual(status, 200)
+        self.assertEqual(metrics["http"]["mode"], "pool")
+        self.assertEqual(metrics["http"]["threads"], 1)
+
+        held = HTTPConnection("127.0.0.1", self.port, timeout=5)
+        try:
+            held.request("GET", "/api/me")
+            held.getresponse().read()
+            queued = socket.create_connection(("127.0.0.1", self.port), timeout=5)
+            queued.sendall(b"GET /api/me HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n")
+            self._wait_for(lambda: self.httpd.worker_pool.waiting() == 1)
+            # The next response on the pinned connection hands the worker over.
+            held.request("GET", "/api/me")
+            res = held.getresponse()
+            res.read()
+            self.assertEqual(res.getheader("Connection"), "close")
+            self.assertTrue(queued.recv(65536).startswith(b"HTTP/1.1 401"))
+            queued.close()
+        finally:
+            held.close()
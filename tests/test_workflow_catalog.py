@@ -76,6 +76,8 @@ class TestWorkflowCatalog(BaseAPITestCase):
                 conn.execute("DELETE FROM workflow_variants WHERE workflow_key=?", (k,))
                 conn.execute("DELETE FROM workflow_steps WHERE request_type=?", (k,))
                 conn.execute("DELETE FROM workflow_definitions WHERE request_type=?", (k,))
+            # Migrations apply once; mark the catalog migration as not yet applied, like a DB that predates it.
+            conn.execute("DELETE FROM schema_migrations WHERE name='workflow_catalog'")
 
         db.init_db(db_path)
         with db.connect(db_path) as conn:
@@ -0,0 +1,81 @@
+import uuid
+
+from _support_api import BaseAPITestCase, db
+
+from oa_server._server import task_actions
+from oa_server._server.workflow_catalog import get_catalog
+from oa_server.auth import AuthenticatedUser
+
+
+class TestCompiledWorkflowCatalog(BaseAPITestCase):
+    def _pending_task(self, cookie, request_id):
+        status, _, inbox = self.http("GET", "/api/inbox", cookie=cookie)
+        self.assertEqual(status, 200)
+        tasks = [it["task"] for it in inbox["items"] if it["request"]["id"] == request_id]
+        self.assertTrue(tasks)
+        return tasks[0]
+
+    def test_decision_runs_no_catalog_queries(self):
+        user_cookie = self.login("user", "user")
+        admin_cookie = self.login("admin", "admin")
+        status, _, created = self.http(
+            "POST",
+            "/api/requests",
+            cookie=user_cookie,
+            json_body={"type": "expense", "title": "", "body": "", "payload": {"amount": 6000, "category": "travel"}},
+        )
+        self.assertEqual(status, 201)
+        task = self._pending_task(admin_cookie, created["id"])
+        self.assertEqual(task["step_key"], "manager")
+
+        admin = AuthenticatedUser(id=1, username="admin", role="admin")
+        with db.connect(self.db_path) as conn:
+            get_catalog(conn)
+            statements: list[str] = []
+            conn.set_trace_callback(statements.append)
+            task_actions.decide_task(conn, admin, task["id"], decision="approved", comment=None)
+            conn.set_trace_callback(None)
+        # get_request's display join on workflow_variants is not a catalog lookup.
+        self.assertFalse([s for s in statements if "FROM workflow_variant" in s])
+
+        # min_amount(5000) routed the request to the gm step.
+        self.assertEqual(self._pending_task(admin_cookie, created["id"])["step_key"], "gm")
+
+    def test_admin_edits_apply_immediately(self):
+        admin_cookie = self.login("admin", "admin")
+        key = f"cache_wf_{uuid.uuid4().hex[:8]}"
+        variant = {
+            "workflow_key": key,
+            "request_type": "generic",
+            "name": key,
+            "steps": [{"step_order": 1, "step_key": "first", "assignee_kind": "role", "assignee_value": "admin"}],
+        }
+        self.assertEqual(self.http("POST", "/api/admin/workflows", cookie=admin_cookie, json_body=variant)[0], 201)
+
+        def start():
+            status, _, created = self.http(
+                "POST",
+                "/api/requests",
+                cookie=admin_cookie,
+                json_body={"type": "generic", "workflow": key, "title": "t", "body": "b"},
+            )
+            self.assertEqual(status, 201)
+            return self._pending_task(admin_cookie, created["id"])["step_key"]
+
+        self.assertEqual(start(), "first")
+        variant["steps"][0]["step_key"] = "second"
+        self.assertEqual(self.http("POST", "/api/admin/workflows", cookie=admin_cookie, json_body=variant)[0], 201)
+        self.assertEqual(start(), "second")
+
+        self.assertEqual(self.http("POST", "/api/admin/workflows/delete", cookie=admin_cookie, json_body={"workflow_key": key})[0], 204)
+        status, _, err = self.http(
+            "POST", "/api/requests", cookie=admin_cookie, json_body={"type": "generic", "workflow": key, "title": "t", "body": "b"}
+        )
+        self.assertEqual((status, err["error"]), (400, "invalid_workflow"))
+
+    def test_steps_fallback_chain(self):
+        with db.connect(self.db_path) as conn:
+            catalog = get_catalog(conn)
+        self.assertEqual(catalog.steps_for("no_such_key", "leave"), catalog.get("leave").steps)
+        self.assertEqual(catalog.steps_for("no_such_key", "no_such_type"), catalog.get("generic").steps)
+        self.assertEqual(catalog.resolve_default("leave", dept="nowhere"), "leave")
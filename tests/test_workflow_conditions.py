@@ -0,0 +1,74 @@
+import unittest
+import uuid
+
+from _support_api import BaseAPITestCase
+
+from oa_server._server.workflow_conditions import compile_condition, parse_condition_expr
+
+
+class TestConditionExpressions(unittest.TestCase):
+    def test_and_or_not_precedence(self):
+        pred = parse_condition_expr("min_amount(5000) and (dept_in(IT, HR) or not category_in(travel))")
+        self.assertTrue(pred({"amount": 6000, "category": "travel"}, "hr"))
+        self.assertFalse(pred({"amount": 6000, "category": "travel"}, "Sales"))
+        self.assertTrue(pred({"amount": 6000, "category": "meals"}, "Sales"))
+        self.assertFalse(pred({"amount": 100, "category": "meals"}, "IT"))
+
+        # `and` binds tighter than `or`; symbolic operators are accepted too.
+        pred = parse_condition_expr("max_amount(10) || min_days(3) && !dept_in(IT)")
+        self.assertTrue(pred({"amount": 5}, "IT"))
+        self.assertTrue(pred({"amount": 50, "days": 5}, "HR"))
+        self.assertFalse(pred({"amount": 50, "days": 5}, "IT"))
+
+    def test_invalid_expressions(self):
+        for text in ["", "foo(1)", "expr(min_amount(1))", "min_amount(1) and", "(min_amount(1)", "IT", "min_amount(1) dept_in(IT)"]:
+            with self.subTest(text=text):
+                with self.assertRaisesRegex(ValueError, "invalid_condition"):
+                    parse_condition_expr(text)
+        # A stored expression that no longer parses never matches instead of failing the request.
+        self.assertFalse(compile_condition("expr", "foo(1)")({"amount": 1}, "IT"))
+
+    def test_compiled_once(self):
+        self.assertIs(compile_condition("dept_in", "IT,HR"), compile_condition("dept_in", "IT,HR"))
+        self.assertIs(compile_condition("expr", "min_days(2)"), compile_condition("expr", "min_days(2)"))
+
+
+class TestConditionExpressionsAPI(BaseAPITestCase):
+    def test_expr_step_routes_and_validates(self):
+        admin_cookie = self.login("admin", "admin")
+        key = f"expr_wf_{uuid.uuid4().hex[:8]}"
+        variant = {
+            "workflow_key": key,
+            "request_type": "expense",
+            "name": key,
+            "steps": [
+                {
+                    "step_order": 1,
+                    "step_key": "big_travel",
+                    "assignee_kind": "role",
+                    "assignee_value": "admin",
+                    "condition_kind": "expr",
+                    "condition_value": "min_amount(5000) and category_in(travel)",
+                },
+                {"step_order": 2, "step_key": "finance", "assignee_kind": "role", "assignee_value": "admin"},
+            ],
+        }
+        bad = {**variant, "steps": [{**variant["steps"][0], "condition_value": "min_amount(5000) and"}]}
+        status, _, body = self.http("POST", "/api/admin/workflows", cookie=admin_cookie, json_body=bad)
+        self.assertEqual(status, 400)
+        self.assertEqual(body["error"], "invalid_condition")
+        self.assertEqual(self.http("POST", "/api/admin/workflows", cookie=admin_cookie, json_body=variant)[0], 201)
+
+        def first_step(payload):
+            status, _, created = self.http(
+                "POST",
+                "/api/requests",
+                cookie=admin_cookie,
+                json_body={"type": "expense", "workflow": key, "title": "", "body": "", "payload": payload},
+            )
+            self.assertEqual(status, 201)
+            status, _, inbox = self.http("GET", "/api/inbox", cookie=admin_cookie)
+            return [it["task"]["step_key"] for it in inbox["items"] if it["request"]["id"] == created["id"]]
+
+        self.assertEqual(first_step({"amount": 6000, "category": "travel"}), ["big_travel"])
+        self.assertEqual(first_step({"amount": 6000, "category": "office"}), ["finance"])